@@ -1,8 +1,28 @@
-from cryptography.fernet import Fernet
+"""
+Field-level encryption for sensitive seller data.
+
+Keys are resolved once per process into a keyring: every key configured in
+FIELD_ENCRYPTION_KEYS ("<key id>:<fernet key>", newest first) plus the legacy
+key derived from SECRET_KEY, which is only ever used to read old values. New
+ciphertexts are written as "<key id>$<fernet token>" with the newest key, so
+decryption goes straight to the right key; values without a key id fall back
+to MultiFernet across the whole ring. The keyring is rebuilt when settings
+change (tests) or via reset_keyring().
+"""
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 import base64
 import hashlib
-import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LEGACY_KEY_ID = 'legacy'
+KEY_ID_SEPARATOR = '$'
+
 
 def get_encryption_key():
     """Generate encryption key from SECRET_KEY with salt"""
@@ -12,23 +32,111 @@ def get_encryption_key():
     key = hashlib.pbkdf2_hmac('sha256', key_material, salt, 100000)[:32]
     return base64.urlsafe_b64encode(key)
 
+
+class KeyRing:
+    def __init__(self, keys):
+        # keys: [(key_id, Fernet)], newest first
+        self.primary_id, self.primary = keys[0]
+        self.by_id = dict(keys)
+        self.multi = MultiFernet([fernet for _, fernet in keys])
+
+    @classmethod
+    def from_settings(cls):
+        keys = []
+        for entry in getattr(settings, 'FIELD_ENCRYPTION_KEYS', None) or []:
+            key_id, _, key = entry.partition(':')
+            if not key or KEY_ID_SEPARATOR in key_id:
+                raise ValueError(f"Invalid FIELD_ENCRYPTION_KEYS entry for key id {key_id!r}")
+            keys.append((key_id, Fernet(key.encode())))
+        # The SECRET_KEY-derived key is the primary only when nothing else is configured
+        keys.append((LEGACY_KEY_ID, Fernet(get_encryption_key())))
+        return cls(keys)
+
+    def encrypt(self, data):
+        token = self.primary.encrypt(data.encode()).decode()
+        if self.primary_id == LEGACY_KEY_ID:
+            return token
+        return f"{self.primary_id}{KEY_ID_SEPARATOR}{token}"
+
+    def decrypt(self, value):
+        key_id, sep, token = value.partition(KEY_ID_SEPARATOR)
+        fernet = self.by_id.get(key_id) if sep else None
+        if fernet is None:
+            return self.multi.decrypt(value.encode()).decode()
+        return fernet.decrypt(token.encode()).decode()
+
+    def needs_rotation(self, value):
+        key_id, sep, _ = value.partition(KEY_ID_SEPARATOR)
+        current = key_id if sep else LEGACY_KEY_ID
+        return current != self.primary_id
+
+
+_keyring = None
+_keyring_lock = threading.Lock()
+
+
+def get_keyring():
+    """Process-wide keyring; the expensive legacy key derivation runs once"""
+    global _keyring
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = KeyRing.from_settings()
+    return _keyring
+
+
+def reset_keyring():
+    global _keyring
+    with _keyring_lock:
+        _keyring = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting in ('SECRET_KEY', 'FIELD_ENCRYPTION_KEYS'):
+        reset_keyring()
+
+
 def encrypt_data(data: str) -> str:
     """Encrypt sensitive data"""
     if not data:
         return data
-    
-    fernet = Fernet(get_encryption_key())
-    encrypted = fernet.encrypt(data.encode())
-    return encrypted.decode()
+
+    return get_keyring().encrypt(data)
+
 
 def decrypt_data(encrypted_data: str) -> str:
     """Decrypt sensitive data"""
     if not encrypted_data:
         return encrypted_data
-    
+
     try:
-        fernet = Fernet(get_encryption_key())
-        decrypted = fernet.decrypt(encrypted_data.encode())
-        return decrypted.decode()
-    except Exception:
+        return get_keyring().decrypt(encrypted_data)
+    except (InvalidToken, ValueError):
         return encrypted_data  # Return as-is if decryption fails
+
+
+def decrypt_many(values):
+    """Decrypt a batch of values (e.g. admin exports) against one keyring lookup"""
+    keyring = get_keyring()
+    results = []
+    for value in values:
+        if not value:
+            results.append(value)
+            continue
+        try:
+            results.append(keyring.decrypt(value))
+        except (InvalidToken, ValueError):
+            results.append(value)
+    return results
+
+
+def rotate_data(encrypted_data: str) -> str:
+    """Re-encrypt a value with the current primary key; unchanged if already current"""
+    if not encrypted_data:
+        return encrypted_data
+
+    keyring = get_keyring()
+    if not keyring.needs_rotation(encrypted_data):
+        return encrypted_data
+    return keyring.encrypt(keyring.decrypt(encrypted_data))
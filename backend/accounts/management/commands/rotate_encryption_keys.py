@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from accounts.encryption import get_keyring, rotate_data
+from accounts.models import SellerProfile
+
+ENCRYPTED_FIELDS = ['_bank_account_number', '_aadhaar_number']
+
+
+class Command(BaseCommand):
+    help = 'Re-encrypt seller bank and Aadhaar numbers with the current primary key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(f'Primary key id: {get_keyring().primary_id}')
+
+        rotated, batch = 0, []
+        profiles = SellerProfile.objects.only('id', *ENCRYPTED_FIELDS).order_by('id')
+        for profile in profiles.iterator(chunk_size=batch_size):
+            changed = False
+            for field in ENCRYPTED_FIELDS:
+                value = getattr(profile, field)
+                new_value = rotate_data(value)
+                if new_value != value:
+                    setattr(profile, field, new_value)
+                    changed = True
+            if changed:
+                batch.append(profile)
+            if len(batch) >= batch_size:
+                SellerProfile.objects.bulk_update(batch, ENCRYPTED_FIELDS)
+                rotated += len(batch)
+                batch = []
+
+        if batch:
+            SellerProfile.objects.bulk_update(batch, ENCRYPTED_FIELDS)
+            rotated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Re-encrypted {rotated} seller profile(s)'))
@@ -2,6 +2,14 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from cryptography.fernet import Fernet
+from django.core.management import call_command
+from django.test import override_settings
+from io import StringIO
+from unittest import mock
+
+from . import encryption
+from .models import SellerProfile
 
 User = get_user_model()
 
@@ -45,3 +53,50 @@ class AuthenticationTests(TestCase):
         response = self.client.get('/api/accounts/profile/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['email'], self.user_data['email'])
+
+
+class FieldEncryptionTests(TestCase):
+    def setUp(self):
+        encryption.reset_keyring()
+        self.addCleanup(encryption.reset_keyring)
+
+    def test_key_is_derived_once_per_process(self):
+        with mock.patch.object(encryption.hashlib, 'pbkdf2_hmac', wraps=encryption.hashlib.pbkdf2_hmac) as derive:
+            for _ in range(50):
+                self.assertEqual(encryption.decrypt_data(encryption.encrypt_data('123456789012')), '123456789012')
+        self.assertEqual(derive.call_count, 1)
+
+    def test_per_call_cost_is_gone(self):
+        """After the first call, round trips reuse the keyring: no key derivation or Fernet construction"""
+        encryption.encrypt_data('warm-up')
+        with mock.patch.object(encryption.hashlib, 'pbkdf2_hmac', wraps=encryption.hashlib.pbkdf2_hmac) as derive, \
+                mock.patch.object(encryption, 'Fernet', wraps=encryption.Fernet) as fernet, \
+                mock.patch.object(encryption.KeyRing, 'from_settings', wraps=encryption.KeyRing.from_settings) as build:
+            for _ in range(200):
+                encryption.decrypt_data(encryption.encrypt_data('123456789012'))
+        self.assertEqual((derive.call_count, fernet.call_count, build.call_count), (0, 0, 0))
+
+    def test_rotation_keeps_old_values_readable(self):
+        legacy_value = encryption.encrypt_data('123456789012')
+        new_key = Fernet.generate_key().decode()
+
+        with override_settings(FIELD_ENCRYPTION_KEYS=[f'k2:{new_key}']):
+            self.assertEqual(encryption.decrypt_data(legacy_value), '123456789012')
+            rotated = encryption.rotate_data(legacy_value)
+            self.assertTrue(rotated.startswith('k2$'))
+            self.assertEqual(encryption.decrypt_data(rotated), '123456789012')
+            self.assertEqual(encryption.rotate_data(rotated), rotated)
+
+    def test_rotate_command_and_batched_decryption(self):
+        seller = User.objects.create_user(email='seller@example.com', password='SellerPass123!', role='SELLER')
+        profile = seller.seller_profile
+        profile.business_name = 'Store'
+        profile.bank_account_number = '1234567890'
+        profile.bank_ifsc_code = 'SBIN0001234'
+        profile.save()
+
+        with override_settings(FIELD_ENCRYPTION_KEYS=[f'k2:{Fernet.generate_key().decode()}']):
+            call_command('rotate_encryption_keys', stdout=StringIO())
+            stored = SellerProfile.objects.values_list('_bank_account_number', flat=True).get(pk=profile.pk)
+            self.assertTrue(stored.startswith('k2$'))
+            self.assertEqual(encryption.decrypt_many([stored, None, 'plain']), ['1234567890', None, 'plain'])
@@ -0,0 +1,11 @@
+from cart.serializers import CartSerializer
+
+from .conftest import check_queries, fill_cart
+
+
+def test_cart_serializer(benchmark, customer):
+    cart = fill_cart(customer, count=10)
+    serialize = lambda: CartSerializer(cart.__class__.objects.get(pk=cart.pk)).data
+    check_queries(benchmark, 'cart_serializer', serialize)
+    data = benchmark(serialize)
+    assert len(data['items']) == 10
@@ -0,0 +1,19 @@
+from catalog.models import Category
+from catalog.serializers import CategorySerializer, ProductListSerializer
+
+from .conftest import PAGE_SIZE, check_queries
+
+
+def test_product_list_serializer_page(benchmark, product_page):
+    serialize = lambda: ProductListSerializer(product_page.all(), many=True).data
+    check_queries(benchmark, 'product_list_serializer_page', serialize)
+    data = benchmark(serialize)
+    assert len(data) == PAGE_SIZE
+
+
+def test_category_serializer(benchmark, bench_data, db):
+    categories = Category.objects.filter(slug__startswith='bench-')
+    serialize = lambda: CategorySerializer(categories.all(), many=True).data
+    check_queries(benchmark, 'category_serializer', serialize)
+    data = benchmark(serialize)
+    assert len(data) == len(bench_data.categories)
@@ -0,0 +1,19 @@
+from accounts.models import Address
+from orders.services import OrderService
+
+from .conftest import check_queries, fill_cart
+
+
+def test_create_order_from_cart(benchmark, customer):
+    address = Address.objects.filter(user=customer).first()
+
+    def refill():
+        fill_cart(customer, count=5)
+
+    def checkout():
+        return OrderService.create_order_from_cart(customer, address.id, 'CARD')
+
+    refill()
+    check_queries(benchmark, 'create_order_from_cart', checkout)
+    order = benchmark.pedantic(checkout, setup=refill, rounds=30, iterations=1)
+    assert order.items.count() == 5
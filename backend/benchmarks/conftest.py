@@ -0,0 +1,82 @@
+"""
+Micro-benchmarks for hot serializers and services (pytest-benchmark).
+
+The bench_*.py files are not picked up by the regular test run; run them with
+
+    ./benchmarks/run.sh                 # compare against the local baseline
+    ./benchmarks/run.sh --save-baseline # record a baseline on this machine
+
+Timings depend on the machine, so baselines are kept out of git
+(benchmarks/baselines/ is ignored). Record one on the machine you compare on,
+e.g. before and after a change. What is committed is QUERY_COUNTS. Every
+benchmark asserts its query count, which holds on any machine.
+
+The dataset is a scaled-down BenchmarkDataGenerator run (same shape as the
+load-test dataset), created once per session and removed afterwards.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cart.models import Cart, CartItem
+from catalog.models import Product
+from core.benchmark_data import BenchmarkDataGenerator
+
+BENCH_SIZES = {
+    'categories': 20,
+    'sellers': 20,
+    'users': 200,
+    'products': 5000,
+    'orders': 500,
+    'reviews': 2000,
+}
+PAGE_SIZE = 20
+
+# Queries per benchmarked call; lower these when a change makes a call cheaper
+QUERY_COUNTS = {
+    'cart_serializer': 33,
+    'product_list_serializer_page': 21,
+    'category_serializer': 21,
+    'create_order_from_cart': 49,
+}
+
+
+def check_queries(benchmark, name, fn):
+    """Run `fn` once outside the timing, record its query count and compare it with QUERY_COUNTS"""
+    with CaptureQueriesContext(connection) as ctx:
+        result = fn()
+    benchmark.extra_info['queries'] = len(ctx.captured_queries)
+    assert len(ctx.captured_queries) == QUERY_COUNTS[name], (
+        f"{name}: {len(ctx.captured_queries)} queries, expected {QUERY_COUNTS[name]}"
+    )
+    return result
+
+
+@pytest.fixture(scope='session')
+def bench_data(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        BenchmarkDataGenerator.flush()
+        generator = BenchmarkDataGenerator(sizes=BENCH_SIZES, seed=42, batch_size=1000)
+        generator.run()
+    yield generator
+    with django_db_blocker.unblock():
+        BenchmarkDataGenerator.flush()
+
+
+@pytest.fixture
+def product_page(bench_data, db):
+    return Product.objects.filter(sku__startswith='BENCH-', is_active=True).select_related('category', 'brand')[:PAGE_SIZE]
+
+
+@pytest.fixture
+def customer(bench_data, db):
+    from django.contrib.auth import get_user_model
+    return get_user_model().objects.get(id=bench_data.customers[0])
+
+
+def fill_cart(user, count=10):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    cart.items.all().delete()
+    products = Product.objects.filter(sku__startswith='BENCH-', stock_quantity__gte=100).order_by('id')[:count]
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=1) for p in products])
+    return cart
@@ -0,0 +1,20 @@
+#!/bin/bash
+# Run the micro-benchmarks (fails on a query-count change, or on a >30% median
+# regression against this machine's baseline).
+#   ./benchmarks/run.sh                 compare with the latest local baseline
+#   ./benchmarks/run.sh --save-baseline record a baseline on this machine
+# Baselines hold machine-specific timings and are not committed.
+cd "$(dirname "$0")/.."
+
+STORAGE=benchmarks/baselines
+ARGS=(-q -p no:cacheprovider --benchmark-storage="$STORAGE" --benchmark-columns=min,mean,median,max,rounds --benchmark-sort=name)
+
+if [ "$1" == "--save-baseline" ]; then
+    shift
+    exec python -m pytest benchmarks/bench_*.py "${ARGS[@]}" --benchmark-save=baseline "$@"
+fi
+
+if ls "$STORAGE"/*/*_baseline.json >/dev/null 2>&1; then
+    ARGS+=(--benchmark-compare --benchmark-compare-fail=median:30%)
+fi
+exec python -m pytest benchmarks/bench_*.py "${ARGS[@]}" "$@"
@@ -1,10 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from coupons.models import Coupon
 
 # We import Product dynamically to avoid circular import errors
 from catalog.models import Product 
+from .pricing import CartPricing
 
 class Cart(models.Model):
     """
@@ -31,15 +33,24 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart {self.id} - {self.user.email if self.user else 'Guest'}"
 
+    @cached_property
+    def pricing(self):
+        """Subtotal, tax, discount and grand total, computed once per cart instance."""
+        return CartPricing.for_cart(self)
+
+    def refresh_pricing(self):
+        """Drop the memoized pricing after changing items or the coupon on this instance."""
+        self.__dict__.pop('pricing', None)
+
     @property
     def total_price(self):
-        """Calculates total value of the cart dynamically."""
-        return sum(item.subtotal for item in self.items.all())
+        """Subtotal before coupon and tax."""
+        return self.pricing.subtotal
 
     @property
     def total_items(self):
         """Count total individual items (quantity sum)."""
-        return sum(item.quantity for item in self.items.all())
+        return self.pricing.items
     
     coupon = models.ForeignKey(Coupon, on_delete=models.SET_NULL, null=True, blank=True)
 
@@ -0,0 +1,47 @@
+"""
+Cart pricing.
+
+One pass over the cart lines gives the item count, subtotal (selling price x
+quantity) and GST; the coupon discount and grand total follow from those.
+Cart.pricing memoizes the result on the cart instance, so the serializer,
+coupon checks and checkout share one computation per request, and checkout
+charges exactly what the cart page shows.
+"""
+from decimal import Decimal
+
+ZERO = Decimal('0.00')
+TWO_PLACES = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value).quantize(TWO_PLACES)
+
+
+class CartPricing:
+    def __init__(self, items=0, subtotal=ZERO, tax=ZERO, coupon=None):
+        self.items = items
+        self.subtotal = _money(subtotal)
+        self.tax = _money(tax)
+        self.coupon = coupon
+        self.discount = _money(coupon.get_discount_amount(self.subtotal)) if coupon else ZERO
+
+    @property
+    def grand_total(self):
+        return self.subtotal - self.discount + self.tax
+
+    @classmethod
+    def for_cart(cls, cart):
+        items, subtotal, tax = 0, ZERO, ZERO
+        for line in cart_lines(cart):
+            price = line.product.selling_price
+            items += line.quantity
+            subtotal += price * line.quantity
+            tax += price * line.product.tax_rate / 100 * line.quantity
+        return cls(items=items, subtotal=subtotal, tax=tax, coupon=cart.coupon)
+
+
+def cart_lines(cart):
+    """Cart items with their products: the prefetched ones if the view loaded them, else one query"""
+    if 'items' in getattr(cart, '_prefetched_objects_cache', {}):
+        return cart.items.all()
+    return cart.items.select_related('product')
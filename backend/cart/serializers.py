@@ -45,23 +45,14 @@ class CartSerializer(serializers.ModelSerializer):
     total_items = serializers.IntegerField(read_only=True)
     
     # New Fields for Summary
-    total_tax = serializers.SerializerMethodField()
-    grand_total = serializers.SerializerMethodField()
+    # All computed in one pass by Cart.pricing (same numbers checkout charges)
+    total_tax = serializers.DecimalField(source='pricing.tax', max_digits=10, decimal_places=2, read_only=True)
+    discount_amount = serializers.DecimalField(source='pricing.discount', max_digits=10, decimal_places=2, read_only=True)
+    grand_total = serializers.DecimalField(source='pricing.grand_total', max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'items', 'total_price', 'total_items', 'total_tax', 'grand_total', 'updated_at']
-
-    def get_total_tax(self, obj):
-        # Sum up tax of all items
-        tax = 0
-        for item in obj.items.all():
-            if hasattr(item.product, 'tax_amount'):
-                tax += item.product.tax_amount * item.quantity
-        return round(tax, 2)
-
-    def get_grand_total(self, obj):
-        # Subtotal + Tax
-        tax = self.get_total_tax(obj)
-        # obj.total_price is the subtotal (selling price * qty)
-        return round(obj.total_price + tax, 2)
\ No newline at end of file
+        fields = [
+            'id', 'user', 'items', 'total_price', 'total_items', 'total_tax', 'discount_amount', 'grand_total',
+            'updated_at'
+        ]
\ No newline at end of file
@@ -65,3 +65,51 @@ class CartTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         item.refresh_from_db()
         self.assertEqual(item.quantity, 3)
+
+
+class CartPricingTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from coupons.models import Coupon
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='customer@example.com', password='CustomerPass123!', role='CUSTOMER')
+        seller = User.objects.create_user(email='seller@example.com', password='SellerPass123!', role='SELLER')
+        self.product = Product.objects.create(
+            seller=seller, category=Category.objects.create(name='Electronics', slug='electronics'),
+            name='Test Product', sku='TEST-001', description='Test description', price=100, stock_quantity=10,
+            is_active=True
+        )
+        self.coupon = Coupon.objects.create(
+            code='FLAT20', discount_type=Coupon.DiscountTypes.FIXED, discount_value=20, min_purchase_amount=0,
+            valid_from=timezone.now() - timedelta(days=1), valid_to=timezone.now() + timedelta(days=1),
+        )
+        self.cart = Cart.objects.create(user=self.user, coupon=self.coupon)
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+    def test_totals_in_one_pass(self):
+        cart = Cart.objects.get(id=self.cart.id)
+        with self.assertNumQueries(2):  # Items with products, then the coupon
+            pricing = cart.pricing
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.total_price, 200)
+            self.assertEqual(cart.total_items, 2)
+        self.assertEqual(pricing.tax, 36)
+        self.assertEqual(pricing.discount, 20)
+        self.assertEqual(pricing.grand_total, 216)
+
+    def test_cart_api_and_checkout_agree(self):
+        from accounts.models import Address
+        from orders.services import OrderService
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/cart/')
+        self.assertEqual(response.data['grand_total'], '216.00')
+        self.assertEqual(response.data['discount_amount'], '20.00')
+
+        address = Address.objects.create(
+            user=self.user, full_name='Test Customer', phone_number='1234567890', street_address='1 Test St',
+            city='Pune', state='Maharashtra', postal_code='411001', is_default=True
+        )
+        order = OrderService.create_order_from_cart(self.user, address.id, 'COD')
+        self.assertEqual(order.total_amount, 216)
+        self.assertEqual(order.discount_amount, 20)
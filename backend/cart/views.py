@@ -3,11 +3,21 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Prefetch
 from .models import Cart, CartItem
 from .serializers import CartSerializer, CartItemSerializer
 from catalog.models import Product
 from coupons.models import Coupon
 
+def carts_with_items():
+    """Carts with everything CartSerializer and Cart.pricing read, in three queries"""
+    items = Prefetch(
+        'items',
+        queryset=CartItem.objects.select_related('product__category', 'product__brand').prefetch_related('product__images')
+    )
+    return Cart.objects.select_related('coupon').prefetch_related(items)
+
+
 class CartAPIView(views.APIView):
     """
     GET: Retrieve the authenticated user's cart.
@@ -18,7 +28,7 @@ class CartAPIView(views.APIView):
 
     def get_cart(self, request):
         # Get or Create a cart for the logged-in user
-        cart, created = Cart.objects.prefetch_related('items__product').get_or_create(user=request.user)
+        cart, created = carts_with_items().get_or_create(user=request.user)
         return cart
 
     def get(self, request):
@@ -104,7 +114,7 @@ class AddToCartView(views.APIView):
                 cart_item.save()
         
             # Return updated cart with prefetched items
-            cart = Cart.objects.prefetch_related('items__product').get(id=cart.id)
+            cart = carts_with_items().get(id=cart.id)
             serializer = CartSerializer(cart)
             return Response(serializer.data, status=status.HTTP_200_OK)
             
@@ -142,7 +152,7 @@ class UpdateCartItemView(views.APIView):
                 cart_item.save()
 
         # Return full updated cart for UI sync with prefetched items
-        cart = Cart.objects.prefetch_related('items__product').get(id=cart_item.cart.id)
+        cart = carts_with_items().get(id=cart_item.cart.id)
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
@@ -152,7 +162,7 @@ class UpdateCartItemView(views.APIView):
         cart_item.delete()
         
         # Return cart with prefetched items
-        cart = Cart.objects.prefetch_related('items__product').get(id=cart.id)
+        cart = carts_with_items().get(id=cart.id)
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
@@ -167,12 +177,13 @@ class ApplyCouponView(views.APIView):
 
     def post(self, request):
         code = request.data.get('code')
-        cart, _ = Cart.objects.get_or_create(user=request.user)
+        cart, _ = carts_with_items().get_or_create(user=request.user)
         
         # If no code provided, remove coupon
         if not code:
             cart.coupon = None
             cart.save()
+            cart.refresh_pricing()
             return Response(CartSerializer(cart).data)
 
         try:
@@ -190,8 +201,8 @@ class ApplyCouponView(views.APIView):
                 return Response({"error": "Coupon has expired"}, status=status.HTTP_400_BAD_REQUEST)
             
             # 3. Check Minimum Purchase
-            # Note: total_price property on Cart should calculate raw total before discount
-            if cart.total_price < coupon.min_purchase_amount:
+            # Subtotal before any discount
+            if cart.pricing.subtotal < coupon.min_purchase_amount:
                 return Response(
                     {"error": f"Minimum purchase of ₹{coupon.min_purchase_amount} required"}, 
                     status=status.HTTP_400_BAD_REQUEST
@@ -200,16 +211,12 @@ class ApplyCouponView(views.APIView):
             # Apply Logic
             cart.coupon = coupon
             cart.save()
-            
-            # Calculate discount amount for immediate feedback
-            discount_amount = coupon.get_discount_amount(cart.total_price)
-            
-            # Return cart with prefetched items
-            cart = Cart.objects.prefetch_related('items__product').get(id=cart.id)
+            # Items are already loaded; re-pricing with the coupon is an in-memory pass
+            cart.refresh_pricing()
             
             return Response({
                 "message": "Coupon Applied Successfully",
-                "discount_amount": discount_amount,
+                "discount_amount": cart.pricing.discount,
                 "code": coupon.code,
                 "cart": CartSerializer(cart).data
             }, status=status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_category_seo_description_category_seo_keywords_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
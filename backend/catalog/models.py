@@ -78,6 +78,7 @@ class Product(models.Model):
     stock_quantity = models.PositiveIntegerField(default=0)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     review_count = models.PositiveIntegerField(default=0)
+    wishlist_count = models.PositiveIntegerField(default=0)  # Customers wishlisting it; kept by wishlist.store
     
     compatible_devices = models.ManyToManyField(DeviceModel, related_name='compatible_parts', blank=True)
     specifications = models.JSONField(default=dict, blank=True)
@@ -101,6 +102,23 @@ class Product(models.Model):
             models.Index(fields=['-created_at']),
         ]
 
+    # What the SEO payload (seo.payloads) renders from; stock counts only as in/out of stock
+    SEO_FIELDS = (
+        'name', 'slug', 'sku', 'description', 'price', 'discount_price', 'brand_id', 'category_id', 'seller_id',
+        'rating', 'review_count', 'seo_title', 'seo_description', 'seo_keywords', 'is_active', 'is_deleted',
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # SEO-relevant state as loaded, so a save that changes none of it skips SEO regeneration
+        instance._loaded_seo_state = instance.seo_state()
+        return instance
+
+    def seo_state(self):
+        values = self.__dict__
+        return tuple(values.get(field) for field in self.SEO_FIELDS) + ((values.get('stock_quantity') or 0) > 0,)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.name)
@@ -113,6 +131,8 @@ class Product(models.Model):
             self.discount_price = None
 
         super().save(*args, **kwargs)
+        # post_save receivers have seen the change; later saves diff against this
+        self._loaded_seo_state = self.seo_state()
 
     def delete(self, *args, **kwargs):
         """Soft delete implementation"""
@@ -131,6 +151,12 @@ class Product(models.Model):
         price = self.selling_price
         return (price * self.tax_rate) / 100
 
+    @property
+    def feature_image(self):
+        """Image flagged as feature, else the first one; uses prefetch_related('images') when present"""
+        images = sorted(self.images.all(), key=lambda image: image.pk)
+        return next((image for image in images if image.is_feature), images[0] if images else None)
+
     def __str__(self):
         return self.name
 
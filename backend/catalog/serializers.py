@@ -1,3 +1,4 @@
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
 from .models import Brand, DeviceModel, Category, Product, ProductImage
 
@@ -21,6 +22,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'parent', 'product_count']
     
     def get_product_count(self, obj):
+        # CategoryViewSet annotates the count; fall back to a query for single objects
+        if hasattr(obj, 'active_product_count'):
+            return obj.active_product_count
         return obj.products.filter(is_active=True, is_deleted=False).count()
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -30,25 +34,31 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
 # --- PRODUCT SERIALIZERS ---
 
+def purchased_by_viewer(serializer, product):
+    """ "You bought this": ProductViewSet puts the page's purchased product ids in the context """
+    return product.id in serializer.context.get('purchased_ids', ())
+
 class ProductListSerializer(serializers.ModelSerializer):
     """ Lightweight serializer for cards on the grid page """
     feature_image = serializers.SerializerMethodField()
     category_name = serializers.ReadOnlyField(source='category.name')
     brand_name = serializers.ReadOnlyField(source='brand.name')
     tax_amount = serializers.ReadOnlyField()
+    purchased = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'price', 'discount_price', 'discount_percentage',
             'category_name', 'brand_name', 'stock_quantity', 'feature_image', 
-            'tax_rate', 'tax_amount'
+            'tax_rate', 'tax_amount', 'purchased'
         ]
 
+    def get_purchased(self, obj):
+        return purchased_by_viewer(self, obj)
+
     def get_feature_image(self, obj):
-        img = obj.images.filter(is_feature=True).first()
-        if not img:
-            img = obj.images.first()
+        img = obj.feature_image
         return img.image.url if img else None
 
 class ProductDetailSerializer(serializers.ModelSerializer):
@@ -66,6 +76,10 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     seller_rating = serializers.ReadOnlyField(source='seller.seller_profile.rating')
     seller_joined = serializers.ReadOnlyField(source='seller.date_joined')
     
+    # --- RATING BREAKDOWN (maintained by reviews.rating_stats) ---
+    rating_histogram = serializers.SerializerMethodField()
+    purchased = serializers.SerializerMethodField()
+
     # --- SEO DATA ---
     seo_data = serializers.SerializerMethodField()
     structured_data = serializers.SerializerMethodField()
@@ -76,7 +90,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'sku', 'description', 'price', 'discount_price',
             'stock_quantity', 'images', 'compatible_devices', 'specifications',
             # Ratings
-            'rating', 'review_count',
+            'rating', 'review_count', 'rating_histogram', 'purchased',
             # Seller Info
             'seller_name', 'seller_location', 'seller_rating', 'seller_joined',
             # Context Info (The Fix)
@@ -85,22 +99,23 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'seo_data', 'structured_data'
         ]
     
+    def get_rating_histogram(self, obj):
+        try:
+            return obj.rating_stats.histogram
+        except ObjectDoesNotExist:
+            return {star: 0 for star in range(5, 0, -1)}
+
+    def get_purchased(self, obj):
+        return purchased_by_viewer(self, obj)
+
+    # Both read the precomputed ProductSEO row (select_related by the view)
     def get_seo_data(self, obj):
-        from seo.services import SEOService
-        metadata = SEOService.get_or_create_metadata(obj)
-        return {
-            'title': metadata.title,
-            'description': metadata.description,
-            'keywords': metadata.keywords,
-            'canonical_url': metadata.canonical_url,
-            'og_title': metadata.og_title,
-            'og_description': metadata.og_description,
-            'og_image': metadata.og_image,
-        }
+        from seo.payloads import product_payload
+        return product_payload(obj)[0]
     
     def get_structured_data(self, obj):
-        from seo.services import SEOService
-        return SEOService.generate_product_structured_data(obj)
+        from seo.payloads import product_payload
+        return product_payload(obj)[1]
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     """ Serializer for Sellers to Add/Edit products """
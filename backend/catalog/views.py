@@ -4,7 +4,7 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.core.files.base import ContentFile
 from django.utils.text import slugify
 from django.core.files.storage import default_storage
@@ -29,6 +29,7 @@ from .serializers import (
     ProductListSerializer, ProductDetailSerializer, ProductCreateUpdateSerializer,
     CategorySerializer, BrandSerializer
 )
+from orders.purchases import purchased_product_ids
 from .permissions import IsSellerOrReadOnly, IsSeller, IsSellerProfileComplete
 
 # Setup Logger
@@ -39,18 +40,22 @@ class ProductViewSet(viewsets.ModelViewSet):
     Public: List/Retrieve Products.
     Seller: Create/Update/Delete their own products.
     """
-    queryset = Product.objects.all().select_related('category', 'seller').prefetch_related('images')
+    queryset = Product.objects.all().select_related(
+        'category', 'brand', 'seller__seller_profile'
+    ).prefetch_related('images')
     lookup_field = 'slug'
     
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category__slug', 'stock_quantity', 'seller', 'is_active'] 
     search_fields = ['name', 'description', 'sku']
-    ordering_fields = ['price', 'created_at', 'stock_quantity', 'review_count']
+    ordering_fields = ['price', 'created_at', 'stock_quantity', 'review_count', 'wishlist_count']
     ordering = ['-created_at']  # Default ordering
 
     def get_queryset(self):
         try:
             queryset = super().get_queryset()
+            if self.action != 'list':
+                queryset = queryset.select_related('rating_stats', 'seo').prefetch_related('compatible_devices__brand')
             user = self.request.user
             
             logger.info(f"ProductViewSet.get_queryset - User: {user}, Role: {getattr(user, 'role', 'None')}, Authenticated: {user.is_authenticated}")
@@ -66,7 +71,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             if user.is_authenticated and user.role == 'SELLER' and my_products_only:
                 # Seller dashboard - show only seller's own products
                 seller_products = queryset.filter(seller=user)
-                logger.info(f"Returning {seller_products.count()} seller products for user {user.id}")
+                logger.info(f"Returning seller products for user {user.id}")
                 return seller_products
             
             # For ALL other cases (customers, anonymous users, sellers browsing marketplace)
@@ -86,12 +91,23 @@ class ProductViewSet(viewsets.ModelViewSet):
             if brand:
                 queryset = queryset.filter(brand__name__icontains=brand)
             
-            logger.info(f"Returning {queryset.count()} active products from ALL sellers for marketplace view")
+            # No count() here: pagination already counts, and logging must not add a query per request
+            logger.info("Returning active products from ALL sellers for marketplace view")
             return queryset
         except Exception as e:
             logger.error(f"ProductViewSet.get_queryset error: {str(e)}")
             return Product.objects.none()
 
+    def get_serializer(self, *args, **kwargs):
+        # "You bought this" for every product on the page from one indexed lookup
+        if self.action in ('list', 'retrieve') and args and self.request.user.is_authenticated:
+            products = args[0] if kwargs.get('many') else [args[0]]
+            kwargs['context'] = {
+                **self.get_serializer_context(),
+                'purchased_ids': purchased_product_ids(self.request.user, [p.id for p in products]),
+            }
+        return super().get_serializer(*args, **kwargs)
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ProductListSerializer
@@ -132,7 +148,9 @@ class ProductViewSet(viewsets.ModelViewSet):
 
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.all().order_by('name')
+    queryset = Category.objects.annotate(
+        active_product_count=Count('products', filter=Q(products__is_active=True, products__is_deleted=False))
+    ).order_by('name')
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None  # Disable pagination for categories
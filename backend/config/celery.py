@@ -21,6 +21,67 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
         'options': {'queue': 'catalog'}
     },
+    'snapshot-wallet-balances-daily': {
+        'task': 'wallet.tasks.snapshot_wallet_balances',
+        'schedule': crontab(hour=0, minute=30),  # Daily, after midnight
+        'options': {'queue': 'payments'}
+    },
+    'process-webhook-inbox': {
+        'task': 'payments.tasks.process_webhook_events',
+        'schedule': 60.0,  # Sweep for events whose drain was missed
+        'options': {'queue': 'payments'}
+    },
+    'process-payout-queue': {
+        'task': 'sellers.tasks.process_payout_queue',
+        'schedule': 300.0,  # Every 5 minutes
+        'options': {'queue': 'sellers'}
+    },
+    'reconcile-payouts': {
+        'task': 'sellers.tasks.reconcile_payouts',
+        'schedule': 900.0,  # Every 15 minutes
+        'options': {'queue': 'sellers'}
+    },
+    'settle-seller-earnings-hourly': {
+        'task': 'sellers.tasks.settle_seller_earnings',
+        'schedule': crontab(minute=15),  # Hourly
+        'options': {'queue': 'sellers'}
+    },
+    'rebuild-seller-order-counts-nightly': {
+        'task': 'sellers.tasks.rebuild_seller_order_counts',
+        'schedule': crontab(hour=3, minute=30),  # Daily, off-peak
+        'options': {'queue': 'sellers'}
+    },
+    'rebuild-seller-stats-nightly': {
+        'task': 'sellers.tasks.rebuild_seller_stats',
+        'schedule': crontab(hour=3, minute=45),  # Daily, after the inbox counters
+        'options': {'queue': 'sellers'}
+    },
+    'reconcile-rating-stats-nightly': {
+        'task': 'reviews.tasks.reconcile_rating_stats',
+        'schedule': crontab(hour=4, minute=0),  # Daily, off-peak
+        'options': {'queue': 'catalog'}
+    },
+    'reconcile-wishlist-counts-nightly': {
+        'task': 'wishlist.tasks.reconcile_wishlist_counts',
+        'schedule': crontab(hour=4, minute=30),  # Daily, after the rating stats
+        'options': {'queue': 'catalog'}
+    },
+    'refresh-product-seo': {
+        'task': 'seo.tasks.refresh_product_seo',
+        'schedule': 600.0,  # Every 10 minutes, behind the debounced runs
+        'options': {'queue': 'catalog'}
+    },
+    'build-sitemaps-hourly': {
+        'task': 'seo.tasks.build_sitemaps',
+        'schedule': crontab(minute=15),  # Hourly: shards with updated products
+        'options': {'queue': 'catalog'}
+    },
+    'build-sitemaps-weekly-full': {
+        'task': 'seo.tasks.build_sitemaps',
+        'schedule': crontab(day_of_week=0, hour=5, minute=0),  # Sundays: every shard, drops hard deletes
+        'kwargs': {'full': True},
+        'options': {'queue': 'catalog'}
+    },
     'process-pending-notifications': {
         'task': 'notifications.tasks.process_pending_notifications',
         'schedule': 300.0,  # Every 5 minutes
@@ -55,6 +116,10 @@ app.conf.task_routes = {
     'sellers.tasks.*': {'queue': 'sellers'},
     'shipping.tasks.*': {'queue': 'shipping'},
     'cart.tasks.*': {'queue': 'catalog'},
+    'reviews.tasks.*': {'queue': 'catalog'},
+    'seo.tasks.*': {'queue': 'catalog'},
+    'wishlist.tasks.*': {'queue': 'catalog'},
+    'wallet.tasks.*': {'queue': 'payments'},
 }
 
 @app.task(bind=True, ignore_result=True)
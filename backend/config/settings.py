@@ -25,6 +25,10 @@ if env_file.exists():
 
 # --- SECURITY CONFIGURATION ---
 SECRET_KEY = env("SECRET_KEY")
+# Field encryption keys as "<key id>:<fernet key>", newest first. Values written
+# with older keys stay readable; run `manage.py rotate_encryption_keys` after
+# adding a key. Without any, a key derived from SECRET_KEY is used.
+FIELD_ENCRYPTION_KEYS = env.list("FIELD_ENCRYPTION_KEYS", default=[])
 DEBUG = env.bool("DEBUG", default=False)
 
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["localhost", "127.0.0.1", "testserver"])
@@ -100,7 +104,7 @@ MIDDLEWARE = [
     "core.middleware.ErrorHandlingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "core.middleware.RequestLoggingMiddleware",
+    "core.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -145,7 +149,7 @@ if 'postgresql' in DATABASES['default']['ENGINE']:
 try:
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'BACKEND': 'core.cache.ProfiledRedisCache',
             'LOCATION': env('REDIS_URL', default='redis://127.0.0.1:6379/1'),
             'KEY_PREFIX': 'ecommerce',
             'TIMEOUT': 300,
@@ -310,6 +314,10 @@ CELERY_TASK_ROUTES = {
     'payments.tasks.*': {'queue': 'payments'},
     'sellers.tasks.*': {'queue': 'sellers'},
     'shipping.tasks.*': {'queue': 'shipping'},
+    'wallet.tasks.*': {'queue': 'payments'},
+    'reviews.tasks.*': {'queue': 'catalog'},
+    'seo.tasks.*': {'queue': 'catalog'},
+    'wishlist.tasks.*': {'queue': 'catalog'},
 }
 
 # Only use eager mode in tests, not in dev/prod
@@ -338,10 +346,76 @@ RAZORPAY_PAYOUT_ACCOUNT_NUMBER = env('RAZORPAY_PAYOUT_ACCOUNT_NUMBER', default='
 RAZORPAY_PAYOUT_KEY_ID = env('RAZORPAY_PAYOUT_KEY_ID', default='')
 RAZORPAY_PAYOUT_KEY_SECRET = env('RAZORPAY_PAYOUT_KEY_SECRET', default='')
 
+# Razorpay webhook inbox: events per drain batch, debounce before a drain runs
+# (seconds), and attempts before an event is parked as FAILED
+RAZORPAY_WEBHOOK_BATCH_SIZE = env.int('RAZORPAY_WEBHOOK_BATCH_SIZE', default=100)
+RAZORPAY_WEBHOOK_BATCH_DELAY = env.int('RAZORPAY_WEBHOOK_BATCH_DELAY', default=2)
+RAZORPAY_WEBHOOK_MAX_ATTEMPTS = env.int('RAZORPAY_WEBHOOK_MAX_ATTEMPTS', default=5)
+
 # Shiprocket API Credentials
 SHIPROCKET_EMAIL = env('SHIPROCKET_EMAIL', default='')
 SHIPROCKET_PASSWORD = env('SHIPROCKET_PASSWORD', default='')
 
+# Tracking sync: shards fanned out per beat run and concurrent carrier calls per shard
+SHIPPING_TRACKING_SHARDS = env.int('SHIPPING_TRACKING_SHARDS', default=4)
+SHIPPING_TRACKING_CONCURRENCY = env.int('SHIPPING_TRACKING_CONCURRENCY', default=8)
+SHIPPING_TRACKING_BATCH_SIZE = env.int('SHIPPING_TRACKING_BATCH_SIZE', default=200)
+SHIPROCKET_TOKEN_TTL = 9 * 24 * 3600  # Shiprocket tokens are valid for 10 days
+SHIPROCKET_PICKUP_PINCODE = env('SHIPROCKET_PICKUP_PINCODE', default='')
+
+# Courier quotes: cached per (origin, destination prefix, weight band); stale
+# entries are served while refreshed in the background until MAX_AGE
+COURIER_QUOTE_PREFIX_LENGTH = env.int('COURIER_QUOTE_PREFIX_LENGTH', default=3)
+COURIER_QUOTE_TTL = env.int('COURIER_QUOTE_TTL', default=3600)
+COURIER_QUOTE_MAX_AGE = env.int('COURIER_QUOTE_MAX_AGE', default=24 * 3600)
+
+# Bulk fulfilment: concurrent shipment submissions, AWB rows per bulk_update,
+# and how long a job's claim on an item holds before another job may ship it
+SHIPPING_FULFILMENT_CONCURRENCY = env.int('SHIPPING_FULFILMENT_CONCURRENCY', default=4)
+SHIPPING_FULFILMENT_BATCH_SIZE = env.int('SHIPPING_FULFILMENT_BATCH_SIZE', default=50)
+SHIPPING_FULFILMENT_CLAIM_TIMEOUT_MINUTES = env.int('SHIPPING_FULFILMENT_CLAIM_TIMEOUT_MINUTES', default=30)
+
+# Homepage seller leaderboard, read from SellerStats (rebuilt nightly)
+TOP_SELLERS_CACHE_SECONDS = env.int('TOP_SELLERS_CACHE_SECONDS', default=300)
+
+# SEO payload regeneration (seo.queue): seconds to coalesce changes before a
+# drain, and products rendered per batch
+SEO_REFRESH_DELAY = env.int('SEO_REFRESH_DELAY', default=30)
+SEO_REFRESH_BATCH_SIZE = env.int('SEO_REFRESH_BATCH_SIZE', default=500)
+
+# Pre-rendered sitemaps (seo.sitemaps): product ids per sitemap-products-N.xml.gz
+# (at most the protocol's 50,000 URLs), the host page URLs point at, and this
+# backend's public URL, which serves the files the index lists
+SITEMAP_SHARD_SIZE = env.int('SITEMAP_SHARD_SIZE', default=50_000)
+SITEMAP_BASE_URL = env('SITEMAP_BASE_URL', default=FRONTEND_URL)
+SITEMAP_FILES_URL = env('SITEMAP_FILES_URL', default='http://localhost:8000')
+
+# First page of each product's reviews (per ordering); dropped on any review change or vote
+REVIEWS_FIRST_PAGE_CACHE_SECONDS = env.int('REVIEWS_FIRST_PAGE_CACHE_SECONDS', default=600)
+
+# Per-user wishlist sets in Redis (wishlist.store), reloaded from the database after expiry
+WISHLIST_CACHE_SECONDS = env.int('WISHLIST_CACHE_SECONDS', default=24 * 3600)
+
+# --- OUTBOUND HTTP (core.http_client) ---
+# Defaults for every provider session; override per provider below
+EXTERNAL_HTTP_DEFAULTS = {
+    'timeout': 10,
+    'retries': env.int('EXTERNAL_HTTP_RETRIES', default=3),
+    'backoff_factor': 0.5,
+    'pool_connections': 4,
+    'pool_maxsize': 10,
+    'circuit_failure_threshold': 5,
+    'circuit_reset_timeout': 30,
+    'rate_limit': None,  # requests/second per process; None = unlimited
+}
+EXTERNAL_HTTP_PROVIDERS = {
+    'shiprocket': {
+        'pool_maxsize': SHIPPING_TRACKING_CONCURRENCY,
+        'timeout': 15,
+        'rate_limit': env.float('SHIPROCKET_RATE_LIMIT', default=10),
+    },
+}
+
 # --- EXTERNAL API KEYS (Centralized) ---
 # KYC Verification APIs
 UIDAI_API_KEY = env('UIDAI_API_KEY', default='')  # Aadhaar verification
@@ -366,6 +440,16 @@ CLOUDINARY_CLOUD_NAME = env('CLOUDINARY_CLOUD_NAME', default='')
 CLOUDINARY_API_KEY = env('CLOUDINARY_API_KEY', default='')
 CLOUDINARY_API_SECRET = env('CLOUDINARY_API_SECRET', default='')
 
+# --- REQUEST PROFILING ---
+# Share of requests that get the DB/cache/HTTP/serializer breakdown (timing and
+# status are always recorded), repeated-SQL threshold for N+1 warnings, slow
+# request log threshold, and the bearer token guarding /metrics (without one,
+# /metrics is only served in DEBUG)
+PROFILING_SAMPLE_RATE = env.float('PROFILING_SAMPLE_RATE', default=1.0 if DEBUG else 0.1)
+PROFILING_N_PLUS_ONE_THRESHOLD = env.int('PROFILING_N_PLUS_ONE_THRESHOLD', default=10)
+PROFILING_SLOW_REQUEST_MS = env.int('PROFILING_SLOW_REQUEST_MS', default=1000)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
 # --- LOGGING CONFIGURATION ---
 LOGGING = {
     'version': 1,
@@ -462,6 +546,19 @@ else:
 # --- BUSINESS LOGIC ---
 PLATFORM_COMMISSION_RATE = 0.10
 
+# Seller settlement: earnings are posted once items are past the return window
+SELLER_SETTLEMENT_HOLD_DAYS = env.int('SELLER_SETTLEMENT_HOLD_DAYS', default=7)
+SELLER_SETTLEMENT_BATCH_SIZE = env.int('SELLER_SETTLEMENT_BATCH_SIZE', default=200)  # orders per transaction
+
+# Payout queue: concurrent sellers per run, rows claimed per run, how long a
+# claimed withdrawal or payout with no Razorpay id waits before its reference
+# is looked up (and, if Razorpay has no transfer, it is queued again), and how
+# many rejected submissions a payout gets before it is FAILED
+PAYOUT_CONCURRENCY = env.int('PAYOUT_CONCURRENCY', default=4)
+PAYOUT_BATCH_SIZE = env.int('PAYOUT_BATCH_SIZE', default=100)
+PAYOUT_CLAIM_TIMEOUT_MINUTES = env.int('PAYOUT_CLAIM_TIMEOUT_MINUTES', default=30)
+PAYOUT_MAX_SUBMIT_ATTEMPTS = env.int('PAYOUT_MAX_SUBMIT_ATTEMPTS', default=5)
+
 # Account Security
 ACCOUNT_LOCKOUT_THRESHOLD = 5
 ACCOUNT_LOCKOUT_DURATION = 1800  # 30 minutes
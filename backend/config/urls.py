@@ -8,11 +8,12 @@ from django.conf.urls.static import static
 
 # --- IMPORT SWAGGER/OPENAPI VIEWS ---
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from core.health import health_check, readiness_check
+from core.health import health_check, metrics, readiness_check
 
 urlpatterns = [
     path('health/', health_check, name='health'),
     path('ready/', readiness_check, name='readiness'),
+    path('metrics', metrics, name='metrics'),
     # --- API DOCUMENTATION (Swagger UI) ---
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -0,0 +1,307 @@
+"""
+Seeded benchmark dataset.
+
+Generates sellers, customers (with addresses and wallets), categories,
+products, orders with items and reviews using bulk_create in fixed-size
+batches, so a million products load in minutes and memory stays bounded.
+Every row is derived from the seed and its sequence number, so two runs with
+the same seed and sizes produce the same data. That includes timestamps, which
+count from a fixed EPOCH instead of now(); auto_now fields are switched off
+while the rows are written (explicit_timestamps). Only database ids and the
+derived counters refreshed at the end differ. Benchmark rows are namespaced
+(emails @bench.local, SKUs BENCH-*, slugs bench-*) and can be flushed without
+touching anything else.
+"""
+import logging
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Address, SellerProfile
+from catalog.models import Category, Product
+from orders.models import Order, OrderItem
+from orders.purchases import rebuild as rebuild_purchases
+from reviews.models import Review
+from reviews.rating_stats import reconcile as reconcile_ratings
+from sellers.leaderboard import rebuild_stats
+from sellers.order_inbox import rebuild_counts
+from wallet.models import Wallet
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+EMAIL_DOMAIN = 'bench.local'
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+PASSWORD = 'benchpass123'
+
+DEFAULT_SIZES = {
+    'categories': 50,
+    'sellers': 1000,
+    'users': 100_000,
+    'products': 1_000_000,
+    'orders': 200_000,
+    'reviews': 500_000,
+}
+
+ORDER_STATUSES = [('DELIVERED', 60), ('SHIPPED', 15), ('PROCESSING', 15), ('PENDING', 5), ('CANCELLED', 5)]
+CITIES = [('Bengaluru', 'Karnataka', '560'), ('Mumbai', 'Maharashtra', '400'), ('Delhi', 'Delhi', '110'),
+          ('Chennai', 'Tamil Nadu', '600'), ('Kolkata', 'West Bengal', '700'), ('Pune', 'Maharashtra', '411')]
+PART_TYPES = ['Battery', 'Display Assembly', 'Charging Port', 'Back Glass', 'Camera Module',
+              'Speaker', 'Power Flex', 'Housing', 'Touch Digitizer', 'SIM Tray']
+
+
+def seller_email(n):
+    return f'bench-seller-{n}@{EMAIL_DOMAIN}'
+
+
+def customer_email(n):
+    return f'bench-user-{n}@{EMAIL_DOMAIN}'
+
+
+def product_price(n):
+    return Decimal(99 + (n * 7919) % 20000)
+
+
+def timestamp(n, offset_days=0):
+    """Creation time of row n: one minute apart, counting from EPOCH (+ offset_days)"""
+    return EPOCH + timedelta(days=offset_days, minutes=n)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Keep the created_at/updated_at values set on each row instead of auto_now/auto_now_add stamping now()"""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def scaled_sizes(scale=1.0, **overrides):
+    """Default sizes times `scale`; the category tree keeps its size"""
+    sizes = {
+        name: count if name == 'categories' else max(1, int(count * scale))
+        for name, count in DEFAULT_SIZES.items()
+    }
+    sizes.update({name: count for name, count in overrides.items() if count is not None})
+    return sizes
+
+
+class BenchmarkDataGenerator:
+    def __init__(self, sizes=None, seed=42, batch_size=5000, stdout=None):
+        self.sizes = sizes or dict(DEFAULT_SIZES)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.rng = random.Random(seed)
+        self.password = make_password(PASSWORD)
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+        else:
+            logger.info(message)
+
+    @staticmethod
+    def exists():
+        return User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists()
+
+    @staticmethod
+    def flush():
+        """Delete every benchmark row (users cascade to products, orders and reviews)"""
+        with transaction.atomic():
+            Order.objects.filter(user__email__endswith=f'@{EMAIL_DOMAIN}').delete()
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+            Category.objects.filter(slug__startswith='bench-').delete()
+
+    def run(self):
+        start = timezone.now()
+        with explicit_timestamps(Wallet, Product, Order, Review):
+            self.categories = self.create_categories()
+            self.sellers = self.create_users('sellers', seller_email, 'SELLER')
+            self.create_seller_profiles()
+            self.customers = self.create_users('users', customer_email, 'CUSTOMER')
+            self.create_addresses()
+            self.create_products()
+            catalog = self.product_sample()
+            self.create_orders(catalog)
+            self.create_reviews(catalog)
+        # bulk_create bypasses OrderItem.save and Order signals, which keep the seller
+        # inbox counters and delivered purchases
+        rebuild_counts(self.sellers)
+        rebuild_purchases()
+        # Seller leaderboard and product rating aggregates, likewise fed by signals bulk_create skips
+        rebuild_stats()
+        reconcile_ratings()
+        self.log(f"Benchmark data ready in {(timezone.now() - start).total_seconds():.0f}s: {self.sizes}")
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    # --- Catalog and accounts ---
+
+    def create_categories(self):
+        Category.objects.bulk_create([
+            Category(name=f'Bench {PART_TYPES[n % len(PART_TYPES)]} {n}', slug=f'bench-category-{n}')
+            for n in range(self.sizes['categories'])
+        ])
+        return list(Category.objects.filter(slug__startswith='bench-').order_by('id').values_list('id', flat=True))
+
+    def create_users(self, size_key, email, role):
+        total = self.sizes[size_key]
+        for batch in self._batches(total):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        email=email(n), password=self.password, role=role,
+                        first_name='Bench', last_name=f'{role.title()} {n}', is_verified=True,
+                        date_joined=timestamp(n),
+                    )
+                    for n in batch
+                ])
+                # bulk_create skips the post_save signal that normally creates wallets
+                Wallet.objects.bulk_create([
+                    Wallet(user_id=u.id, created_at=u.date_joined, updated_at=u.date_joined) for u in users
+                ])
+            self.log(f"{size_key}: {batch.stop}/{total}")
+        return list(
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}', role=role).order_by('id').values_list('id', flat=True)
+        )
+
+    def create_seller_profiles(self):
+        SellerProfile.objects.bulk_create([
+            SellerProfile(
+                user_id=user_id, business_name=f'Bench Parts {n}', city=CITIES[n % len(CITIES)][0],
+                bank_ifsc_code='SBIN0001234', bank_account_holder_name=f'Bench Parts {n}', is_approved=True,
+            )
+            for n, user_id in enumerate(self.sellers)
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+
+    def create_addresses(self):
+        for batch in self._batches(len(self.customers)):
+            Address.objects.bulk_create([
+                Address(
+                    user_id=self.customers[n], full_name=f'Bench User {n}', phone_number=f'9{n:09d}'[:10],
+                    street_address=f'{n} Bench Street', city=CITIES[n % len(CITIES)][0],
+                    state=CITIES[n % len(CITIES)][1], postal_code=f'{CITIES[n % len(CITIES)][2]}{n % 1000:03d}',
+                    is_default=True,
+                )
+                for n in batch
+            ])
+
+    def create_products(self):
+        total = self.sizes['products']
+        for batch in self._batches(total):
+            products = []
+            for n in batch:
+                discount = self.rng.choice((0, 0, 0, 5, 10, 20))
+                price = product_price(n)
+                part = PART_TYPES[n % len(PART_TYPES)]
+                products.append(Product(
+                    seller_id=self.sellers[n % len(self.sellers)],
+                    category_id=self.categories[n % len(self.categories)],
+                    name=f'{part} for Model {n % 997}',
+                    slug=f'bench-{n}',
+                    sku=f'BENCH-{n:07d}',
+                    description=f'Replacement {part.lower()} compatible with model {n % 997}.',
+                    price=price,
+                    discount_percentage=discount,
+                    # Product.save() is skipped by bulk_create, so derive the discount price here
+                    discount_price=price - price * discount / 100 if discount else None,
+                    stock_quantity=self.rng.randint(0, 500),
+                    rating=Decimal(self.rng.randint(30, 50)) / 10,
+                    review_count=0,
+                    specifications={'part': part},
+                    created_at=timestamp(n, offset_days=30),
+                    updated_at=timestamp(n, offset_days=30),
+                ))
+            Product.objects.bulk_create(products)
+            self.log(f"products: {batch.stop}/{total}")
+
+    def product_sample(self, size=20_000):
+        """(id, name, price, seller_id) for a bounded set of products that orders and reviews draw from"""
+        ids = list(Product.objects.filter(sku__startswith='BENCH-').order_by('id').values_list('id', flat=True))
+        sample = self.rng.sample(ids, min(size, len(ids)))
+        rows = Product.objects.filter(id__in=sample).values_list('id', 'name', 'price', 'discount_price', 'seller_id')
+        return sorted((pid, name, discount or price, seller) for pid, name, price, discount, seller in rows)
+
+    # --- Orders and reviews ---
+
+    def create_orders(self, catalog):
+        total = self.sizes['orders']
+        statuses = [s for s, weight in ORDER_STATUSES for _ in range(weight)]
+
+        for batch in self._batches(total):
+            orders, lines = [], []
+            for n in batch:
+                status = self.rng.choice(statuses)
+                picked = self.rng.sample(catalog, self.rng.randint(1, min(4, len(catalog))))
+                quantities = [self.rng.randint(1, 3) for _ in picked]
+                customer = n % len(self.customers)
+                user_id = self.customers[customer]
+                placed = timestamp(n, offset_days=60)
+                orders.append(Order(
+                    order_id=f'BENCH-{n:09d}',
+                    user_id=user_id,
+                    total_amount=sum(price * qty for (_, _, price, _), qty in zip(picked, quantities)),
+                    status=status,
+                    payment_status=status != 'PENDING',
+                    payment_method=self.rng.choice(('CARD', 'UPI', 'COD')),
+                    shipping_address={'full_name': f'Bench User {n}', 'postal_code': '560001', 'city': 'Bengaluru'},
+                    delivered_at=placed + timedelta(days=3) if status == 'DELIVERED' else None,
+                    created_at=placed,
+                    updated_at=placed,
+                ))
+                lines.append((status, picked, quantities, f'Bench Customer {customer}'))
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                order_ids = dict(
+                    Order.objects.filter(order_id__in=[o.order_id for o in orders]).values_list('order_id', 'id')
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order_id=order_ids[order.order_id], product_id=pid, seller_id=seller_id,
+                        product_name=name, price=price, quantity=qty,
+                        status=status, created_at=order.created_at, customer_name=customer_name,
+                    )
+                    for order, (status, picked, quantities, customer_name) in zip(orders, lines)
+                    for (pid, name, price, seller_id), qty in zip(picked, quantities)
+                ])
+            self.log(f"orders: {batch.stop}/{total}")
+
+    def create_reviews(self, catalog):
+        total = self.sizes['reviews']
+        seen = set()
+        for batch in self._batches(total):
+            reviews = []
+            for n in batch:
+                user_id = self.customers[n % len(self.customers)]
+                product_id = catalog[(n * 31 + n // len(self.customers)) % len(catalog)][0]
+                if (user_id, product_id) in seen:
+                    continue
+                seen.add((user_id, product_id))
+                rating = self.rng.choice((5, 5, 4, 4, 3, 2, 1))
+                reviews.append(Review(
+                    user_id=user_id, product_id=product_id, rating=rating,
+                    title=f'{rating} stars', comment=f'Benchmark review {n}.',
+                    is_verified_purchase=n % 3 == 0, helpful_count=self.rng.randint(0, 50),
+                    created_at=timestamp(n, offset_days=90), updated_at=timestamp(n, offset_days=90),
+                ))
+            Review.objects.bulk_create(reviews, ignore_conflicts=True)
+            self.log(f"reviews: {batch.stop}/{total}")
@@ -1,6 +1,32 @@
-from django.core.cache import cache
+import redis
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
 from functools import wraps
 
+from .profiling import record_cache
+
+_MISSING = object()
+
+
+class ProfiledRedisCache(RedisCache):
+    """RedisCache that reports hits/misses to the active request profile"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+
 def cache_view(timeout=300, key_prefix='view'):
     """Cache view results"""
     def decorator(func):
@@ -18,3 +44,22 @@ def cache_view(timeout=300, key_prefix='view'):
 def invalidate_cache(pattern):
     """Clear cache by pattern"""
     cache.delete_pattern(f"*{pattern}*")
+
+
+_pools = {}
+
+
+def redis_client():
+    """
+    redis-py client on the default cache's primary server, for structures the
+    cache API lacks; None without Redis. Django's RedisCache keeps its own
+    pool private, so this holds one pool per server URL.
+    """
+    if not isinstance(caches['default'], RedisCache):
+        return None
+    location = settings.CACHES['default']['LOCATION']
+    # Same rule as RedisCache: the first server takes writes
+    url = (location.split(',') if isinstance(location, str) else location)[0]
+    if url not in _pools:
+        _pools[url] = redis.ConnectionPool.from_url(url)
+    return redis.Redis(connection_pool=_pools[url])
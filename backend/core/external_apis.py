@@ -2,9 +2,9 @@
 Centralized External API Client
 Store all third-party API integrations here
 """
-import requests
 from django.conf import settings
 from typing import Dict, Any
+from .http_client import get_client, TokenCache
 
 
 class UIDAPIClient:
@@ -16,7 +16,7 @@ class UIDAPIClient:
     def send_otp(aadhaar_number: str) -> Dict[str, Any]:
         """Send OTP to Aadhaar registered mobile"""
         try:
-            response = requests.post(
+            response = get_client('uidai').post(
                 f"{UIDAPIClient.BASE_URL}/otp/generate",
                 headers={
                     'Authorization': f'Bearer {settings.UIDAI_API_KEY}',
@@ -33,7 +33,7 @@ class UIDAPIClient:
     def verify_otp(transaction_id: str, otp: str) -> Dict[str, Any]:
         """Verify Aadhaar OTP"""
         try:
-            response = requests.post(
+            response = get_client('uidai').post(
                 f"{UIDAPIClient.BASE_URL}/otp/verify",
                 headers={
                     'Authorization': f'Bearer {settings.UIDAI_API_KEY}',
@@ -56,7 +56,7 @@ class IncomeTaxAPIClient:
     def send_otp(pan_number: str) -> Dict[str, Any]:
         """Send OTP for PAN verification"""
         try:
-            response = requests.post(
+            response = get_client('incometax').post(
                 f"{IncomeTaxAPIClient.BASE_URL}/pan/otp/send",
                 headers={
                     'Authorization': f'Bearer {settings.IT_API_KEY}',
@@ -73,7 +73,7 @@ class IncomeTaxAPIClient:
     def verify_otp(transaction_id: str, otp: str) -> Dict[str, Any]:
         """Verify PAN OTP"""
         try:
-            response = requests.post(
+            response = get_client('incometax').post(
                 f"{IncomeTaxAPIClient.BASE_URL}/pan/otp/verify",
                 headers={
                     'Authorization': f'Bearer {settings.IT_API_KEY}',
@@ -96,7 +96,7 @@ class KarzaAPIClient:
     def verify_aadhaar(aadhaar_number: str) -> Dict[str, Any]:
         """Instant Aadhaar verification"""
         try:
-            response = requests.post(
+            response = get_client('karza').post(
                 f"{KarzaAPIClient.BASE_URL}/aadhaar-verification",
                 headers={
                     'x-karza-key': settings.KARZA_API_KEY,
@@ -113,7 +113,7 @@ class KarzaAPIClient:
     def verify_pan(pan_number: str) -> Dict[str, Any]:
         """Instant PAN verification"""
         try:
-            response = requests.post(
+            response = get_client('karza').post(
                 f"{KarzaAPIClient.BASE_URL}/pan-verification",
                 headers={
                     'x-karza-key': settings.KARZA_API_KEY,
@@ -136,7 +136,7 @@ class RazorpayAPIClient:
     def create_order(amount: int, currency: str = "INR") -> Dict[str, Any]:
         """Create payment order"""
         try:
-            response = requests.post(
+            response = get_client('razorpay').post(
                 f"{RazorpayAPIClient.BASE_URL}/orders",
                 auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
                 json={'amount': amount, 'currency': currency},
@@ -166,25 +166,25 @@ class ShiprocketAPIClient:
     """Shipping API"""
     
     BASE_URL = "https://apiv2.shiprocket.in/v1/external"
-    _token = None
+    
+    @classmethod
+    def _login(cls):
+        response = get_client('shiprocket').post(
+            f"{cls.BASE_URL}/auth/login",
+            json={
+                'email': settings.SHIPROCKET_EMAIL,
+                'password': settings.SHIPROCKET_PASSWORD
+            },
+            timeout=10
+        )
+        response.raise_for_status()
+        return response.json()['token']
     
     @classmethod
     def get_token(cls) -> str:
-        """Get authentication token"""
-        if cls._token:
-            return cls._token
-        
+        """Get authentication token (shared across workers, refreshed before expiry)"""
         try:
-            response = requests.post(
-                f"{cls.BASE_URL}/auth/login",
-                json={
-                    'email': settings.SHIPROCKET_EMAIL,
-                    'password': settings.SHIPROCKET_PASSWORD
-                },
-                timeout=10
-            )
-            cls._token = response.json().get('token')
-            return cls._token
+            return _shiprocket_token.get()
         except Exception:
             return None
     
@@ -192,7 +192,7 @@ class ShiprocketAPIClient:
     def create_order(cls, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create shipping order"""
         try:
-            response = requests.post(
+            response = get_client('shiprocket').post(
                 f"{cls.BASE_URL}/orders/create/adhoc",
                 headers={
                     'Authorization': f'Bearer {cls.get_token()}',
@@ -209,7 +209,7 @@ class ShiprocketAPIClient:
     def track_shipment(cls, shipment_id: str) -> Dict[str, Any]:
         """Track shipment status"""
         try:
-            response = requests.get(
+            response = get_client('shiprocket').get(
                 f"{cls.BASE_URL}/courier/track/shipment/{shipment_id}",
                 headers={'Authorization': f'Bearer {cls.get_token()}'},
                 timeout=10
@@ -219,6 +219,9 @@ class ShiprocketAPIClient:
             return {'error': str(e)}
 
 
+_shiprocket_token = TokenCache('shiprocket', ShiprocketAPIClient._login, ttl=settings.SHIPROCKET_TOKEN_TTL)
+
+
 class StripeAPIClient:
     """Stripe Payment API"""
     
@@ -228,7 +231,7 @@ class StripeAPIClient:
     def create_payment_intent(amount: int, currency: str = "inr") -> Dict[str, Any]:
         """Create payment intent"""
         try:
-            response = requests.post(
+            response = get_client('stripe').post(
                 f"{StripeAPIClient.BASE_URL}/payment_intents",
                 auth=(settings.STRIPE_SECRET_KEY, ''),
                 data={'amount': amount, 'currency': currency},
@@ -248,7 +251,7 @@ class SMSAPIClient:
     def send_sms(mobile: str, message: str) -> Dict[str, Any]:
         """Send SMS"""
         try:
-            response = requests.post(
+            response = get_client('msg91').post(
                 f"{SMSAPIClient.BASE_URL}/flow",
                 headers={'authkey': settings.SMS_API_KEY},
                 json={'mobile': mobile, 'message': message},
@@ -268,7 +271,7 @@ class EmailAPIClient:
     def send_email(to: str, subject: str, html_content: str) -> Dict[str, Any]:
         """Send email"""
         try:
-            response = requests.post(
+            response = get_client('sendgrid').post(
                 f"{EmailAPIClient.BASE_URL}/mail/send",
                 headers={
                     'Authorization': f'Bearer {settings.SENDGRID_API_KEY}',
@@ -1,8 +1,11 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from django.core.cache import cache
 import redis
 
+from .profiling import render_prometheus
+
 def health_check(request):
     """Basic health check endpoint"""
     return JsonResponse({'status': 'healthy'})
@@ -33,3 +36,13 @@ def readiness_check(request):
     status_code = 200 if checks['overall'] else 503
     
     return JsonResponse(checks, status=status_code)
+
+def metrics(request):
+    """Per-process request and external-API histograms (Prometheus text format)"""
+    # Without a configured token the endpoint is only open in DEBUG
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif request.headers.get('Authorization') != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,313 @@
+"""
+Shared outbound HTTP layer for third-party integrations.
+
+Every provider gets one pooled, instrumented requests.Session per process with
+retry/backoff, a circuit breaker, an optional rate limit and per-endpoint
+latency histograms. Access
+tokens are cached in the Django cache so all workers share them and refresh
+shortly before they expire.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django.core.cache import cache
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Re-arm the timer so only one trial call goes through
+                self.opened_at = time.monotonic()
+                return True
+            return state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit opened for {self.name} after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Spaces calls so at most `rate` start per second across this process's
+    threads. Used to keep concurrent batch jobs under provider limits.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets (seconds)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'sum': round(self.total, 6),
+                'buckets': {str(le): c for le, c in zip(self.buckets, self.counts)},
+            }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe_latency(provider, method, endpoint, seconds):
+    key = (provider, method, endpoint)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, LatencyHistogram())
+    histogram.observe(seconds)
+
+
+def latency_snapshot():
+    """Per-endpoint latency histograms recorded in this process"""
+    return {
+        f"{provider} {method} {endpoint}": histogram.snapshot()
+        for (provider, method, endpoint), histogram in list(_histograms.items())
+    }
+
+
+_ID_SEGMENT = re.compile(r'^(\d+|[A-Za-z_-]*\d[\w-]{3,})$')
+
+
+def endpoint_label(url):
+    """URL path with id-like segments collapsed, so histograms stay bounded"""
+    segments = [s for s in urlsplit(url).path.split('/') if s]
+    return '/' + '/'.join('{id}' if _ID_SEGMENT.match(s) else s for s in segments)
+
+
+class InstrumentedSession(requests.Session):
+    """requests.Session that applies the provider's breaker, timeout and timing"""
+
+    def __init__(self, provider, breaker, timeout, limiter=None):
+        super().__init__()
+        self.provider = provider
+        self.breaker = breaker
+        self.default_timeout = timeout
+        self.limiter = limiter
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = kwargs.pop('endpoint', None) or endpoint_label(url)
+        kwargs.setdefault('timeout', self.default_timeout)
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.provider}")
+
+        if self.limiter:
+            self.limiter.acquire()
+
+        start = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            observe_latency(self.provider, method.upper(), endpoint, elapsed)
+            profiling.record_http(elapsed)
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+def _provider_config(provider):
+    config = dict(settings.EXTERNAL_HTTP_DEFAULTS)
+    config.update(settings.EXTERNAL_HTTP_PROVIDERS.get(provider, {}))
+    return config
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider):
+    """Process-wide pooled session for `provider` (e.g. 'shiprocket')"""
+    session = _clients.get(provider)
+    if session is not None:
+        return session
+
+    with _clients_lock:
+        session = _clients.get(provider)
+        if session is None:
+            config = _provider_config(provider)
+            retry = Retry(
+                total=config['retries'],
+                connect=config['retries'],
+                read=config['retries'],
+                backoff_factor=config['backoff_factor'],
+                status_forcelist=(429, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=config['pool_connections'],
+                pool_maxsize=config['pool_maxsize'],
+                max_retries=retry,
+            )
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=config['circuit_failure_threshold'],
+                reset_timeout=config['circuit_reset_timeout'],
+            )
+            limiter = RateLimiter(config['rate_limit']) if config.get('rate_limit') else None
+            session = InstrumentedSession(provider, breaker, config['timeout'], limiter=limiter)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _clients[provider] = session
+    return session
+
+
+class TokenCache:
+    """
+    Access token shared across workers via the Django cache.
+
+    `fetch` returns either a token or a `(token, expires_in_seconds)` tuple.
+    Tokens are refreshed `refresh_margin` seconds before they expire, and a
+    short cache lock keeps concurrent workers from all logging in at once.
+    """
+
+    def __init__(self, name, fetch, ttl, refresh_margin=300):
+        self.key = f"http_token:{name}"
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._local = None
+
+    def _fresh(self, entry):
+        return bool(entry) and entry['expires_at'] - self.refresh_margin > time.time()
+
+    def get(self):
+        if self._fresh(self._local):
+            return self._local['token']
+        try:
+            entry = cache.get(self.key)
+        except Exception as e:
+            logger.warning(f"Token cache read failed for {self.key}: {e}")
+            entry = None
+        if self._fresh(entry):
+            self._local = entry
+            return entry['token']
+        return self.refresh()
+
+    def refresh(self):
+        lock_key = f"{self.key}:lock"
+        try:
+            have_lock = cache.add(lock_key, 1, 30)
+        except Exception:
+            have_lock = True
+
+        if not have_lock:
+            # Another worker is logging in; give it a moment before fetching ourselves
+            for _ in range(20):
+                time.sleep(0.1)
+                try:
+                    entry = cache.get(self.key)
+                except Exception:
+                    break
+                if self._fresh(entry):
+                    self._local = entry
+                    return entry['token']
+
+        try:
+            result = self.fetch()
+            token, expires_in = result if isinstance(result, tuple) else (result, self.ttl)
+            entry = {'token': token, 'expires_at': time.time() + expires_in}
+            self._local = entry
+            try:
+                cache.set(self.key, entry, max(int(expires_in - self.refresh_margin), 1))
+            except Exception as e:
+                logger.warning(f"Token cache write failed for {self.key}: {e}")
+            return token
+        finally:
+            if have_lock:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+    def invalidate(self):
+        self._local = None
+        try:
+            cache.delete(self.key)
+        except Exception:
+            pass
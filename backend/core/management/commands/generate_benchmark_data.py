@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark_data import BenchmarkDataGenerator, DEFAULT_SIZES, scaled_sizes
+
+
+class Command(BaseCommand):
+    help = 'Generate the seeded benchmark dataset (1M products, 100k users, orders and reviews at --scale 1)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for every default size')
+        for name in DEFAULT_SIZES:
+            parser.add_argument(f'--{name}', type=int, default=None, help=f'Exact {name} count (default {DEFAULT_SIZES[name]:,} x scale)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help='Delete existing benchmark rows first')
+
+    def handle(self, *args, **options):
+        if BenchmarkDataGenerator.exists():
+            if not options['flush']:
+                raise CommandError('Benchmark data already exists; pass --flush to regenerate it')
+            self.stdout.write('Flushing existing benchmark data...')
+            BenchmarkDataGenerator.flush()
+
+        sizes = scaled_sizes(options['scale'], **{name: options[name] for name in DEFAULT_SIZES})
+        self.stdout.write(f'Generating benchmark data (seed {options["seed"]}): {sizes}')
+        BenchmarkDataGenerator(
+            sizes=sizes, seed=options['seed'], batch_size=options['batch_size'], stdout=self.stdout
+        ).run()
+        self.stdout.write(self.style.SUCCESS('Benchmark data generated'))
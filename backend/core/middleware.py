@@ -1,23 +1,77 @@
+from django.conf import settings
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 import logging
+import random
 import time
 
+from . import profiling
+
 logger = logging.getLogger(__name__)
 
-class RequestLoggingMiddleware(MiddlewareMixin):
-    """Log all requests for debugging"""
-    def process_request(self, request):
-        request.start_time = time.time()
-        logger.info(f"Request: {request.method} {request.path} - User: {getattr(request.user, 'id', 'Anonymous')}")
-        return None
-    
-    def process_response(self, request, response):
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            logger.info(f"Response: {request.method} {request.path} - Status: {response.status_code} - Duration: {duration:.2f}s")
+class ProfilingMiddleware:
+    """
+    Per-request timing for every request, plus DB/cache/HTTP/serializer
+    breakdown and N+1 detection for a sampled share (see core.profiling).
+    Requests slower than PROFILING_SLOW_REQUEST_MS are logged with the breakdown.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == '/metrics':
+            return self.get_response(request)
+
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        start = time.perf_counter()
+        if not sampled:
+            response = self.get_response(request)
+            self._finish(request, response, time.perf_counter() - start)
+            return response
+
+        token = profiling.start_profile()
+        try:
+            with connection.execute_wrapper(profiling.QueryRecorder(profiling.current_profile())):
+                response = self.get_response(request)
+        finally:
+            profile = profiling.end_profile(token)
+        self._finish(request, response, time.perf_counter() - start, profile)
         return response
 
+    def _finish(self, request, response, duration, profile=None):
+        route = profiling.route_label(getattr(request, 'resolver_match', None))
+
+        repeated = profile.repeated_queries(settings.PROFILING_N_PLUS_ONE_THRESHOLD) if profile else []
+        profiling.endpoint_metrics(request.method, route).observe(
+            duration, response.status_code, profile, n_plus_one=bool(repeated)
+        )
+        if repeated:
+            shape, count = repeated[0]
+            logger.warning(f"Possible N+1 on {request.method} {route}: {count}x {shape[:300]}")
+
+        if profile is not None:
+            response['Server-Timing'] = (
+                f"db;dur={profile.query_time * 1000:.1f};desc=\"{profile.queries} queries\", "
+                f"http;dur={profile.http_time * 1000:.1f}, "
+                f"serializer;dur={profile.serializer_time * 1000:.1f}, "
+                f"total;dur={duration * 1000:.1f}"
+            )
+
+        if duration * 1000 >= settings.PROFILING_SLOW_REQUEST_MS:
+            breakdown = (
+                f" - DB: {profile.queries} queries/{profile.query_time * 1000:.1f}ms"
+                f" - Cache: {profile.cache_hits} hits/{profile.cache_misses} misses"
+                f" - HTTP: {profile.http_time * 1000:.1f}ms"
+                f" - Serializer: {profile.serializer_time * 1000:.1f}ms"
+            ) if profile else ''
+            logger.warning(
+                f"Slow request: {request.method} {request.path} ({route}) - Status: {response.status_code} "
+                f"- Duration: {duration * 1000:.1f}ms{breakdown}"
+            )
+        else:
+            logger.debug(f"{request.method} {request.path} - Status: {response.status_code} - Duration: {duration * 1000:.1f}ms")
+
 class DisableThrottlingMiddleware(MiddlewareMixin):
     """
     Middleware to disable throttling for authenticated users
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -19,4 +19,24 @@ class StandardResultsSetPagination(PageNumberPagination):
                 'current_page': self.page.number,
             },
             'results': data
-        })
\ No newline at end of file
+        })
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Cursor pagination for feeds that only grow at the top (order history).
+    Each page is a keyset seek on (created_at, id) - no COUNT, no OFFSET - so
+    page 50 costs the same as page 1 and new rows don't shift pages.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'pagination': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+            },
+            'results': data
+        })
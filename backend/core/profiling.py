@@ -0,0 +1,253 @@
+"""
+Request-scoped profiling.
+
+ProfilingMiddleware opens a RequestProfile for a sampled share of requests
+(PROFILING_SAMPLE_RATE). While it is active, every SQL statement is counted
+and timed through connection.execute_wrapper, cache reads report hits and
+misses, InstrumentedSession adds external HTTP time and DRF serializers add
+their .data time. Each request is folded into per-endpoint histograms kept
+in this process and exported in Prometheus text format at /metrics. The same
+SQL shape repeated more than PROFILING_N_PLUS_ONE_THRESHOLD times in one
+request is reported as a likely N+1.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+# Module import (not names): http_client reports into this module too
+from . import http_client
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, float('inf'))
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.shapes = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.http_time = 0.0
+        self.serializer_time = 0.0
+        self._serializing = 0
+
+    def repeated_queries(self, threshold):
+        """SQL shapes executed more than `threshold` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+def current_profile():
+    return _current.get()
+
+
+def start_profile():
+    return _current.set(RequestProfile())
+
+
+def end_profile(token):
+    profile = _current.get()
+    _current.reset(token)
+    return profile
+
+
+def record_cache(hits, misses):
+    profile = _current.get()
+    if profile is not None:
+        profile.cache_hits += hits
+        profile.cache_misses += misses
+
+
+def record_http(seconds):
+    profile = _current.get()
+    if profile is not None:
+        profile.http_time += seconds
+
+
+_REGEX_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def route_label(match):
+    """URL pattern of the resolved view; regex routes (DRF routers) are tidied into <name> form"""
+    if match is None or not match.route:
+        return 'unmatched'
+    route = _REGEX_GROUP.sub(r'<\1>', match.route).replace('^', '').replace('$', '')
+    return f"/{route}"
+
+
+# --- SQL ---
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def sql_shape(sql):
+    """SQL with literals and IN-list lengths collapsed, so repeated lookups group together"""
+    return _LITERAL.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that counts and times queries into the profile"""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.query_time += time.perf_counter() - start
+            self.profile.queries += 1
+            self.profile.shapes[sql_shape(sql)] += 1
+
+
+# --- Serializers ---
+
+def instrument_serializers():
+    """Time DRF serializer .data (outermost call only) while a profile is active"""
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        original = cls.__dict__['data']
+        if getattr(original.fget, 'profiled', False):
+            continue
+
+        def data(self, _fget=original.fget):
+            profile = _current.get()
+            if profile is None or profile._serializing:
+                return _fget(self)
+            profile._serializing += 1
+            start = time.perf_counter()
+            try:
+                return _fget(self)
+            finally:
+                profile._serializing -= 1
+                profile.serializer_time += time.perf_counter() - start
+
+        data.profiled = True
+        cls.data = property(data)
+
+
+# --- Aggregation ---
+
+class EndpointMetrics:
+    def __init__(self):
+        self.duration = http_client.LatencyHistogram()
+        self.db_time = http_client.LatencyHistogram()
+        self.db_queries = http_client.LatencyHistogram(QUERY_COUNT_BUCKETS)
+        self.http_time = http_client.LatencyHistogram()
+        self.serializer_time = http_client.LatencyHistogram()
+        self.requests = 0
+        self.sampled = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.n_plus_one = 0
+        self._lock = threading.Lock()
+
+    def observe(self, duration, status_code, profile=None, n_plus_one=False):
+        self.duration.observe(duration)
+        with self._lock:
+            self.requests += 1
+            self.errors += status_code >= 500
+            if profile is not None:
+                self.sampled += 1
+                self.cache_hits += profile.cache_hits
+                self.cache_misses += profile.cache_misses
+                self.n_plus_one += n_plus_one
+        if profile is not None:
+            self.db_time.observe(profile.query_time)
+            self.db_queries.observe(profile.queries)
+            self.http_time.observe(profile.http_time)
+            self.serializer_time.observe(profile.serializer_time)
+
+    def snapshot(self):
+        with self._lock:
+            counters = {
+                'requests': self.requests,
+                'sampled': self.sampled,
+                'errors': self.errors,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'n_plus_one': self.n_plus_one,
+            }
+        return {
+            **counters,
+            'duration': self.duration.snapshot(),
+            'db_time': self.db_time.snapshot(),
+            'db_queries': self.db_queries.snapshot(),
+            'http_time': self.http_time.snapshot(),
+            'serializer_time': self.serializer_time.snapshot(),
+        }
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def endpoint_metrics(method, route):
+    key = (method, route)
+    metrics = _endpoints.get(key)
+    if metrics is None:
+        with _endpoints_lock:
+            metrics = _endpoints.setdefault(key, EndpointMetrics())
+    return metrics
+
+
+def metrics_snapshot():
+    """Per-endpoint request metrics recorded in this process"""
+    return {f"{method} {route}": m.snapshot() for (method, route), m in list(_endpoints.items())}
+
+
+def reset_metrics():
+    with _endpoints_lock:
+        _endpoints.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _histogram_lines(name, labels, snapshot):
+    lines, cumulative = [], 0
+    for le, count in snapshot['buckets'].items():
+        cumulative += count  # LatencyHistogram counts per bucket; Prometheus wants running totals
+        le = '+Inf' if le == 'inf' else le
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {snapshot["sum"]}')
+    lines.append(f'{name}_count{{{labels}}} {snapshot["count"]}')
+    return lines
+
+
+def render_prometheus():
+    """Endpoint and external-API metrics in Prometheus text exposition format"""
+    lines = []
+    histograms = ('duration', 'db_time', 'db_queries', 'http_time', 'serializer_time')
+    counters = ('requests', 'sampled', 'errors', 'cache_hits', 'cache_misses', 'n_plus_one')
+
+    endpoints = sorted(list(_endpoints.items()), key=lambda item: item[0])
+    for name in histograms:
+        lines.append(f'# TYPE http_request_{name} histogram')
+        for (method, route), metrics in endpoints:
+            labels = f'method="{method}",route="{_label(route)}"'
+            lines.extend(_histogram_lines(f'http_request_{name}', labels, getattr(metrics, name).snapshot()))
+    for name in counters:
+        lines.append(f'# TYPE http_{name}_total counter')
+        for (method, route), metrics in endpoints:
+            labels = f'method="{method}",route="{_label(route)}"'
+            lines.append(f'http_{name}_total{{{labels}}} {getattr(metrics, name)}')
+
+    lines.append('# TYPE external_http_duration_seconds histogram')
+    for key, snapshot in sorted(http_client.latency_snapshot().items()):
+        provider, method, endpoint = key.split(' ', 2)
+        labels = f'provider="{provider}",method="{method}",endpoint="{_label(endpoint)}"'
+        lines.extend(_histogram_lines('external_http_duration_seconds', labels, snapshot))
+
+    return '\n'.join(lines) + '\n'
@@ -1,3 +1,193 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from . import profiling
+from .benchmark_data import BenchmarkDataGenerator, scaled_sizes
+from .http_client import CircuitBreaker, LatencyHistogram, RateLimiter, TokenCache, endpoint_label
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        breaker.opened_at -= 31
+        self.assertTrue(breaker.allow())   # single trial call
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+
+class RateLimiterTests(TestCase):
+    def test_spaces_calls(self):
+        limiter = RateLimiter(rate=10)
+        with mock.patch('core.http_client.time.sleep') as sleep:
+            for _ in range(3):
+                limiter.acquire()
+        waits = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(waits[-1], 0.2, delta=0.05)
+
+
+class HttpHelpersTests(TestCase):
+    def test_endpoint_label_collapses_ids(self):
+        self.assertEqual(
+            endpoint_label('https://apiv2.shiprocket.in/v1/external/courier/track/awb/SR123456789'),
+            '/v1/external/courier/track/awb/{id}'
+        )
+        self.assertEqual(endpoint_label('https://api.razorpay.com/v1/payouts/pout_00000000000001'), '/v1/payouts/{id}')
+
+    def test_histogram_buckets(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0, float('inf')))
+        for seconds in (0.05, 0.5, 5):
+            histogram.observe(seconds)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 3)
+        self.assertEqual(list(snapshot['buckets'].values()), [1, 1, 1])
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        cache.delete('http_token:test-provider')
+
+    def test_token_shared_between_instances(self):
+        fetch = mock.Mock(return_value=('tok-1', 3600))
+        TokenCache('test-provider', fetch, ttl=3600).get()
+        other_fetch = mock.Mock(return_value=('tok-2', 3600))
+
+        self.assertEqual(TokenCache('test-provider', other_fetch, ttl=3600).get(), 'tok-1')
+        other_fetch.assert_not_called()
+
+    def test_refreshes_before_expiry(self):
+        fetch = mock.Mock(side_effect=[('old', 100), ('new', 3600)])
+        tokens = TokenCache('test-provider', fetch, ttl=3600, refresh_margin=300)
+
+        self.assertEqual(tokens.get(), 'old')
+        self.assertEqual(tokens.get(), 'new')
+        self.assertEqual(fetch.call_count, 2)
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1.0, METRICS_TOKEN='secret')
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiling.reset_metrics()
+        self.addCleanup(profiling.reset_metrics)
+
+    def test_sampled_request_records_queries_and_exports_metrics(self):
+        response = self.client.get('/api/catalog/categories/')
+        self.assertIn('Server-Timing', response)
+
+        snapshot = profiling.metrics_snapshot()['GET /api/catalog/categories/']
+        self.assertEqual(snapshot['requests'], 1)
+        self.assertEqual(snapshot['sampled'], 1)
+        self.assertGreaterEqual(snapshot['db_queries']['sum'], 1)
+        self.assertGreater(snapshot['serializer_time']['sum'], 0)
+
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertIn('http_request_db_queries_count{method="GET",route="/api/catalog/categories/"} 1', body)
+        self.assertIn('http_request_duration_bucket{method="GET",route="/api/catalog/categories/",le="+Inf"} 1', body)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_only_records_timing(self):
+        response = self.client.get('/health/')
+        self.assertNotIn('Server-Timing', response)
+        snapshot = profiling.metrics_snapshot()['GET /health/']
+        self.assertEqual((snapshot['requests'], snapshot['sampled']), (1, 0))
+
+    def test_repeated_query_shape_is_flagged(self):
+        User = get_user_model()
+        users = [User.objects.create_user(email=f'u{i}@example.com', password='Pass12345!') for i in range(12)]
+
+        token = profiling.start_profile()
+        try:
+            with connection.execute_wrapper(profiling.QueryRecorder(profiling.current_profile())):
+                for user in users:
+                    User.objects.get(pk=user.pk)
+                list(User.objects.filter(pk__in=[u.pk for u in users]))
+            cache.get('profiling-test-missing')
+            cache.set('profiling-test-hit', 1)
+            cache.get_many(['profiling-test-hit', 'profiling-test-missing'])
+        finally:
+            profile = profiling.end_profile(token)
+
+        repeated = profile.repeated_queries(10)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 12)
+        self.assertEqual((profile.cache_hits, profile.cache_misses), (1, 2))
+
+    def test_sql_shape_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            profiling.sql_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND code = \'A1\' LIMIT 21'),
+            'SELECT * FROM t WHERE id IN (...) AND code = ? LIMIT ?'
+        )
+
+    def test_route_label_tidies_router_regex(self):
+        match = mock.Mock(route='api/catalog/^products/(?P<slug>[^/.]+)/$')
+        self.assertEqual(profiling.route_label(match), '/api/catalog/products/<slug>/')
+        self.assertEqual(profiling.route_label(None), 'unmatched')
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_metrics_closed_without_token(self):
+        with override_settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class BenchmarkDataTests(TestCase):
+    SIZES = {'categories': 3, 'sellers': 2, 'users': 10, 'products': 40, 'orders': 15, 'reviews': 25}
+
+    def test_generates_requested_volumes_and_flushes(self):
+        from catalog.models import Product
+        from orders.models import Order
+        from reviews.models import Review
+
+        User = get_user_model()
+        models = (User, Product, Order, Review)
+        before = {model: model.objects.count() for model in models}
+
+        BenchmarkDataGenerator(sizes=self.SIZES, batch_size=7).run()
+        created = {model: model.objects.count() - before[model] for model in models}
+        self.assertEqual(created, {User: 12, Product: 40, Order: 15, Review: 25})
+        self.assertEqual(Product.objects.filter(sku__startswith='BENCH-').count(), 40)
+        self.assertTrue(User.objects.get(email='bench-user-0@bench.local').check_password('benchpass123'))
+
+        BenchmarkDataGenerator.flush()
+        self.assertFalse(BenchmarkDataGenerator.exists())
+        self.assertEqual({model: model.objects.count() for model in models}, before)
+
+    def test_same_seed_produces_same_rows(self):
+        from catalog.models import Product
+        from orders.models import Order
+        from reviews.models import Review
+
+        def snapshot():
+            BenchmarkDataGenerator(sizes=self.SIZES, batch_size=7).run()
+            rows = (
+                list(Product.objects.filter(sku__startswith='BENCH-').order_by('sku').values_list(
+                    'sku', 'price', 'stock_quantity', 'created_at', 'updated_at')),
+                list(Order.objects.filter(order_id__startswith='BENCH-').order_by('order_id').values_list(
+                    'order_id', 'status', 'total_amount', 'created_at', 'delivered_at')),
+                list(Review.objects.filter(user__email__endswith='@bench.local').order_by(
+                    'user__email', 'product__sku').values_list(
+                    'user__email', 'product__sku', 'rating', 'helpful_count', 'created_at')),
+            )
+            BenchmarkDataGenerator.flush()
+            return rows
+
+        self.assertEqual(snapshot(), snapshot())
+
+    def test_scaled_sizes(self):
+        sizes = scaled_sizes(0.001, products=500)
+        self.assertEqual(sizes['users'], 100)
+        self.assertEqual(sizes['products'], 500)
+        self.assertEqual(sizes['categories'], 50)
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:16
+
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+
+def backfill_settlement_state(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    WalletTransaction = apps.get_model('wallet', 'WalletTransaction')
+    Payout = apps.get_model('sellers', 'Payout')
+
+    # Best available delivery time for orders delivered before the field existed
+    Order.objects.filter(status='DELIVERED', delivered_at__isnull=True).update(delivered_at=F('updated_at'))
+
+    # Sellers already paid out by the old ETA task are done
+    paid_out = Payout.objects.filter(order_id=OuterRef('order_id'), seller_id=OuterRef('seller_id'))
+    OrderItem.objects.filter(Exists(paid_out), settled_at__isnull=True).update(settled_at=timezone.now())
+
+    # The old delivery signal credited the wallet but the payout task ran days
+    # later, so credited orders without a payout stay eligible. Give their
+    # credits the settlement keys so the engine creates the payout without
+    # crediting again. The signal wrote each seller's payment row and then the
+    # matching commission row, so the commission is the next one for the order.
+    payments = WalletTransaction.objects.filter(
+        source='ORDER_PAYMENT', order__isnull=False, idempotency_key__isnull=True
+    ).select_related('wallet').order_by('id')
+    for payment in payments.iterator():
+        seller_id = payment.wallet.user_id
+        payment.idempotency_key = f"settle:payment:{payment.order_id}:{seller_id}"
+        payment.save(update_fields=['idempotency_key'])
+        commission = WalletTransaction.objects.filter(
+            source='COMMISSION', order_id=payment.order_id, id__gt=payment.id, idempotency_key__isnull=True
+        ).order_by('id').first()
+        if commission:
+            commission.idempotency_key = f"settle:commission:{payment.order_id}:{seller_id}"
+            commission.save(update_fields=['idempotency_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_delivered_at_orderitem_settled_at'),
+        ('sellers', '0002_payout_order_payout_razorpay_payout_id_and_more'),
+        ('wallet', '0002_wallettransaction_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_settlement_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Prefetch
+
+BATCH_SIZE = 2000
+
+
+def backfill_product_snapshot(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    ProductImage = apps.get_model('catalog', 'ProductImage')
+
+    pending = OrderItem.objects.filter(product__isnull=False, product_slug='').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(
+            pending.filter(id__gt=last_id).select_related('product').prefetch_related(
+                Prefetch('product__images', queryset=ProductImage.objects.order_by('id'))
+            )[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for item in batch:
+            images = list(item.product.images.all())
+            image = next((i for i in images if i.is_feature), images[0] if images else None)
+            item.product_slug = item.product.slug
+            item.product_image = image.image.url if image else ''
+        OrderItem.objects.bulk_update(batch, ['product_slug', 'product_image'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_category_seo_description_category_seo_keywords_and_more'),
+        ('orders', '0009_orderitem_product_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_product_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:59
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_category_seo_description_category_seo_keywords_and_more'),
+        ('orders', '0010_backfill_product_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='orderitem',
+            name='orders_orde_seller__cbcf6b_idx',
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='customer_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='orderitem_seller_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['seller', 'status', '-created_at', '-id'], name='orderitem_seller_status_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+
+
+def backfill_seller_inbox(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    order = Order.objects.filter(pk=OuterRef('order_id'))
+    # Same as User.get_full_name() or email
+    customer = order.annotate(
+        display_name=Coalesce(
+            NullIf(Trim(Concat('user__first_name', Value(' '), 'user__last_name')), Value('')),
+            'user__email',
+            output_field=CharField(),
+        )
+    )
+    OrderItem.objects.update(
+        created_at=Subquery(order.values('created_at')[:1]),
+        customer_name=Subquery(customer.values('display_name')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_seller_order_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seller_inbox, migrations.RunPython.noop),
+    ]
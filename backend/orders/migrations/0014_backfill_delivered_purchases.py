@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Min
+from django.utils import timezone
+
+
+def backfill_delivered_purchases(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DeliveredPurchase = apps.get_model('orders', 'DeliveredPurchase')
+
+    rows = OrderItem.objects.filter(order__status='DELIVERED', product__isnull=False).values(
+        'order__user_id', 'product_id'
+    ).annotate(delivered_at=Min('order__delivered_at')).order_by()
+
+    batch = []
+    for row in rows.iterator(chunk_size=5000):
+        batch.append(DeliveredPurchase(
+            user_id=row['order__user_id'], product_id=row['product_id'],
+            delivered_at=row['delivered_at'] or timezone.now(),
+        ))
+        if len(batch) == 5000:
+            DeliveredPurchase.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    DeliveredPurchase.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_deliveredpurchase'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_delivered_purchases, migrations.RunPython.noop),
+    ]
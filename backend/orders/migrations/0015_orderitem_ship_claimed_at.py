@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_backfill_delivered_purchases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='ship_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 import uuid
 
@@ -42,6 +43,7 @@ class Order(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -51,11 +53,25 @@ class Order(models.Model):
             models.Index(fields=['-created_at']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so delivered purchases update only when delivery status actually changes
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.order_id:
             random_str = get_random_string(8).upper()
             self.order_id = f"ORD-{random_str}"
+        # Settlement's return window counts from delivery
+        if self.status == self.Status.DELIVERED and not self.delivered_at:
+            self.delivered_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'delivered_at'}
         super().save(*args, **kwargs)
+        # post_save receivers have seen the change; later saves diff against this
+        self._loaded_status = self.status
 
     def __str__(self):
         return f"{self.order_id} - {self.user.email}"
@@ -78,8 +94,13 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True) 
     seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='sold_items')
     
-    # Snapshots
+    # Snapshots (order history renders from these without touching the catalog)
     product_name = models.CharField(max_length=255) 
+    product_slug = models.SlugField(max_length=255, blank=True)
+    product_image = models.CharField(max_length=500, blank=True)
+    customer_name = models.CharField(max_length=255, blank=True)
+    # Copy of order.created_at so the seller inbox pages on its own index
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True) 
     quantity = models.PositiveIntegerField(default=1)
     
@@ -90,19 +111,47 @@ class OrderItem(models.Model):
     estimated_delivery = models.DateField(null=True, blank=True)
     tracking_updates = models.JSONField(default=list, blank=True)
     shiprocket_shipment_id = models.CharField(max_length=100, blank=True, null=True)
+    # Set while a bulk fulfilment job is creating this item's shipment
+    ship_claimed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Set once seller earnings for this item are posted to wallets/payouts
+    settled_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['status']),
-            models.Index(fields=['seller']),
+            # Seller inbox: keyset pages, optionally within one status tab
+            models.Index(fields=['seller', '-created_at', '-id'], name='orderitem_seller_inbox_idx'),
+            models.Index(fields=['seller', 'status', '-created_at', '-id'], name='orderitem_seller_status_idx'),
             models.Index(fields=['order']),
             models.Index(fields=['tracking_number']),
+            models.Index(fields=['status', 'settled_at']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so seller inbox counters can apply the change on save/bulk_update
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_seller_id = instance.__dict__.get('seller_id')
+        return instance
+
     def save(self, *args, **kwargs):
+        from sellers.order_inbox import apply_count_changes, take_count_changes
+
         # Auto-set seller from product
         if self.product and not self.seller:
             self.seller = self.product.seller
+        if self._state.adding:
+            self.created_at = self.order.created_at or self.created_at
+            user = self.order.user
+            self.customer_name = self.customer_name or user.get_full_name() or user.email
+        # Snapshot what order history shows, once, when the line is created
+        if self._state.adding and self.product:
+            self.product_slug = self.product_slug or self.product.slug
+            if not self.product_image:
+                image = self.product.feature_image
+                self.product_image = image.image.url if image else ''
         # Validate price is set
         if self.price is None and self.product:
             self.price = self.product.discount_price or self.product.price
@@ -110,6 +159,7 @@ class OrderItem(models.Model):
         if self.price is None:
             self.price = 0
         super().save(*args, **kwargs)
+        apply_count_changes(take_count_changes([self]))
     
     def __str__(self):
         return f"{self.quantity} x {self.product_name}"
@@ -118,4 +168,22 @@ class OrderItem(models.Model):
     def subtotal(self):
         if self.price is None:
             return 0
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+
+class DeliveredPurchase(models.Model):
+    """
+    One row per (customer, product) the customer has in a delivered order.
+    Verified-purchase checks and "you bought this" markers read this table
+    instead of joining orders and items. orders.purchases keeps it in step
+    with Order status changes.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='delivered_purchases')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='delivered_purchases')
+    delivered_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('user', 'product')
+
+    def __str__(self):
+        return f"{self.user_id} bought {self.product_id}"
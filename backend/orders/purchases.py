@@ -0,0 +1,86 @@
+"""
+Delivered purchases.
+
+DeliveredPurchase has one row per (customer, product) found in any of the
+customer's DELIVERED orders. Its unique (user, product) index answers "did
+this customer buy this product" with a single lookup, or a whole page of
+products with one IN query. An order moving into or out of DELIVERED re-syncs
+the rows for its customer and products. Another delivered order of the same
+product keeps the row, so a return of one order can't revoke the purchase.
+rebuild() recomputes the table from orders.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Min
+
+from .models import DeliveredPurchase, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+def has_purchased(user, product):
+    if not user.is_authenticated:
+        return False
+    return DeliveredPurchase.objects.filter(user=user, product=product).exists()
+
+
+def purchased_product_ids(user, product_ids):
+    """The subset of `product_ids` the user has received, in one query"""
+    if not user.is_authenticated or not product_ids:
+        return set()
+    return set(
+        DeliveredPurchase.objects.filter(user=user, product_id__in=product_ids).values_list('product_id', flat=True)
+    )
+
+
+def _delivered(items):
+    """{(user_id, product_id): first delivery} for order items in delivered orders"""
+    rows = items.filter(order__status=Order.Status.DELIVERED, product__isnull=False).values(
+        'order__user_id', 'product_id'
+    ).annotate(delivered_at=Min('order__delivered_at')).order_by()
+    return {(row['order__user_id'], row['product_id']): row['delivered_at'] for row in rows}
+
+
+def _write(stored, actual):
+    """Delete stored rows missing from `actual`, create the missing ones"""
+    stale = [pk for key, pk in stored.items() if key not in actual]
+    for start in range(0, len(stale), 1000):
+        DeliveredPurchase.objects.filter(pk__in=stale[start:start + 1000]).delete()
+    missing = [
+        DeliveredPurchase(user_id=user_id, product_id=product_id, **({'delivered_at': at} if at else {}))
+        for (user_id, product_id), at in actual.items() if (user_id, product_id) not in stored
+    ]
+    DeliveredPurchase.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+    return len(stale), len(missing)
+
+
+def sync_order(order):
+    """Re-sync the purchases of an order's customer and products after its status changed"""
+    product_ids = [pid for pid in order.items.values_list('product_id', flat=True) if pid is not None]
+    if not product_ids:
+        return
+    with transaction.atomic():
+        actual = _delivered(OrderItem.objects.filter(order__user_id=order.user_id, product_id__in=product_ids))
+        stored = {
+            (order.user_id, product_id): pk
+            for pk, product_id in DeliveredPurchase.objects.filter(
+                user_id=order.user_id, product_id__in=product_ids
+            ).values_list('pk', 'product_id')
+        }
+        _write(stored, actual)
+
+
+def rebuild():
+    """Recompute every delivered purchase from orders; only rows that differ are written"""
+    actual = _delivered(OrderItem.objects.all())
+    with transaction.atomic():
+        stored = {
+            (user_id, product_id): pk
+            for pk, user_id, product_id in DeliveredPurchase.objects.values_list('pk', 'user_id', 'product_id').iterator()
+        }
+        removed, created = _write(stored, actual)
+
+    if removed or created:
+        logger.warning(f"Delivered purchases corrected: {removed} removed, {created} created")
+    return {'removed': removed, 'created': created}
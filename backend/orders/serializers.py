@@ -1,43 +1,20 @@
 from rest_framework import serializers
 from .models import Order, OrderItem
-from catalog.serializers import ProductListSerializer
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    # We nest the product details for the frontend to show images
-    product_details = ProductListSerializer(source='product', read_only=True)
     product = serializers.SerializerMethodField()
 
     class Meta:
         model = OrderItem
-        fields = ['id', 'product_name', 'price', 'quantity', 'subtotal', 'product_details', 'product', 'status', 'tracking_number', 'courier_name']
+        fields = ['id', 'product_name', 'price', 'quantity', 'subtotal', 'product', 'status', 'tracking_number', 'courier_name']
     
     def get_product(self, obj):
-        """Return minimal product info with feature_image for order list"""
-        if obj.product:
-            from catalog.models import ProductImage
-            try:
-                feature_img = ProductImage.objects.filter(product=obj.product, is_feature=True).first()
-                if not feature_img:
-                    feature_img = ProductImage.objects.filter(product=obj.product).first()
-                
-                return {
-                    'id': obj.product.id,
-                    'name': obj.product.name,
-                    'slug': obj.product.slug,
-                    'feature_image': feature_img.image.url if feature_img else None
-                }
-            except Exception:
-                return {
-                    'id': obj.product.id if obj.product else None,
-                    'name': obj.product_name,
-                    'slug': None,
-                    'feature_image': None
-                }
+        """Minimal product info for the order list, from the snapshot taken at checkout (no catalog queries)"""
         return {
-            'id': None,
+            'id': obj.product_id,
             'name': obj.product_name,
-            'slug': None,
-            'feature_image': None
+            'slug': obj.product_slug or None,
+            'feature_image': obj.product_image or None
         }
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -59,15 +36,8 @@ class OrderSerializer(serializers.ModelSerializer):
         if obj.status not in [Order.Status.PENDING, Order.Status.PROCESSING]:
             return False
 
-        # If any shipment exists with OUT_FOR_DELIVERY, cannot cancel
-        try:
-            if obj.shipments.filter(status='OUT_FOR_DELIVERY').exists():
-                return False
-        except Exception:
-            # If shipments relation isn't available or any error, be conservative
-            return False
-
-        return True
+        # .all() so the views' prefetch_related('shipments') is used
+        return not any(shipment.status == 'OUT_FOR_DELIVERY' for shipment in obj.shipments.all())
 
 class CreateOrderSerializer(serializers.Serializer):
     """
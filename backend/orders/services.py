@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from .models import Order, OrderItem
 from cart.models import Cart
+from catalog.models import Product
 from accounts.models import Address
 from notifications.services import NotificationService
 import logging
@@ -19,32 +20,37 @@ class OrderService:
         
         # 1. Fetch Data
         try:
-            cart = Cart.objects.get(user=user)
+            cart = Cart.objects.select_related('coupon').prefetch_related('items').get(user=user)
         except Cart.DoesNotExist:
             raise ValidationError("Cart is empty")
 
-        if not cart.items.exists():
+        cart_items = list(cart.items.all())
+        if not cart_items:
             raise ValidationError("Cart is empty")
 
         address = get_object_or_404(Address, id=address_id, user=user)
 
         # 2. Start Atomic Transaction
         with transaction.atomic():
-            # Calculate Totals
-            subtotal = cart.total_price
-            discount = 0
-            
-            # Apply Coupon if exists
-            if cart.coupon:
-                discount = cart.coupon.get_discount_amount(subtotal)
-            
-            final_total = subtotal - discount
+            # Lock all product rows in one query (id order, so concurrent checkouts can't deadlock);
+            # images come along for the order item snapshot
+            products = Product.objects.select_for_update().prefetch_related('images').order_by('id').in_bulk(
+                [item.product_id for item in cart_items]
+            )
+            for cart_item in cart_items:
+                cart_item.product = products[cart_item.product_id]
+                if cart_item.product.stock_quantity < cart_item.quantity:
+                    raise ValidationError(f"Insufficient stock for {cart_item.product.name}")
+
+            # Calculate Totals from the locked rows, the same way the cart page does
+            cart.refresh_pricing()
+            pricing = cart.pricing
 
             # Create Order Object
             order = Order.objects.create(
                 user=user,
-                total_amount=final_total,
-                discount_amount=discount,
+                total_amount=pricing.grand_total,
+                discount_amount=pricing.discount,
                 coupon=cart.coupon,
                 shipping_address={
                     "full_name": address.full_name,
@@ -59,23 +65,14 @@ class OrderService:
             )
 
             # Move Items & Deduct Stock
-            for cart_item in cart.items.select_related('product').all():
+            for cart_item in cart_items:
                 product = cart_item.product
                 
-                # Lock product row
-                product = product.__class__.objects.select_for_update().get(id=product.id)
-                
-                if product.stock_quantity < cart_item.quantity:
-                    raise ValidationError(f"Insufficient stock for {product.name}")
-                
-                # Snapshot Price
-                item_price = product.discount_price if product.discount_price else product.price
-                
                 OrderItem.objects.create(
                     order=order,
                     product=product,
                     product_name=product.name,
-                    price=item_price,
+                    price=product.selling_price,  # Snapshot Price
                     quantity=cart_item.quantity
                 )
                 
@@ -131,6 +128,8 @@ class OrderService:
                     order=new_order,
                     product=product,
                     product_name=item.product_name,
+                    product_slug=item.product_slug,
+                    product_image=item.product_image,
                     price=item.price,
                     quantity=item.quantity
                 )
@@ -1,9 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Order
+from .models import Order, OrderItem
+from .purchases import sync_order
+from sellers.order_inbox import StatusChanges, apply_count_changes, queryset_count_changes
 from notifications.models import Notification
-from django.utils import timezone
-from datetime import timedelta
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
@@ -96,16 +96,6 @@ def create_order_notifications(sender, instance, created, **kwargs):
                 )
             except Exception:
                 pass
-        
-        # Auto-create payout when delivered
-        if instance.status == 'DELIVERED' and instance.payment_status:
-            from sellers.tasks import schedule_automatic_payout
-            # Schedule payout after 7 days (return period)
-            payout_date = timezone.now() + timedelta(days=7)
-            schedule_automatic_payout.apply_async(
-                args=[str(instance.id)],
-                eta=payout_date
-            )
 
 @receiver(post_save, sender=Order)
 def sync_order_status_to_items(sender, instance, created, **kwargs):
@@ -113,14 +103,18 @@ def sync_order_status_to_items(sender, instance, created, **kwargs):
     Synchronize OrderItem statuses with the main Order status.
     This ensures that when an admin updates the Order status, 
     sellers see the update in their OrderItems list.
+    Callers that have already written the item statuses themselves (tracking
+    sync, bulk fulfilment) set `_items_synced` on the order to skip this.
     """
-    if not created:
+    if not created and not getattr(instance, '_items_synced', False):
         # Statuses common to both models
         syncable_statuses = ['PROCESSING', 'SHIPPED', 'DELIVERED', 'CANCELLED', 'RETURNED']
         
         if instance.status in syncable_statuses:
             # We use .update() here to avoid recursive signals or redundant processing
             # since we just want to force the status change down to the items.
+            # Seller inbox counters take the same change as a delta.
+            apply_count_changes(queryset_count_changes(instance.items.all(), instance.status))
             instance.items.all().update(status=instance.status)
             
             # Broadcast the update for the specific order items via WS if needed
@@ -139,3 +133,21 @@ def sync_order_status_to_items(sender, instance, created, **kwargs):
                         )
             except Exception:
                 pass
+
+
+@receiver(post_save, sender=Order)
+def sync_delivered_purchases(sender, instance, created, **kwargs):
+    """Record (or withdraw) the order's purchases when it moves into (or out of) DELIVERED"""
+    previous = None if created else getattr(instance, '_loaded_status', None)
+    if previous != instance.status and Order.Status.DELIVERED in (previous, instance.status):
+        sync_order(instance)
+
+
+@receiver(post_delete, sender=OrderItem)
+def release_seller_order_count(sender, instance, **kwargs):
+    """Keep the seller inbox counters in step when an order item goes away"""
+    if instance.seller_id:
+        changes = StatusChanges()
+        status = getattr(instance, '_loaded_status', instance.status)
+        changes.add(instance.seller_id, status, -1, -(instance.price or 0) * instance.quantity)
+        apply_count_changes(changes)
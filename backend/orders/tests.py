@@ -80,3 +80,55 @@ class OrderTests(TestCase):
         response = self.client.get('/api/orders/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreater(len(response.data['results']), 0)
+
+    def test_order_history_reads_checkout_snapshot(self):
+        from catalog.models import ProductImage
+        from cart.models import Cart, CartItem
+        ProductImage.objects.create(product=self.product, image='products/front.jpg', is_feature=True)
+        self.client.force_authenticate(user=self.user)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        self.client.post('/api/orders/checkout/', {'address_id': self.address.id, 'payment_method': 'COD'})
+
+        # Later catalog edits don't rewrite history
+        self.product.name = 'Renamed Product'
+        self.product.save()
+        ProductImage.objects.all().delete()
+
+        response = self.client.get('/api/orders/')
+        item = response.data['results'][0]['items'][0]['product']
+        self.assertEqual(item['name'], 'Test Product')
+        self.assertEqual(item['slug'], 'test-product-test-001')
+        self.assertTrue(item['feature_image'].endswith('products/front.jpg'))
+        self.assertIn('next', response.data['pagination'])
+        self.assertTrue(response.data['results'][0]['cancellable'])
+
+    def test_delivered_purchases_follow_order_status(self):
+        from orders.models import DeliveredPurchase, OrderItem
+        from orders.purchases import purchased_product_ids, rebuild
+        from reviews.models import Review
+        order = Order.objects.create(user=self.user, total_amount=100, shipping_address={'zip': '123456'})
+        OrderItem.objects.create(order=order, product=self.product, product_name=self.product.name, quantity=1)
+        other = Product.objects.create(
+            seller=self.seller_user, category=self.category, name='Other', sku='TEST-002',
+            description='Other', price=50, stock_quantity=5, is_active=True
+        )
+        self.assertEqual(purchased_product_ids(self.user, [self.product.id, other.id]), set())
+
+        order.status = Order.Status.DELIVERED
+        order.save()
+        self.assertEqual(purchased_product_ids(self.user, [self.product.id, other.id]), {self.product.id})
+
+        # Grid marker from one lookup, and review gating from the same index
+        self.client.force_authenticate(user=self.user)
+        products = self.client.get('/api/catalog/products/').data['results']
+        self.assertEqual({p['id']: p['purchased'] for p in products}, {self.product.id: True, other.id: False})
+        self.client.post('/api/reviews/', {'product': self.product.id, 'rating': 5, 'comment': 'Works'})
+        self.assertTrue(Review.objects.get(user=self.user).is_verified_purchase)
+
+        order.status = Order.Status.RETURNED
+        order.save()
+        self.assertFalse(DeliveredPurchase.objects.exists())
+
+        DeliveredPurchase.objects.create(user=self.user, product=other)
+        self.assertEqual(rebuild(), {'removed': 1, 'created': 0})
@@ -5,6 +5,7 @@ from django.db.models import Q
 from .models import Order
 from .serializers import OrderSerializer, CreateOrderSerializer
 from .services import OrderService
+from core.pagination import NewestFirstCursorPagination
 from django.core.exceptions import ValidationError
 from payments.services import PaymentService 
 from payments.models import RefundRequest
@@ -16,28 +17,16 @@ class OrderListView(generics.ListAPIView):
     """ List all orders for the logged-in user """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NewestFirstCursorPagination
 
     def get_queryset(self):
         try:
             user = self.request.user
             logger.info(f"OrderListView: User {user.id} ({user.email}) requesting orders")
             
-            # Enhanced queryset with proper filtering and ordering
-            queryset = Order.objects.filter(
-                user=user
-            ).select_related(
-                'user'
-            ).prefetch_related(
-                'items__product', 'items__seller'
-            ).order_by('-created_at')
-            
-            count = queryset.count()
-            logger.info(f"OrderListView: Found {count} orders for user {user.id}")
-            
-            if count == 0:
-                logger.info(f"OrderListView: No orders found for user {user.email}. This is normal for new customers.")
-            
-            return queryset
+            # Items render from their checkout snapshot, so no product/seller joins;
+            # three queries per page however many orders or items it holds
+            return Order.objects.filter(user=user).prefetch_related('items', 'shipments')
         except Exception as e:
             logger.error(f"OrderListView error for user {self.request.user.id}: {str(e)}")
             return Order.objects.none()
@@ -53,13 +42,7 @@ class OrderDetailView(generics.RetrieveAPIView):
             user = self.request.user
             logger.info(f"OrderDetailView: User {user.id} requesting order details")
             
-            queryset = Order.objects.filter(
-                user=user
-            ).select_related(
-                'user'
-            ).prefetch_related(
-                'items__product', 'items__seller'
-            )
+            queryset = Order.objects.filter(user=user).prefetch_related('items', 'shipments')
             
             logger.info(f"OrderDetailView: Queryset prepared for user {user.id}")
             return queryset
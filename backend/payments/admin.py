@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Transaction
+from django.db import transaction
+from .models import Transaction, WebhookEvent
+from .webhooks import schedule_drain
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -9,4 +11,24 @@ class TransactionAdmin(admin.ModelAdmin):
     readonly_fields = ('gateway_response', 'created_at')
     
     def has_add_permission(self, request):
-        return False # Transactions should only be created by code
\ No newline at end of file
+        return False # Transactions should only be created by code
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'event_type')
+    search_fields = ('event_id',)
+    readonly_fields = ('payload', 'received_at', 'processed_at')
+    actions = ['requeue_events']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Requeue selected events')
+    def requeue_events(self, request, queryset):
+        updated = queryset.exclude(status=WebhookEvent.Status.PROCESSED).update(
+            status=WebhookEvent.Status.RECEIVED, attempts=0, error_message=''
+        )
+        if updated:
+            transaction.on_commit(schedule_drain)
+        self.message_user(request, f"{updated} event(s) requeued.")
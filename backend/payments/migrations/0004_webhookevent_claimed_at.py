@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:01
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_in_flight_claims(apps, schema_editor):
+    # Claimed before claims were timestamped; the requeue counts from now
+    WebhookEvent = apps.get_model('payments', 'WebhookEvent')
+    WebhookEvent.objects.filter(status='PROCESSING').update(claimed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a drain last took it for processing', null=True),
+        ),
+        migrations.RunPython(stamp_in_flight_claims, migrations.RunPython.noop),
+    ]
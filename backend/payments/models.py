@@ -58,4 +58,32 @@ class RefundRequest(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"RefundRequest(order={self.order.order_id}, status={self.status})"
\ No newline at end of file
+        return f"RefundRequest(order={self.order.order_id}, status={self.status})"
+
+class WebhookEvent(models.Model):
+    """Verified Razorpay webhook, stored as received and processed asynchronously"""
+    class Status(models.TextChoices):
+        RECEIVED = 'RECEIVED', 'Received'
+        PROCESSING = 'PROCESSING', 'Processing'
+        PROCESSED = 'PROCESSED', 'Processed'
+        IGNORED = 'IGNORED', 'Ignored'
+        FAILED = 'FAILED', 'Failed'
+
+    event_id = models.CharField(max_length=100, unique=True, help_text="X-Razorpay-Event-Id (or payload hash)")
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RECEIVED)
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a drain last took it for processing")
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id}) - {self.status}"
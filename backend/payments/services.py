@@ -9,9 +9,13 @@ from .models import Transaction
 from orders.models import Order
 from notifications.services import NotificationService
 from cart.models import Cart
+from core.http_client import get_client
 
 logger = logging.getLogger(__name__)
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+client = razorpay.Client(
+    session=get_client('razorpay'),
+    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+)
 
 class PaymentService:
     
@@ -64,73 +68,92 @@ class PaymentService:
                 logger.error(f"Signature verification failed: {e}")
                 return False
 
-            with transaction.atomic():
-                # Validation 3: Get transaction with select_for_update to prevent race conditions
-                try:
-                    txn = Transaction.objects.select_for_update().get(
-                        payment_id=data.get('razorpay_order_id')
-                    )
-                except Transaction.DoesNotExist:
-                    logger.error(f"Transaction not found for RZP Order {data.get('razorpay_order_id')}")
-                    return False
-                
-                # Validation 4: Check if already processed
-                if txn.status == Transaction.Status.SUCCESS:
-                    logger.warning(f"Transaction {txn.id} already processed")
-                    return True
-                
-                order = txn.order
-                
-                # Validation 5: Check order state
-                if order.payment_status:
-                    logger.warning(f"Order {order.order_id} already paid")
-                    return True
-                
-                if order.status == 'CANCELLED':
-                    logger.error(f"Cannot process payment for cancelled order {order.order_id}")
-                    return False
-                
-                # Update order
-                if order.payment_method == 'COD':
-                    order.payment_method = 'CARD'
-                
-                order.payment_status = True
-                order.status = 'PROCESSING'
-                order.save()
-
-                # Update transaction
-                txn.status = Transaction.Status.SUCCESS
-                txn.gateway_response = data
-                txn.save()
-
-                # Clear cart
-                try:
-                    cart = Cart.objects.get(user=order.user)
-                    cart.items.all().delete()
-                    cart.coupon = None
-                    cart.save()
-                    logger.info(f"Cart cleared for user {order.user.id}")
-                except Cart.DoesNotExist:
-                    pass
-
-                # Send notification
-                NotificationService.create_notification(
-                    user=order.user,
-                    title="Payment Received",
-                    message=f"Order #{order.order_id} confirmed. Amount: ₹{order.total_amount}",
-                    type='SUCCESS'
-                )
-                
-                logger.info(
-                    f"Payment verified successfully: Order={order.order_id}, "
-                    f"Payment={data.get('razorpay_payment_id')}, Amount=₹{order.total_amount}"
-                )
-                return True
+            return PaymentService.confirm_payment(data.get('razorpay_order_id'), data)
 
         except Exception as e:
             logger.error(f"Payment verification failed: {str(e)}", exc_info=True)
             return False
     
+    @staticmethod
+    def confirm_payment(razorpay_order_id, gateway_response):
+        """
+        Mark the order paid once the payment is known to be genuine (checkout
+        signature or verified webhook): order + transaction update, cart
+        clearing and the customer notification. Safe to call more than once.
+        """
+        with transaction.atomic():
+            # Validation 3: Get transaction with select_for_update to prevent race conditions
+            try:
+                txn = Transaction.objects.select_for_update().get(
+                    payment_id=razorpay_order_id
+                )
+            except Transaction.DoesNotExist:
+                logger.error(f"Transaction not found for RZP Order {razorpay_order_id}")
+                return False
+            
+            # Validation 4: Check if already processed
+            if txn.status == Transaction.Status.SUCCESS:
+                logger.warning(f"Transaction {txn.id} already processed")
+                return True
+            
+            order = txn.order
+            
+            # Validation 5: Check order state
+            if order.payment_status:
+                logger.warning(f"Order {order.order_id} already paid")
+                return True
+            
+            if order.status == 'CANCELLED':
+                logger.error(f"Cannot process payment for cancelled order {order.order_id}")
+                return False
+            
+            # Update order
+            if order.payment_method == 'COD':
+                order.payment_method = 'CARD'
+            
+            order.payment_status = True
+            order.status = 'PROCESSING'
+            order.save()
+
+            # Update transaction
+            txn.status = Transaction.Status.SUCCESS
+            txn.gateway_response = gateway_response
+            txn.save()
+
+            # Clear cart
+            try:
+                cart = Cart.objects.get(user=order.user)
+                cart.items.all().delete()
+                cart.coupon = None
+                cart.save()
+                logger.info(f"Cart cleared for user {order.user.id}")
+            except Cart.DoesNotExist:
+                pass
+
+            # Send notification
+            NotificationService.create_notification(
+                user=order.user,
+                title="Payment Received",
+                message=f"Order #{order.order_id} confirmed. Amount: ₹{order.total_amount}",
+                type='SUCCESS'
+            )
+            
+            logger.info(
+                f"Payment verified successfully: Order={order.order_id}, "
+                f"Payment={gateway_response.get('razorpay_payment_id')}, Amount=₹{order.total_amount}"
+            )
+            return True
+
+    @staticmethod
+    def mark_payment_failed(razorpay_order_id, gateway_response):
+        """Record a failed attempt; a transaction that already succeeded is left alone"""
+        updated = Transaction.objects.filter(payment_id=razorpay_order_id).exclude(
+            status__in=[Transaction.Status.SUCCESS, Transaction.Status.REFUNDED]
+        ).update(status=Transaction.Status.FAILED, gateway_response=gateway_response)
+        if not updated:
+            logger.info(f"No pending transaction for failed payment on {razorpay_order_id}")
+        return bool(updated)
+
     @staticmethod
     def verify_webhook_signature(payload, signature):
         """Verify Razorpay webhook signature"""
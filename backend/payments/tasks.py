@@ -1,12 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
+from django.core.cache import cache
 from django.utils import timezone
 
 from config.celery import app
 
 from .models import RefundRequest, Transaction
 from .services import PaymentService
+from .webhooks import DRAIN_SCHEDULED_KEY, WebhookInbox
 from wallet.services import WalletService
 
 logger = logging.getLogger(__name__)
@@ -74,4 +76,20 @@ def refund_order_task(self, refund_request_id: str):
             raise self.retry(exc=exc)
         except self.MaxRetriesExceededError:
             logger.error(f"Max retries exceeded for refund {refund_request_id}")
-            return
\ No newline at end of file
+            return
+
+
+@app.task
+def process_webhook_events():
+    """Drain the Razorpay webhook inbox in batches"""
+    # Clear the debounce flag first so events arriving mid-drain schedule a new run
+    try:
+        cache.delete(DRAIN_SCHEDULED_KEY)
+    except Exception:
+        pass
+
+    WebhookInbox.requeue_stale(timezone.now() - timedelta(minutes=15))
+    stats = WebhookInbox().drain()
+    if any(stats.values()):
+        logger.info(f"Webhook inbox drained: {stats}")
+    return stats
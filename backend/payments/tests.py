@@ -1,3 +1,113 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import Cart
+from notifications.models import Notification
+from orders.models import Order
+from .models import Transaction, WebhookEvent
+from .webhooks import WebhookInbox
+
+User = get_user_model()
+
+
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='buyer@example.com', password='BuyerPass123!', role='CUSTOMER')
+        self.order = Order.objects.create(
+            user=self.user, total_amount=500, shipping_address={'postal_code': '560001'}
+        )
+        self.txn = Transaction.objects.create(
+            order=self.order, user=self.user, payment_id='order_rzp_1',
+            amount=500, provider='RAZORPAY', status='PENDING'
+        )
+        Cart.objects.create(user=self.user)
+
+    def post_event(self, event_id, event='payment.captured', order_id='order_rzp_1'):
+        body = json.dumps({
+            'event': event,
+            'payload': {'payment': {'entity': {'id': 'pay_1', 'order_id': order_id}}},
+        })
+        signature = hmac.new(settings.RAZORPAY_KEY_SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/api/payments/webhook/', body, content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_webhook_is_stored_and_acknowledged_without_processing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.post_event('evt_1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.RECEIVED)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'PENDING')
+
+    def test_retried_event_is_stored_once(self):
+        self.post_event('evt_1')
+        self.post_event('evt_1')
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.client.post(
+            '/api/payments/webhook/', '{}', content_type='application/json', HTTP_X_RAZORPAY_SIGNATURE='bad'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_drain_confirms_payment_through_shared_path(self):
+        self.post_event('evt_1')
+        self.post_event('evt_2')  # Second delivery for the same payment
+
+        stats = WebhookInbox(batch_size=1).drain()
+
+        self.assertEqual(stats['processed'], 2)
+        self.order.refresh_from_db()
+        self.txn.refresh_from_db()
+        self.assertTrue(self.order.payment_status)
+        self.assertEqual(self.order.status, 'PROCESSING')
+        self.assertEqual(self.txn.status, 'SUCCESS')
+        self.assertEqual(self.txn.gateway_response['razorpay_payment_id'], 'pay_1')
+        self.assertEqual(Notification.objects.filter(user=self.user, title='Payment Received').count(), 1)
+
+    def test_failed_event_is_retried_then_parked(self):
+        self.post_event('evt_1', order_id='order_missing')
+        inbox = WebhookInbox(max_attempts=2)
+
+        self.assertEqual(inbox.drain()['failed'], 1)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.RECEIVED)
+
+        inbox.drain()
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEvent.Status.FAILED)
+        self.assertEqual(event.attempts, 2)
+
+    def test_requeue_uses_claim_time_not_receipt_time(self):
+        self.post_event('evt_old')
+        self.post_event('evt_dead')
+        long_ago = timezone.now() - timedelta(hours=2)
+        WebhookEvent.objects.update(received_at=long_ago)
+        WebhookInbox()._claim()
+        # evt_dead's worker died an hour ago; evt_old was claimed just now
+        WebhookEvent.objects.filter(event_id='evt_dead').update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(WebhookInbox.requeue_stale(timezone.now() - timedelta(minutes=15)), 1)
+        statuses = dict(WebhookEvent.objects.values_list('event_id', 'status'))
+        self.assertEqual(statuses, {'evt_old': WebhookEvent.Status.PROCESSING, 'evt_dead': WebhookEvent.Status.RECEIVED})
+
+    def test_payment_failed_does_not_override_success(self):
+        self.post_event('evt_1')
+        self.post_event('evt_2', event='payment.failed')
+        WebhookInbox().drain()
 
-# Create your tests here.
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'SUCCESS')
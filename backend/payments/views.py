@@ -5,10 +5,12 @@ from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.http import HttpResponse
+from django.db import transaction
 import json
 import logging
 from .services import PaymentService
 from .models import Transaction
+from .webhooks import record_event, schedule_drain
 from orders.models import Order
 
 logger = logging.getLogger(__name__)
@@ -74,7 +76,8 @@ class VerifyRazorpayPaymentView(APIView):
 class RazorpayWebhookView(APIView):
     """
     POST: /api/payments/webhook/
-    Razorpay webhook handler for payment events
+    Razorpay webhook receiver. Verifies the signature, stores the event in the
+    inbox (deduplicated on event id) and returns 200; processing is async.
     """
     permission_classes = [permissions.AllowAny]
     
@@ -94,59 +97,14 @@ class RazorpayWebhookView(APIView):
                 logger.error("Webhook signature verification failed")
                 return HttpResponse(status=400)
             
-            # Parse event
-            event = json.loads(payload)
-            event_type = event.get('event')
-            
-            logger.info(f"Webhook received: {event_type}")
-            
-            # Handle payment.captured event
-            if event_type == 'payment.captured':
-                payment_entity = event.get('payload', {}).get('payment', {}).get('entity', {})
-                
-                razorpay_order_id = payment_entity.get('order_id')
-                razorpay_payment_id = payment_entity.get('id')
-                
-                if razorpay_order_id and razorpay_payment_id:
-                    # Process payment
-                    webhook_data = {
-                        'razorpay_order_id': razorpay_order_id,
-                        'razorpay_payment_id': razorpay_payment_id,
-                        'razorpay_signature': 'webhook'  # Signature already verified
-                    }
-                    
-                    # Use internal verification (skip signature check as already done)
-                    try:
-                        txn = Transaction.objects.get(payment_id=razorpay_order_id)
-                        if txn.status != Transaction.Status.SUCCESS:
-                            order = txn.order
-                            order.payment_status = True
-                            order.status = 'PROCESSING'
-                            order.save()
-                            
-                            txn.status = Transaction.Status.SUCCESS
-                            txn.gateway_response = payment_entity
-                            txn.save()
-                            
-                            logger.info(f"Webhook processed payment for order {order.order_id}")
-                    except Transaction.DoesNotExist:
-                        logger.error(f"Transaction not found for webhook: {razorpay_order_id}")
-            
-            # Handle payment.failed event
-            elif event_type == 'payment.failed':
-                payment_entity = event.get('payload', {}).get('payment', {}).get('entity', {})
-                razorpay_order_id = payment_entity.get('order_id')
-                
-                if razorpay_order_id:
-                    try:
-                        txn = Transaction.objects.get(payment_id=razorpay_order_id)
-                        txn.status = Transaction.Status.FAILED
-                        txn.gateway_response = payment_entity
-                        txn.save()
-                        logger.info(f"Payment failed for order {txn.order.order_id}")
-                    except Transaction.DoesNotExist:
-                        pass
-            
+            # Store and acknowledge; the inbox worker applies it
+            event, created = record_event(payload, request.headers.get('X-Razorpay-Event-Id'))
+            if created:
+                logger.info(f"Webhook queued: {event.event_type} ({event.event_id})")
+                transaction.on_commit(schedule_drain)
+            else:
+                logger.info(f"Duplicate webhook ignored: {event.event_id if event else 'unknown'}")
+
             return HttpResponse(status=200)
             
         except Exception as e:
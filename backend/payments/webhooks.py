@@ -0,0 +1,164 @@
+"""
+Razorpay webhook inbox.
+
+The webhook view only verifies the signature and stores the event (unique on
+Razorpay's event id, so retries are dropped at insert time), then returns 200.
+A worker drains the inbox in batches and applies each event through the same
+PaymentService code path as checkout verification.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+from .services import PaymentService
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SCHEDULED_KEY = 'payments:webhook_drain_scheduled'
+
+
+def event_identifier(payload, event_id=None):
+    """Razorpay's event id, or a payload digest when the header is missing"""
+    return event_id or f"sha256:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def record_event(payload, event_id=None):
+    """Store a verified webhook. Returns (event, created); duplicates are not stored."""
+    data = json.loads(payload)
+    event_id = event_identifier(payload, event_id)
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                event_id=event_id,
+                event_type=data.get('event', ''),
+                payload=data,
+            )
+    except IntegrityError:
+        return WebhookEvent.objects.filter(event_id=event_id).first(), False
+    return event, True
+
+
+def schedule_drain():
+    """Queue one delayed drain for a burst of webhooks instead of one task per event"""
+    from .tasks import process_webhook_events
+
+    delay = settings.RAZORPAY_WEBHOOK_BATCH_DELAY
+    try:
+        if not cache.add(DRAIN_SCHEDULED_KEY, 1, timeout=delay or 1):
+            return
+    except Exception as e:
+        logger.warning(f"Webhook drain debounce unavailable: {e}")
+    process_webhook_events.apply_async(countdown=delay)
+
+
+def payment_entity(event):
+    return event.payload.get('payload', {}).get('payment', {}).get('entity', {}) or {}
+
+
+def handle_payment_captured(event):
+    entity = payment_entity(event)
+    if not entity.get('order_id') or not entity.get('id'):
+        return WebhookEvent.Status.IGNORED
+    confirmed = PaymentService.confirm_payment(entity['order_id'], {
+        'razorpay_order_id': entity['order_id'],
+        'razorpay_payment_id': entity['id'],
+        'source': 'webhook',
+        'event_id': event.event_id,
+        'entity': entity,
+    })
+    if not confirmed:
+        raise ValueError(f"Payment confirmation failed for {entity['order_id']}")
+    return WebhookEvent.Status.PROCESSED
+
+
+def handle_payment_failed(event):
+    entity = payment_entity(event)
+    if not entity.get('order_id'):
+        return WebhookEvent.Status.IGNORED
+    PaymentService.mark_payment_failed(entity['order_id'], {
+        'razorpay_order_id': entity['order_id'],
+        'razorpay_payment_id': entity.get('id'),
+        'source': 'webhook',
+        'event_id': event.event_id,
+        'entity': entity,
+    })
+    return WebhookEvent.Status.PROCESSED
+
+
+HANDLERS = {
+    'payment.captured': handle_payment_captured,
+    'payment.failed': handle_payment_failed,
+}
+
+
+class WebhookInbox:
+    def __init__(self, batch_size=None, max_attempts=None):
+        self.batch_size = batch_size or settings.RAZORPAY_WEBHOOK_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.RAZORPAY_WEBHOOK_MAX_ATTEMPTS
+
+    def drain(self, max_batches=None):
+        """Process queued events batch by batch until the inbox is empty"""
+        stats = {'processed': 0, 'ignored': 0, 'failed': 0}
+        batches, seen = 0, set()
+        while max_batches is None or batches < max_batches:
+            # Events that failed in this run wait for the next drain
+            events = self._claim(exclude=seen)
+            if not events:
+                break
+            self._process_batch(events, stats)
+            seen.update(e.id for e in events)
+            batches += 1
+        return stats
+
+    def _claim(self, exclude=()):
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=WebhookEvent.Status.RECEIVED)
+                .exclude(id__in=exclude)
+                .order_by('received_at', 'id')[:self.batch_size]
+            )
+            WebhookEvent.objects.filter(id__in=[e.id for e in events]).update(
+                status=WebhookEvent.Status.PROCESSING, claimed_at=timezone.now()
+            )
+        return events
+
+    def _process_batch(self, events, stats):
+        now = timezone.now()
+        for event in events:
+            event.attempts += 1
+            handler = HANDLERS.get(event.event_type)
+            try:
+                event.status = handler(event) if handler else WebhookEvent.Status.IGNORED
+                event.error_message = ''
+                event.processed_at = now
+            except Exception as e:
+                logger.error(f"Webhook {event.event_id} ({event.event_type}) failed: {e}")
+                event.error_message = str(e)
+                # Left in the inbox for the next drain until attempts run out
+                event.status = (
+                    WebhookEvent.Status.FAILED if event.attempts >= self.max_attempts
+                    else WebhookEvent.Status.RECEIVED
+                )
+
+            if event.status == WebhookEvent.Status.PROCESSED:
+                stats['processed'] += 1
+            elif event.status == WebhookEvent.Status.IGNORED:
+                stats['ignored'] += 1
+            else:
+                stats['failed'] += 1
+
+        WebhookEvent.objects.bulk_update(events, ['status', 'attempts', 'error_message', 'processed_at'])
+
+    @staticmethod
+    def requeue_stale(older_than):
+        """Events claimed before `older_than` by a worker that died mid-batch go back to the inbox"""
+        return WebhookEvent.objects.filter(
+            status=WebhookEvent.Status.PROCESSING, claimed_at__lt=older_than
+        ).update(status=WebhookEvent.Status.RECEIVED)
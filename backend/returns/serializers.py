@@ -58,7 +58,7 @@ class ReturnRequestCreateSerializer(serializers.Serializer):
         
         # Check if order belongs to user
         request = self.context.get('request')
-        if order.user != request.user:
+        if order.user_id != request.user.id:
             raise serializers.ValidationError("This order doesn't belong to you")
         
         # Check if order is delivered
@@ -79,6 +79,8 @@ class ReturnRequestCreateSerializer(serializers.Serializer):
         if existing_return:
             raise serializers.ValidationError("Return request already exists for this order")
         
+        # Kept for create(), which would otherwise fetch the order again
+        self._order = order
         return value
     
     def validate(self, attrs):
@@ -108,18 +110,22 @@ class ReturnRequestCreateSerializer(serializers.Serializer):
         from catalog.models import Product
         
         request = self.context.get('request')
-        order = Order.objects.get(order_id=validated_data['order_id'])
+        order = self._order
         items_data = validated_data.pop('items')
         exchange_product_id = validated_data.pop('exchange_product_id', None)
         
-        # Get seller from first item
-        seller = order.items.first().seller
+        # The order's items in one query; the seller comes from the first
+        order_items = list(order.items.order_by('id'))
+        items_by_id = {str(item.id): item for item in order_items}
+        missing = [d['order_item_id'] for d in items_data if str(d.get('order_item_id')) not in items_by_id]
+        if missing:
+            raise serializers.ValidationError({"items": f"Items {missing} are not part of this order"})
         
         # Create return request
         return_request = ReturnRequest.objects.create(
             order=order,
             customer=request.user,
-            seller=seller,
+            seller_id=order_items[0].seller_id if order_items else None,
             request_type=validated_data['request_type'],
             reason=validated_data['reason'],
             description=validated_data['description'],
@@ -130,7 +136,7 @@ class ReturnRequestCreateSerializer(serializers.Serializer):
         
         # Create return items
         for item_data in items_data:
-            order_item = OrderItem.objects.get(id=item_data['order_item_id'])
+            order_item = items_by_id[str(item_data['order_item_id'])]
             ReturnItem.objects.create(
                 return_request=return_request,
                 order_item=order_item,
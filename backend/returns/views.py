@@ -6,7 +6,7 @@ from .models import ReturnRequest
 from .serializers import ReturnRequestSerializer, ReturnRequestCreateSerializer
 from wallet.services import WalletService
 from notifications.models import Notification
-import razorpay
+from payments.services import client as razorpay_client
 from django.conf import settings
 
 class ReturnRequestViewSet(viewsets.ModelViewSet):
@@ -224,8 +224,7 @@ class ReturnRequestViewSet(viewsets.ModelViewSet):
         transaction = return_request.order.transactions.filter(status='SUCCESS').first()
         if transaction:
             try:
-                client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-                client.payment.refund(
+                razorpay_client.payment.refund(
                     transaction.payment_id,
                     {"amount": int(refund_amount * 100)}
                 )
@@ -0,0 +1,157 @@
+"""
+Review listing and helpful votes.
+
+A product's reviews are paged with a keyset cursor in one of two orders:
+newest first or most helpful first. Each order has its own
+(product, -key, -id) index on Review, so a page is an index seek and never a
+sort. The cursor carries the whole (key, id) pair: helpful_count is shared by
+many reviews and moves with every vote, so a position on the key alone plus
+an offset would skip or repeat reviews between pages. The first page per product and ordering is what almost every visitor
+sees, so it is cached. Any review change or vote drops that cache.
+
+A helpful vote is a ReviewVote row plus an F() increment of
+Review.helpful_count. The vote row's unique (user, review) constraint makes a
+repeated click a no-op rather than a second count. The review row itself is
+never re-saved.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.exceptions import NotFound
+
+from core.pagination import NewestFirstCursorPagination
+from .models import Review, ReviewVote
+
+ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'helpful': ('-helpful_count', '-id'),
+}
+DEFAULT_ORDERING = 'newest'
+
+
+def ordering_param(request):
+    ordering = request.query_params.get('ordering')
+    return ordering if ordering in ORDERINGS else DEFAULT_ORDERING
+
+
+class ReviewCursorPagination(NewestFirstCursorPagination):
+    """
+    ?ordering=newest (default) or ?ordering=helpful
+
+    The cursor position is every ordering field joined with '|', and a page
+    seeks strictly past it, e.g. (helpful_count < 3) OR
+    (helpful_count = 3 AND id < 812). The position is unique, so the cursor
+    never needs an offset.
+    """
+    page_size = 10
+
+    def get_ordering(self, request, queryset, view):
+        return ORDERINGS[ordering_param(request)]
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            return '|'.join(str(instance[field]) for field in fields)
+        return '|'.join(str(getattr(instance, field)) for field in fields)
+
+    def _seek(self, queryset, position, reverse):
+        """Filter matching the rows that come after `position` in the query's direction"""
+        values = position.split('|')
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        seek, ties = Q(), Q()
+        for order, value in zip(self.ordering, values):
+            field = order.lstrip('-')
+            try:
+                value = queryset.model._meta.get_field(field).to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            # Same test as DRF: (cursor reversed) XOR (field descending)
+            lookup = '__lt' if reverse != order.startswith('-') else '__gt'
+            seek |= ties & Q(**{field + lookup: value})
+            ties &= Q(**{field: value})
+        return seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # DRF's version filters on the first ordering field only; this is the
+        # same flow with the filter on the full position
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*(o[1:] if o.startswith('-') else '-' + o for o in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(queryset, position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position, self.previous_position = following, position
+
+        self.display_page_controls = (self.has_previous or self.has_next) and self.template is not None
+        return self.page
+
+
+# --- First page cache ---
+
+def first_page_key(product_slug, ordering):
+    return f'reviews:first_page:{product_slug}:{ordering}'
+
+
+def invalidate_first_pages(product_slug):
+    cache.delete_many([first_page_key(product_slug, ordering) for ordering in ORDERINGS])
+
+
+def cached_first_page(product_slug, ordering, build):
+    """The first page for a product, rendered by `build()` on a miss"""
+    key = first_page_key(product_slug, ordering)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.REVIEWS_FIRST_PAGE_CACHE_SECONDS)
+    return data
+
+
+# --- Helpful votes ---
+
+def toggle_helpful(user, review_id):
+    """Add the user's vote, or remove it if they already voted. Returns (action, helpful_count)."""
+    with transaction.atomic():
+        removed, _ = ReviewVote.objects.filter(user=user, review_id=review_id).delete()
+        if removed:
+            action, delta = 'removed', -1
+        else:
+            try:
+                with transaction.atomic():
+                    ReviewVote.objects.create(user=user, review_id=review_id)
+                action, delta = 'added', 1
+            except IntegrityError:
+                # A concurrent click from the same user got there first
+                action, delta = 'added', 0
+        reviews = Review.objects.filter(pk=review_id)
+        if delta:
+            reviews.update(helpful_count=Greatest(F('helpful_count') + delta, 0))
+        count, product_slug = reviews.values_list('helpful_count', 'product__slug').get()
+
+    invalidate_first_pages(product_slug)
+    return action, count
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def build_rating_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ProductRatingStats = apps.get_model('reviews', 'ProductRatingStats')
+
+    rows = Review.objects.values('product_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    ).order_by()
+    ProductRatingStats.objects.bulk_create(
+        [ProductRatingStats(**row) for row in rows.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_productratingstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_rating_stats, migrations.RunPython.noop),
+    ]
@@ -26,11 +26,57 @@ class Review(models.Model):
         ordering = ['-created_at']
         # Prevent spam: One review per product per user
         unique_together = ('user', 'product')
+        indexes = [
+            # Keyset pages of a product's reviews, per listing order (reviews.listing)
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_newest_idx'),
+            models.Index(fields=['product', '-helpful_count', '-id'], name='review_product_helpful_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rating as loaded, so rating aggregates can apply an edit as a delta
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the change; later saves diff against this
+        self._loaded_rating = self.rating
 
     def __str__(self):
         return f"{self.rating}★ - {self.product.name}"
 
 
+class ProductRatingStats(models.Model):
+    """
+    Running rating aggregates per product: sum, count and a per-star
+    histogram. reviews.signals applies each review change as F() deltas and
+    reviews.tasks.reconcile_rating_stats recomputes them from Review.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    stars_1 = models.IntegerField(default=0)
+    stars_2 = models.IntegerField(default=0)
+    stars_3 = models.IntegerField(default=0)
+    stars_4 = models.IntegerField(default=0)
+    stars_5 = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def average(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @property
+    def histogram(self):
+        """{5: n, 4: n, ..., 1: n}"""
+        return {star: getattr(self, f'stars_{star}') for star in range(5, 0, -1)}
+
+    def __str__(self):
+        return f"Rating stats for product {self.product_id}"
+
+
 class ReviewImage(models.Model):
     """
     Allow users to upload multiple images for a single review.
@@ -0,0 +1,97 @@
+"""
+Product rating aggregates.
+
+A review change touches two rows, with no scan of the product's reviews: the
+ProductRatingStats deltas, then Product.rating/review_count copied from the
+stats row in the same UPDATE. Product is written with a queryset update, so
+its save() signals (SEO metadata, search indexing) don't fire for a rating.
+reconcile() recomputes everything from Review to correct drift.
+"""
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from catalog.models import Product
+from .models import ProductRatingStats, Review
+
+logger = logging.getLogger(__name__)
+
+STAR_FIELDS = {star: f'stars_{star}' for star in range(1, 6)}
+
+
+def rating_deltas(removed=None, added=None):
+    """Field deltas for replacing a `removed` rating with an `added` one (either may be None)"""
+    deltas = Counter()
+    if removed is not None:
+        deltas['rating_sum'] -= removed
+        deltas['rating_count'] -= 1
+        deltas[STAR_FIELDS[removed]] -= 1
+    if added is not None:
+        deltas['rating_sum'] += added
+        deltas['rating_count'] += 1
+        deltas[STAR_FIELDS[added]] += 1
+    return {field: delta for field, delta in deltas.items() if delta}
+
+
+def apply_rating_change(product_id, removed=None, added=None):
+    deltas = rating_deltas(removed, added)
+    if not deltas:
+        return
+    with transaction.atomic():
+        ProductRatingStats.objects.bulk_create([ProductRatingStats(product_id=product_id)], ignore_conflicts=True)
+        ProductRatingStats.objects.filter(product_id=product_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        sync_products(Product.objects.filter(pk=product_id))
+
+
+def sync_products(products):
+    """Copy average and count from ProductRatingStats onto Product.rating/review_count in one UPDATE"""
+    stats = ProductRatingStats.objects.filter(product_id=OuterRef('pk'))
+    average = Case(
+        When(rating_count__gt=0, then=Cast(F('rating_sum') * 1.0 / F('rating_count'), DecimalField(max_digits=3, decimal_places=2))),
+        default=Value(0),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+    products.update(
+        rating=Coalesce(Subquery(stats.annotate(average=average).values('average')[:1]), Value(0), output_field=DecimalField(max_digits=3, decimal_places=2)),
+        review_count=Coalesce(Subquery(stats.values('rating_count')[:1]), Value(0)),
+    )
+
+
+def reconcile():
+    """Recompute ProductRatingStats from Review; rows that differ are rewritten and their products re-synced"""
+    fields = ['rating_sum', 'rating_count', *STAR_FIELDS.values()]
+    rows = Review.objects.values('product_id').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{field: Count('id', filter=Q(rating=star)) for star, field in STAR_FIELDS.items()},
+    ).order_by()
+    actual = {row.pop('product_id'): row for row in rows}
+
+    with transaction.atomic():
+        stored = {stats.product_id: stats for stats in ProductRatingStats.objects.select_for_update()}
+        changed = []
+        for product_id, stats in stored.items():
+            expected = actual.get(product_id) or dict.fromkeys(fields, 0)
+            if any(getattr(stats, field) != expected[field] for field in fields):
+                for field in fields:
+                    setattr(stats, field, expected[field])
+                changed.append(stats)
+        ProductRatingStats.objects.bulk_update(changed, fields, batch_size=1000)
+        missing = [
+            ProductRatingStats(product_id=product_id, **values)
+            for product_id, values in actual.items() if product_id not in stored
+        ]
+        ProductRatingStats.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+
+        product_ids = [stats.product_id for stats in changed + missing]
+        for start in range(0, len(product_ids), 1000):
+            sync_products(Product.objects.filter(pk__in=product_ids[start:start + 1000]))
+
+    if changed:
+        logger.warning(f"Product rating stats corrected for {len(changed)} products")
+    return {'updated': len(changed), 'created': len(missing)}
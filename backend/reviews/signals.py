@@ -1,25 +1,21 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg, Count
 from .models import Review
-from catalog.models import Product
+from .listing import invalidate_first_pages
+from .rating_stats import apply_rating_change
 
-@receiver([post_save, post_delete], sender=Review)
-def update_product_rating(sender, instance, **kwargs):
+@receiver(post_save, sender=Review)
+def update_product_rating(sender, instance, created, **kwargs):
     """
-    When a review is added or deleted, recalculate the 
-    Product's average rating and store it.
+    Apply a new or edited review to the product's running rating aggregates
+    (ProductRatingStats and Product.rating/review_count) as deltas.
     """
-    product = instance.product
-    
-    # Calculate Aggregates
-    aggregates = Review.objects.filter(product=product).aggregate(
-        avg_rating=Avg('rating'),
-        count=Count('id')
-    )
-    
-    # Ideally, add 'rating' and 'review_count' to Product model in catalog app.
-    if hasattr(product, 'rating') and hasattr(product, 'review_count'):
-        product.rating = aggregates['avg_rating'] or 0
-        product.review_count = aggregates['count'] or 0
-        product.save(update_fields=['rating', 'review_count'])
\ No newline at end of file
+    previous = None if created else getattr(instance, '_loaded_rating', None)
+    if previous != instance.rating:
+        apply_rating_change(instance.product_id, removed=previous, added=instance.rating)
+    invalidate_first_pages(instance.product.slug)
+
+@receiver(post_delete, sender=Review)
+def remove_product_rating(sender, instance, **kwargs):
+    apply_rating_change(instance.product_id, removed=getattr(instance, '_loaded_rating', instance.rating))
+    invalidate_first_pages(instance.product.slug)
@@ -0,0 +1,12 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def reconcile_rating_stats():
+    """Recompute product rating aggregates from reviews to correct any drift"""
+    from .rating_stats import reconcile
+    stats = reconcile()
+    logger.info(f"Rating stats reconciliation: {stats}")
+    return f"Rating stats: {stats['updated']} corrected, {stats['created']} created"
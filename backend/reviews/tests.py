@@ -1,3 +1,175 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from catalog.models import Category, Product
+from seo.queue import drain as drain_seo_queue
+from .models import ProductRatingStats, Review, ReviewVote
+from .rating_stats import reconcile
+
+User = get_user_model()
+
+
+class ProductRatingStatsTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        self.product = Product.objects.create(
+            seller=seller, category=Category.objects.create(name='Screens', slug='screens'), name='Display',
+            sku='DSP-1', description='Display', price=100, stock_quantity=10, is_active=True
+        )
+        self.users = [User.objects.create_user(email=f'buyer{i}@example.com', password='pass12345') for i in range(3)]
+
+    def review(self, user, rating):
+        return Review.objects.create(user=user, product=self.product, rating=rating, comment='Fits')
+
+    def test_running_aggregates_follow_reviews(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        self.review(self.users[2], 3)
+
+        edited = Review.objects.get(pk=first.pk)
+        edited.rating = 1
+        edited.save()
+        Review.objects.get(user=self.users[1]).delete()
+
+        stats = ProductRatingStats.objects.get(product=self.product)
+        self.assertEqual((stats.rating_sum, stats.rating_count), (4, 2))
+        self.assertEqual(stats.histogram, {5: 0, 4: 0, 3: 1, 2: 0, 1: 1})
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating, self.product.review_count), (Decimal('2.00'), 2))
+
+    def test_review_does_not_save_product(self):
+        saves = []
+        receiver = lambda sender, **kwargs: saves.append(kwargs['instance'])
+        post_save.connect(receiver, sender=Product)
+        try:
+            self.review(self.users[0], 5)
+        finally:
+            post_save.disconnect(receiver, sender=Product)
+        self.assertEqual(saves, [])
+
+    def test_reconcile_corrects_drift(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        ProductRatingStats.objects.filter(product=self.product).update(rating_sum=40, stars_5=9)
+
+        self.assertEqual(reconcile()['updated'], 1)
+        stats = ProductRatingStats.objects.get(product=self.product)
+        self.assertEqual((stats.rating_sum, stats.stars_5, stats.stars_3), (8, 1, 1))
+
+    def test_product_page_includes_histogram_without_extra_queries(self):
+        unreviewed = Product.objects.create(
+            seller=self.product.seller, category=self.product.category, name='Battery',
+            sku='BAT-1', description='Battery', price=100, stock_quantity=10, is_active=True
+        )
+        self.review(self.users[0], 4)
+        drain_seo_queue()
+
+        def product_page(product):
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = APIClient().get(f'/api/catalog/products/{product.slug}/')
+            return response, [q['sql'] for q in ctx.captured_queries]
+
+        product_page(unreviewed)  # Warm the content type cache
+        response, queries = product_page(self.product)
+        self.assertEqual(response.data['rating_histogram'], {5: 0, 4: 1, 3: 0, 2: 0, 1: 0})
+        # The stats row is joined into the product query, never fetched on its own
+        self.assertFalse([sql for sql in queries if sql.startswith('SELECT') and
+                          'FROM "reviews_productratingstats"' in sql])
+        empty_response, empty_queries = product_page(unreviewed)
+        self.assertEqual(empty_response.data['rating_histogram'], {5: 0, 4: 0, 3: 0, 2: 0, 1: 0})
+        self.assertEqual(len(queries), len(empty_queries))
+
+
+class ReviewListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        self.product = Product.objects.create(
+            seller=seller, category=Category.objects.create(name='Batteries', slug='batteries'), name='Battery',
+            sku='BAT-1', description='Battery', price=100, stock_quantity=10, is_active=True
+        )
+        self.reviews = [
+            Review.objects.create(
+                user=User.objects.create_user(email=f'reviewer{i}@example.com', password='pass12345'),
+                product=self.product, rating=4, comment=f'Review {i}'
+            )
+            for i in range(3)
+        ]
+        self.voter = User.objects.create_user(email='voter@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.voter)
+
+    def vote(self, review):
+        return self.client.post(f'/api/reviews/{review.id}/helpful/').data
+
+    def list_ids(self, query=''):
+        response = self.client.get(f'/api/reviews/?product_slug={self.product.slug}{query}')
+        return [r['id'] for r in response.data['results']], response.data['pagination']
+
+    def test_vote_toggles_counter_without_saving_review(self):
+        review = self.reviews[0]
+        updated_at = Review.objects.get(pk=review.pk).updated_at
+
+        self.assertEqual(self.vote(review), {'status': 'success', 'action': 'added', 'count': 1})
+        self.assertEqual(self.vote(review), {'status': 'success', 'action': 'removed', 'count': 0})
+        self.assertEqual(self.vote(review)['count'], 1)
+
+        review.refresh_from_db()
+        self.assertEqual((review.helpful_count, review.updated_at), (1, updated_at))
+        self.assertEqual(ReviewVote.objects.filter(review=review).count(), 1)
+
+    def test_most_helpful_ordering_and_cursor_pages(self):
+        Review.objects.filter(pk=self.reviews[1].pk).update(helpful_count=5)
+        Review.objects.filter(pk=self.reviews[0].pk).update(helpful_count=2)
+
+        ids, _ = self.list_ids('&ordering=helpful')
+        self.assertEqual(ids, [self.reviews[1].id, self.reviews[0].id, self.reviews[2].id])
+
+        first, pagination = self.list_ids('&page_size=2')
+        self.assertEqual(first, [self.reviews[2].id, self.reviews[1].id])
+        rest = self.client.get(pagination['next']).data['results']
+        self.assertEqual([r['id'] for r in rest], [self.reviews[0].id])
+
+    def test_helpful_pages_neither_skip_nor_repeat_under_votes(self):
+        self.reviews += [
+            Review.objects.create(
+                user=User.objects.create_user(email=f'reviewer{i}@example.com', password='pass12345'),
+                product=self.product, rating=4, comment=f'Review {i}'
+            )
+            for i in range(3, 5)
+        ]
+        newest = sorted(self.reviews, key=lambda r: r.id, reverse=True)
+
+        first, pagination = self.list_ids('&ordering=helpful&page_size=2')
+        self.assertEqual(first, [newest[0].id, newest[1].id])
+
+        # A review on a later page jumps to the top between requests
+        self.vote(newest[3])
+        second = self.client.get(pagination['next']).data
+        self.assertEqual([r['id'] for r in second['results']], [newest[2].id, newest[4].id])
+        self.assertIsNone(second['pagination']['next'])
+
+        back = self.client.get(second['pagination']['previous']).data['results']
+        self.assertEqual([r['id'] for r in back], [newest[0].id, newest[1].id])
+
+    def test_malformed_cursor_is_not_found(self):
+        response = self.client.get(f'/api/reviews/?product_slug={self.product.slug}&cursor=cD1hYmM%3D')
+        self.assertEqual(response.status_code, 404)
+
+    def test_first_page_cached_until_a_vote(self):
+        self.list_ids()
+        with self.assertNumQueries(0):
+            self.list_ids()
 
-# Create your tests here.
+        self.vote(self.reviews[0])
+        response = self.client.get(f'/api/reviews/?product_slug={self.product.slug}')
+        counts = {r['id']: r['helpful_count'] for r in response.data['results']}
+        self.assertEqual(counts[self.reviews[0].id], 1)
@@ -3,13 +3,19 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 
-from .models import Review, ReviewVote
+from .listing import ReviewCursorPagination, cached_first_page, ordering_param, toggle_helpful
+from .models import Review
 from .serializers import ReviewSerializer
-from orders.models import Order
+from orders.purchases import has_purchased
 from catalog.models import Product
 
 class ReviewListCreateView(generics.ListCreateAPIView):
+    """
+    GET ?product_slug=...&ordering=newest|helpful: cursor-paginated reviews,
+    first page per product served from cache.
+    """
     serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
     
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -24,6 +30,15 @@ class ReviewListCreateView(generics.ListCreateAPIView):
             queryset = queryset.filter(product__slug=product_slug)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        product_slug = request.query_params.get('product_slug')
+        # Only a product's plain first page is cached; cursor pages go to the index
+        if not product_slug or set(request.query_params) - {'product_slug', 'ordering'}:
+            return super().list(request, *args, **kwargs)
+        render = super().list
+        data = cached_first_page(product_slug, ordering_param(request), lambda: render(request, *args, **kwargs).data)
+        return Response(data)
+
     def perform_create(self, serializer):
         user = self.request.user
         product = serializer.validated_data['product']
@@ -33,12 +48,8 @@ class ReviewListCreateView(generics.ListCreateAPIView):
             raise ValidationError("You have already reviewed this product.")
 
         # 2. Verified Purchase Logic
-        # Check if user has a DELIVERED order containing this product
-        is_verified = Order.objects.filter(
-            user=user, 
-            items__product=product, 
-            status='DELIVERED'
-        ).exists()
+        # One lookup on the delivered purchases index
+        is_verified = has_purchased(user, product)
 
         serializer.save(user=user, is_verified_purchase=is_verified)
 
@@ -50,20 +61,6 @@ class MarkHelpfulView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        review = get_object_or_404(Review, id=pk)
-        user = request.user
-
-        vote, created = ReviewVote.objects.get_or_create(user=user, review=review)
-
-        if not created:
-            # If already voted, remove vote (Toggle)
-            vote.delete()
-            review.helpful_count = max(0, review.helpful_count - 1)
-            action = "removed"
-        else:
-            # Add vote
-            review.helpful_count += 1
-            action = "added"
-        
-        review.save()
-        return Response({"status": "success", "action": action, "count": review.helpful_count})
\ No newline at end of file
+        get_object_or_404(Review.objects.only('id'), id=pk)
+        action, count = toggle_helpful(request.user, pk)
+        return Response({"status": "success", "action": action, "count": count})
@@ -1,7 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Payout
-from .payout_service import RazorpayPayoutService
 
 @admin.register(Payout)
 class PayoutAdmin(admin.ModelAdmin):
@@ -62,46 +61,14 @@ class PayoutAdmin(admin.ModelAdmin):
             messages.error(request, 'Seller bank details are missing. Cannot process payout.')
             return redirect('..')
         
+        # Submission and status tracking run in the payout queue worker
+        payout.status = 'APPROVED'
+        payout.save(update_fields=['status', 'updated_at'])
         try:
-            payout_service = RazorpayPayoutService()
-            
-            # Step 1: Create contact if not exists
-            if not seller_profile.razorpay_contact_id:
-                contact_id = payout_service.create_contact(seller_profile)
-                seller_profile.razorpay_contact_id = contact_id
-                seller_profile.save()
-            
-            # Step 2: Create fund account if not exists
-            if not seller_profile.razorpay_fund_account_id:
-                bank_details = {
-                    'account_number': seller_profile.bank_account_number,
-                    'ifsc': seller_profile.bank_ifsc_code,
-                    'name': seller_profile.bank_account_holder_name or seller_profile.business_name
-                }
-                fund_account_id = payout_service.create_fund_account(
-                    seller_profile.razorpay_contact_id,
-                    bank_details
-                )
-                seller_profile.razorpay_fund_account_id = fund_account_id
-                seller_profile.save()
-            
-            # Step 3: Create payout
-            result = payout_service.create_payout(
-                seller_profile.razorpay_fund_account_id,
-                payout.amount,
-                payout.id
-            )
-            
-            if result['success']:
-                payout.status = 'PROCESSING'
-                payout.razorpay_payout_id = result['payout_id']
-                payout.utr_number = result.get('utr', '')
-                payout.save()
-                messages.success(request, f'Payout initiated successfully! Razorpay Payout ID: {result["payout_id"]}')
-            else:
-                messages.error(request, f'Payout failed: {result["error"]}')
-        
-        except Exception as e:
-            messages.error(request, f'Error processing payout: {str(e)}')
+            from .tasks import process_payout_queue
+            process_payout_queue.delay()
+        except Exception:
+            pass
+        messages.success(request, 'Payout approved and queued for transfer.')
         
         return redirect('..')
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class SellersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'sellers'
\ No newline at end of file
+    name = 'sellers'
+
+    def ready(self):
+        import sellers.signals
@@ -0,0 +1,143 @@
+"""
+Seller leaderboard.
+
+SellerStats holds each seller's delivered item count and revenue and their
+review rating sum and count. Deliveries arrive as deltas from the seller inbox
+counters (sellers.order_inbox), reviews from the Review signals here; both are
+F() updates on one row. rebuild_stats() recomputes everything nightly, with
+sales and reviews aggregated in separate queries so neither fans out the
+other. top_sellers() reads the table behind a short cache.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, FloatField, Sum
+
+from orders.models import OrderItem
+from reviews.models import Review
+from .models import SellerStats
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'sellers:top_sellers'
+
+MIN_DELIVERED_ITEMS = 10
+MIN_AVG_RATING = 4.5
+MIN_REVIEWS = 5
+LEADERBOARD_SIZE = 6
+
+
+def _adjust(seller_id, **deltas):
+    """Add deltas to one seller's row, creating it on first use"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        SellerStats.objects.bulk_create([SellerStats(seller_id=seller_id)], ignore_conflicts=True)
+        SellerStats.objects.filter(seller_id=seller_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def apply_delivery_changes(items, revenue):
+    """Per-seller delivered item and revenue deltas (see order_inbox.StatusChanges)"""
+    for seller_id in set(items) | set(revenue):
+        _adjust(seller_id, delivered_items=items.get(seller_id, 0), delivered_revenue=revenue.get(seller_id, 0))
+
+
+def apply_review_change(seller_id, rating_delta, count_delta):
+    if seller_id:
+        _adjust(seller_id, rating_sum=rating_delta, review_count=count_delta)
+
+
+def rebuild_stats():
+    """Recompute every seller's row from OrderItem and Review; only rows that differ are written"""
+    line_total = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    sales = OrderItem.objects.filter(
+        status=OrderItem.ItemStatus.DELIVERED, seller__isnull=False
+    ).values('seller_id').annotate(n=Count('id'), revenue=Sum(line_total)).order_by()
+    reviews = Review.objects.values(seller_id=F('product__seller_id')).annotate(
+        total=Sum('rating'), n=Count('id')
+    ).order_by()
+
+    actual = {}
+    for row in sales:
+        actual.setdefault(row['seller_id'], {})
+        actual[row['seller_id']].update(delivered_items=row['n'], delivered_revenue=row['revenue'] or 0)
+    for row in reviews:
+        actual.setdefault(row['seller_id'], {})
+        actual[row['seller_id']].update(rating_sum=row['total'] or 0, review_count=row['n'])
+
+    fields = ['delivered_items', 'delivered_revenue', 'rating_sum', 'review_count']
+    with transaction.atomic():
+        stored = {stats.seller_id: stats for stats in SellerStats.objects.select_for_update()}
+        changed = []
+        for seller_id, stats in stored.items():
+            expected = actual.get(seller_id, {})
+            values = {field: expected.get(field, 0) for field in fields}
+            if any(getattr(stats, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                changed.append(stats)
+        SellerStats.objects.bulk_update(changed, fields, batch_size=1000)
+        missing = [
+            SellerStats(seller_id=seller_id, **values)
+            for seller_id, values in actual.items() if seller_id not in stored
+        ]
+        SellerStats.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+
+    cache.delete(CACHE_KEY)
+    if changed:
+        logger.warning(f"Seller stats corrected for {len(changed)} sellers")
+    return {'updated': len(changed), 'created': len(missing)}
+
+
+def get_seller_badge(sales, rating):
+    """Determine seller badge based on performance"""
+    if sales >= 100 and rating >= 4.8:
+        return {'name': 'Top Seller', 'color': 'gold', 'icon': '👑'}
+    elif sales >= 50 and rating >= 4.5:
+        return {'name': 'Trusted Seller', 'color': 'blue', 'icon': '⭐'}
+    elif sales >= 25 and rating >= 4.0:
+        return {'name': 'Rising Star', 'color': 'green', 'icon': '🌟'}
+    else:
+        return {'name': 'Verified', 'color': 'gray', 'icon': '✓'}
+
+
+def compute_top_sellers():
+    avg_rating = ExpressionWrapper(F('rating_sum') * 1.0 / F('review_count'), output_field=FloatField())
+    leaders = SellerStats.objects.filter(
+        delivered_items__gte=MIN_DELIVERED_ITEMS,
+        review_count__gte=MIN_REVIEWS,
+        seller__is_active=True,
+        seller__role='SELLER',
+        seller__seller_profile__is_approved=True,
+    ).annotate(avg=avg_rating).filter(avg__gte=MIN_AVG_RATING).select_related(
+        'seller__seller_profile'
+    ).order_by('-delivered_items')[:LEADERBOARD_SIZE]
+
+    sellers_data = []
+    for stats in leaders:
+        profile = stats.seller.seller_profile
+        sellers_data.append({
+            'id': stats.seller_id,
+            'business_name': profile.business_name,
+            'city': profile.city or 'India',
+            'total_sales': stats.delivered_items,
+            'avg_rating': round(stats.avg, 1),
+            'total_reviews': stats.review_count,
+            'satisfaction_rate': min(100, round(stats.avg * 20, 0)),  # Convert 5-star to percentage
+            'badge': get_seller_badge(stats.delivered_items, stats.avg),
+        })
+    return sellers_data
+
+
+def top_sellers():
+    """Leaderboard for the homepage, cached for TOP_SELLERS_CACHE_SECONDS"""
+    sellers_data = cache.get(CACHE_KEY)
+    if sellers_data is None:
+        sellers_data = compute_top_sellers()
+        cache.set(CACHE_KEY, sellers_data, settings.TOP_SELLERS_CACHE_SECONDS)
+    return sellers_data
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0002_payout_order_payout_razorpay_payout_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def build_seller_order_counts(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    SellerOrderStatusCount = apps.get_model('sellers', 'SellerOrderStatusCount')
+
+    rows = OrderItem.objects.filter(seller__isnull=False).values('seller_id', 'status').annotate(n=Count('id')).order_by()
+    SellerOrderStatusCount.objects.bulk_create(
+        [SellerOrderStatusCount(seller_id=row['seller_id'], status=row['status'], count=row['n']) for row in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_backfill_seller_inbox'),
+        ('sellers', '0004_seller_order_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_seller_order_counts, migrations.RunPython.noop),
+    ]
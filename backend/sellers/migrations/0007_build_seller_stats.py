@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+
+def build_seller_stats(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Review = apps.get_model('reviews', 'Review')
+    SellerStats = apps.get_model('sellers', 'SellerStats')
+
+    line_total = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    stats = {}
+    sales = OrderItem.objects.filter(status='DELIVERED', seller__isnull=False).values('seller_id').annotate(
+        n=Count('id'), revenue=Sum(line_total)
+    ).order_by()
+    for row in sales:
+        stats.setdefault(row['seller_id'], {}).update(delivered_items=row['n'], delivered_revenue=row['revenue'] or 0)
+    reviews = Review.objects.values(seller_id=F('product__seller_id')).annotate(total=Sum('rating'), n=Count('id')).order_by()
+    for row in reviews:
+        stats.setdefault(row['seller_id'], {}).update(rating_sum=row['total'] or 0, review_count=row['n'])
+
+    SellerStats.objects.bulk_create(
+        [SellerStats(seller_id=seller_id, **values) for seller_id, values in stats.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_backfill_seller_inbox'),
+        ('reviews', '0001_initial'),
+        ('sellers', '0006_sellerstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_seller_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:00
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_in_flight_claims(apps, schema_editor):
+    # The claim time used to be carried by updated_at
+    Payout = apps.get_model('sellers', 'Payout')
+    Payout.objects.filter(status='PROCESSING', razorpay_payout_id__isnull=True).update(claimed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0007_build_seller_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a payout worker took it off the queue', null=True),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='submit_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='payout',
+            name='status',
+            field=models.CharField(choices=[('REQUESTED', 'Requested'), ('APPROVED', 'Approved'), ('PROCESSING', 'Processing'), ('PAID', 'Paid'), ('REJECTED', 'Rejected'), ('FAILED', 'Failed')], default='REQUESTED', max_length=20),
+        ),
+        migrations.RunPython(stamp_in_flight_claims, migrations.RunPython.noop),
+    ]
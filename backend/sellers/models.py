@@ -10,6 +10,7 @@ class Payout(models.Model):
         PROCESSING = 'PROCESSING', 'Processing'
         PAID = 'PAID', 'Paid'
         REJECTED = 'REJECTED', 'Rejected'
+        FAILED = 'FAILED', 'Failed'
 
     seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='payouts')
     order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='payouts', null=True, blank=True)
@@ -27,6 +28,9 @@ class Payout(models.Model):
     # Admin Fields
     transaction_reference = models.CharField(max_length=100, blank=True, help_text="Bank Ref ID after payment")
     admin_note = models.TextField(blank=True, help_text="Reason for rejection or notes")
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a payout worker took it off the queue")
+    submit_attempts = models.PositiveSmallIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -46,4 +50,48 @@ class Payout(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.seller.email} - {self.amount} ({self.status})"
\ No newline at end of file
+        return f"{self.seller.email} - {self.amount} ({self.status})"
+
+class SellerOrderStatusCount(models.Model):
+    """
+    Number of order items per (seller, item status), kept current by
+    sellers.order_inbox on every status change and rebuilt nightly, so the
+    seller inbox tabs never COUNT a seller's whole order history.
+    """
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='order_status_counts')
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('seller', 'status')
+
+    def __str__(self):
+        return f"{self.seller_id} {self.status}: {self.count}"
+
+
+class SellerStats(models.Model):
+    """
+    Leaderboard figures per seller, maintained by sellers.leaderboard from
+    delivery and review events and recomputed nightly. Delivered sales and
+    reviews are aggregated separately, so neither inflates the other.
+    """
+    seller = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='seller_stats'
+    )
+    delivered_items = models.IntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rating_sum = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-delivered_items']),
+        ]
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else 0
+
+    def __str__(self):
+        return f"Stats for seller {self.seller_id}"
@@ -0,0 +1,179 @@
+"""
+Seller order inbox.
+
+Sellers page through their order items newest first with a keyset cursor on
+(created_at, id) over the (seller, [status,] -created_at, -id) indexes, so a
+page costs the same for a seller with ten items as for one with a hundred
+thousand. The per-status tab counts come from SellerOrderStatusCount, which is
+adjusted by the delta of every status change (OrderItem.save and the bulk
+paths that change item statuses) and rebuilt nightly from OrderItem to
+correct any drift. The same changes feed delivered sales into SellerStats.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.pagination import NewestFirstCursorPagination
+from orders.models import OrderItem
+from .models import SellerOrderStatusCount
+
+logger = logging.getLogger(__name__)
+
+
+class SellerInboxPagination(NewestFirstCursorPagination):
+    page_size = 25
+
+
+# --- Counters ---
+
+class StatusChanges:
+    """Item count deltas per (seller_id, status), plus delivered item/revenue deltas per seller for SellerStats"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.delivered_items = Counter()
+        self.delivered_revenue = Counter()
+
+    def add(self, seller_id, status, items, revenue):
+        self.counts[(seller_id, status)] += items
+        if status == OrderItem.ItemStatus.DELIVERED:
+            self.delivered_items[seller_id] += items
+            self.delivered_revenue[seller_id] += revenue
+
+
+def _line_total(item):
+    return (item.price or 0) * item.quantity
+
+
+def take_count_changes(items):
+    """
+    Changes for items whose seller or status changed since they were loaded
+    (new items count as +1). The loaded state is reset, so the same change is
+    never counted twice.
+    """
+    changes = StatusChanges()
+    for item in items:
+        old = (getattr(item, '_loaded_seller_id', None), getattr(item, '_loaded_status', None))
+        new = (item.seller_id, item.status)
+        if old == new:
+            continue
+        if old[0] is not None and old[1] is not None:
+            changes.add(*old, -1, -_line_total(item))
+        if new[0] is not None:
+            changes.add(*new, 1, _line_total(item))
+        item._loaded_seller_id, item._loaded_status = new
+    return changes
+
+
+def apply_count_changes(changes):
+    from .leaderboard import apply_delivery_changes
+
+    counts = {key: delta for key, delta in changes.counts.items() if delta}
+    if not counts and not any(changes.delivered_revenue.values()):
+        return
+    with transaction.atomic():
+        if counts:
+            SellerOrderStatusCount.objects.bulk_create(
+                [SellerOrderStatusCount(seller_id=seller_id, status=status) for seller_id, status in counts],
+                ignore_conflicts=True,
+            )
+            for (seller_id, status), delta in counts.items():
+                SellerOrderStatusCount.objects.filter(seller_id=seller_id, status=status).update(count=F('count') + delta)
+        apply_delivery_changes(changes.delivered_items, changes.delivered_revenue)
+
+
+def queryset_count_changes(items, new_status):
+    """Changes for moving every item in `items` (a queryset) to `new_status`, before a queryset .update()"""
+    changes = StatusChanges()
+    rows = items.exclude(status=new_status).exclude(seller__isnull=True).values('seller_id', 'status').annotate(
+        n=Count('id'), revenue=Sum(F('price') * F('quantity'))
+    )
+    for row in rows:
+        changes.add(row['seller_id'], row['status'], -row['n'], -(row['revenue'] or 0))
+        changes.add(row['seller_id'], new_status, row['n'], row['revenue'] or 0)
+    return changes
+
+
+def rebuild_counts(seller_ids=None):
+    """Recompute counters from OrderItem; only rows that differ are written"""
+    items = OrderItem.objects.filter(seller__isnull=False)
+    counters = SellerOrderStatusCount.objects.all()
+    if seller_ids is not None:
+        items = items.filter(seller_id__in=seller_ids)
+        counters = counters.filter(seller_id__in=seller_ids)
+
+    actual = {
+        (row['seller_id'], row['status']): row['n']
+        for row in items.values('seller_id', 'status').annotate(n=Count('id')).order_by()
+    }
+    with transaction.atomic():
+        stored = {(c.seller_id, c.status): c for c in counters.select_for_update()}
+        changed = []
+        for key, counter in stored.items():
+            expected = actual.get(key, 0)
+            if counter.count != expected:
+                counter.count = expected
+                changed.append(counter)
+        SellerOrderStatusCount.objects.bulk_update(changed, ['count'], batch_size=1000)
+        missing = [
+            SellerOrderStatusCount(seller_id=seller_id, status=status, count=n)
+            for (seller_id, status), n in actual.items() if (seller_id, status) not in stored
+        ]
+        SellerOrderStatusCount.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+
+    if changed or missing:
+        logger.warning(f"Seller order counters corrected: {len(changed)} updated, {len(missing)} created")
+    return {'updated': len(changed), 'created': len(missing)}
+
+
+def status_counts(seller):
+    counts = dict(SellerOrderStatusCount.objects.filter(seller=seller).values_list('status', 'count'))
+    counts = {status: counts.get(status, 0) for status in OrderItem.ItemStatus.values}
+    counts['ALL'] = sum(counts.values())
+    return counts
+
+
+# --- Inbox ---
+
+def _day_bound(value, end=False):
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        # Well formed but impossible (2024-02-30): ignored like any unparseable date
+        day = None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.max if end else time.min))
+
+
+def inbox_queryset(seller, params):
+    """Seller's items newest first, filtered by ?status=A,B&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD"""
+    items = OrderItem.objects.filter(seller=seller).select_related('order')
+    statuses = [s for s in params.get('status', '').upper().split(',') if s in OrderItem.ItemStatus.values]
+    if statuses:
+        items = items.filter(status__in=statuses)
+    date_from = _day_bound(params.get('date_from'))
+    if date_from:
+        items = items.filter(created_at__gte=date_from)
+    date_to = _day_bound(params.get('date_to'), end=True)
+    if date_to:
+        items = items.filter(created_at__lte=date_to)
+    return items
+
+
+def inbox_row(item):
+    return {
+        'id': str(item.id),
+        'order_id': item.order.order_id,
+        'order_date': item.created_at,
+        'product_name': item.product_name,
+        'quantity': item.quantity,
+        'price': str(item.price),
+        'status': item.status,
+        'customer_name': item.customer_name,
+    }
@@ -0,0 +1,322 @@
+"""
+Payout queue for wallet withdrawals and seller payouts.
+
+Withdrawals in REQUESTED and payouts in APPROVED are the queue. A worker
+claims a batch (moving it to PROCESSING), makes sure each seller has a
+Razorpay contact and fund account, and submits the transfers on a bounded
+thread pool, one thread per seller. A reconciliation job fetches the status
+of in-flight transfers in batches and settles them with bulk_update.
+
+Each transfer is created with a stable reference (payout_<id> or
+withdrawal_<id>) that is also its idempotency key. A submission Razorpay
+rejected outright is retried on later runs up to PAYOUT_MAX_SUBMIT_ATTEMPTS
+times (a withdrawal fails and is refunded at once). A timeout or server error
+may have come after the transfer went out, so that row stays PROCESSING with
+no payout id, the same as a row whose worker died mid-claim. Once such a row
+is PAYOUT_CLAIM_TIMEOUT_MINUTES old, reconciliation looks its reference up:
+a transfer found is tracked like any other, and only a row Razorpay has no
+transfer for goes back on the queue.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import SellerProfile
+from wallet.models import Withdrawal
+from wallet.services import WalletService
+from .models import Payout
+from .payout_service import RazorpayPayoutService
+
+logger = logging.getLogger(__name__)
+
+SETTLED_OK = {'processed'}
+SETTLED_FAILED = {'reversed', 'cancelled', 'rejected', 'failed'}
+
+
+def payout_reference(row):
+    """Razorpay reference_id and idempotency key for a withdrawal or payout"""
+    return f"{'withdrawal' if isinstance(row, Withdrawal) else 'payout'}_{row.id}"
+
+
+def replace_note(note, prefix, line):
+    """`note` with any earlier line starting with `prefix` replaced by `line`, so retries don't pile up"""
+    kept = [existing for existing in (note or '').splitlines() if not existing.startswith(prefix)]
+    return '\n'.join(kept + [line]).strip()
+
+
+class PayoutQueue:
+    def __init__(self, service=None, concurrency=None, batch_size=None):
+        self.service = service or RazorpayPayoutService()
+        self.concurrency = concurrency or settings.PAYOUT_CONCURRENCY
+        self.batch_size = batch_size or settings.PAYOUT_BATCH_SIZE
+
+    # --- Submission ---
+
+    def submit_pending(self):
+        stats = {'submitted': 0, 'failed': 0, 'unconfirmed': 0}
+        withdrawals, payouts = self._claim()
+        if not withdrawals and not payouts:
+            return stats
+
+        # Group by seller so contact/fund-account setup never races itself
+        jobs = {}
+        for withdrawal in withdrawals:
+            jobs.setdefault(withdrawal.wallet.user_id, []).append(withdrawal)
+        for payout in payouts:
+            jobs.setdefault(payout.seller_id, []).append(payout)
+
+        # Worker threads only talk to Razorpay; all DB reads/writes stay on this thread
+        profiles = SellerProfile.objects.select_related('user').in_bulk(list(jobs), field_name='user_id')
+        work = [(profiles.get(seller_id), rows) for seller_id, rows in jobs.items()]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(work)))) as pool:
+            list(pool.map(lambda job: self._submit_seller(*job), work))
+
+        SellerProfile.objects.bulk_update(
+            [p for p in profiles.values() if p.razorpay_contact_id],
+            ['razorpay_contact_id', 'razorpay_fund_account_id']
+        )
+        self._save_results(withdrawals, payouts)
+        for row in withdrawals + payouts:
+            if row.razorpay_payout_id:
+                stats['submitted'] += 1
+            else:
+                stats['unconfirmed' if getattr(row, 'unconfirmed', None) else 'failed'] += 1
+        return stats
+
+    def _claim(self):
+        """Move one batch of queued rows to PROCESSING so no other worker takes them"""
+        with transaction.atomic():
+            withdrawals = list(
+                Withdrawal.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(status='REQUESTED').select_related('wallet__user').order_by('id')[:self.batch_size]
+            )
+            payouts = list(
+                Payout.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(status='APPROVED', razorpay_payout_id__isnull=True).order_by('id')[:self.batch_size]
+            )
+            now = timezone.now()
+            Withdrawal.objects.filter(id__in=[w.id for w in withdrawals]).update(status='PROCESSING', claimed_at=now)
+            Payout.objects.filter(id__in=[p.id for p in payouts]).update(
+                status='PROCESSING', claimed_at=now, updated_at=now
+            )
+        for row in withdrawals + payouts:
+            row.status, row.claimed_at = 'PROCESSING', now
+        return withdrawals, payouts
+
+    def _submit_seller(self, profile, rows):
+        try:
+            fund_account_id = self._fund_account(profile)
+        except Exception as e:
+            for row in rows:
+                row.failure = f"Fund account setup failed: {e}"
+            return
+
+        for row in rows:
+            result = self.service.create_payout(fund_account_id, row.amount, row.id, reference_id=payout_reference(row))
+            if result['success']:
+                self._attach(row, result)
+            elif result.get('ambiguous'):
+                row.unconfirmed = result.get('error', 'No response')
+            else:
+                row.failure = result.get('error', 'Payout failed')
+
+    @staticmethod
+    def _attach(row, result):
+        row.razorpay_payout_id = result['payout_id']
+        row.utr_number = result.get('utr') or ''
+        row.remote_status = result.get('status')
+
+    def _fund_account(self, profile):
+        if profile is None:
+            raise ValueError("Seller profile not found")
+        if not profile.bank_account_number or not profile.bank_ifsc_code:
+            raise ValueError("Bank details missing")
+
+        if not profile.razorpay_contact_id:
+            profile.razorpay_contact_id = self.service.create_contact(profile)
+        if not profile.razorpay_fund_account_id:
+            profile.razorpay_fund_account_id = self.service.create_fund_account(
+                profile.razorpay_contact_id,
+                {
+                    'account_number': profile.bank_account_number,
+                    'ifsc': profile.bank_ifsc_code,
+                    'name': profile.bank_account_holder_name or profile.business_name
+                }
+            )
+        return profile.razorpay_fund_account_id
+
+    def _save_results(self, withdrawals, payouts):
+        now = timezone.now()
+        failed_withdrawals = []
+        for withdrawal in withdrawals:
+            if getattr(withdrawal, 'failure', None):
+                withdrawal.status = 'FAILED'
+                withdrawal.rejection_reason = withdrawal.failure
+                withdrawal.processed_at = now
+                failed_withdrawals.append(withdrawal)
+            elif getattr(withdrawal, 'remote_status', None) in SETTLED_OK:
+                withdrawal.status = 'COMPLETED'
+                withdrawal.processed_at = now
+
+        max_attempts = settings.PAYOUT_MAX_SUBMIT_ATTEMPTS
+        for payout in payouts:
+            if getattr(payout, 'failure', None):
+                payout.submit_attempts += 1
+                # Back to the queue for the next run until the attempts run out
+                payout.status = 'APPROVED' if payout.submit_attempts < max_attempts else 'FAILED'
+                payout.admin_note = replace_note(
+                    payout.admin_note, 'Submission failed',
+                    f"Submission failed ({payout.submit_attempts}/{max_attempts}): {payout.failure}"
+                )
+            elif getattr(payout, 'unconfirmed', None):
+                # Stays PROCESSING; reconcile() looks the reference up before any resubmission
+                payout.admin_note = replace_note(
+                    payout.admin_note, 'Submission unconfirmed', f"Submission unconfirmed: {payout.unconfirmed}"
+                )
+            elif getattr(payout, 'remote_status', None) in SETTLED_OK:
+                payout.status = 'PAID'
+
+        with transaction.atomic():
+            Withdrawal.objects.bulk_update(
+                withdrawals, ['status', 'razorpay_payout_id', 'utr_number', 'rejection_reason', 'processed_at']
+            )
+            Payout.objects.bulk_update(
+                payouts, ['status', 'razorpay_payout_id', 'utr_number', 'admin_note', 'submit_attempts']
+            )
+            self._refund(failed_withdrawals)
+
+    # --- Reconciliation ---
+
+    def reconcile(self, stale_after=None):
+        """Fetch statuses of in-flight transfers in batches and settle them"""
+        stats = {'checked': 0, 'completed': 0, 'failed': 0}
+        self._recover_stale_claims(stale_after)
+
+        for model in (Withdrawal, Payout):
+            in_flight = model.objects.filter(
+                status='PROCESSING', razorpay_payout_id__isnull=False
+            ).exclude(razorpay_payout_id='').order_by('id')
+            if model is Withdrawal:
+                in_flight = in_flight.select_related('wallet__user')
+
+            last_id = 0
+            while True:
+                batch = list(in_flight.filter(id__gt=last_id)[:self.batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                completed, failed = self._reconcile_batch(model, batch)
+                stats['checked'] += len(batch)
+                stats['completed'] += completed
+                stats['failed'] += failed
+        return stats
+
+    def _reconcile_batch(self, model, rows):
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(rows)))) as pool:
+            statuses = list(pool.map(lambda row: self.service.get_payout_status(row.razorpay_payout_id), rows))
+
+        now = timezone.now()
+        changed, failed_withdrawals = [], []
+        completed = failed = 0
+        for row, remote in zip(rows, statuses):
+            state = remote.get('status')
+            if state in SETTLED_OK:
+                row.status = 'COMPLETED' if model is Withdrawal else 'PAID'
+                row.utr_number = remote.get('utr') or row.utr_number
+                completed += 1
+            elif state in SETTLED_FAILED:
+                reason = remote.get('failure_reason') or state
+                if model is Withdrawal:
+                    row.status = 'FAILED'
+                    row.rejection_reason = reason
+                    failed_withdrawals.append(row)
+                else:
+                    row.status = 'REJECTED'
+                    row.admin_note = f"{row.admin_note}\nRazorpay {state}: {reason}".strip()
+                failed += 1
+            else:
+                continue
+            if model is Withdrawal:
+                row.processed_at = now
+            changed.append(row)
+
+        if changed:
+            fields = (
+                ['status', 'utr_number', 'rejection_reason', 'processed_at'] if model is Withdrawal
+                else ['status', 'utr_number', 'admin_note']
+            )
+            with transaction.atomic():
+                model.objects.bulk_update(changed, fields)
+                self._refund(failed_withdrawals)
+        return completed, failed
+
+    def _recover_stale_claims(self, stale_after=None):
+        """
+        Resolve rows claimed long ago that have no payout id: the worker died,
+        or Razorpay's answer was lost. Each reference is looked up first, so a
+        transfer that did go out is tracked rather than sent again.
+        """
+        cutoff = timezone.now() - (stale_after or timedelta(minutes=settings.PAYOUT_CLAIM_TIMEOUT_MINUTES))
+        stale = list(
+            Withdrawal.objects.filter(status='PROCESSING', razorpay_payout_id='', claimed_at__lt=cutoff)
+        ) + list(
+            Payout.objects.filter(status='PROCESSING', razorpay_payout_id__isnull=True, claimed_at__lt=cutoff)
+        )
+        if not stale:
+            return
+
+        def lookup(row):
+            try:
+                return self.service.find_payout(payout_reference(row))
+            except Exception as e:
+                logger.error(f"Payout lookup failed for {payout_reference(row)}, retrying next run: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(stale)))) as pool:
+            found = list(pool.map(lookup, stale))
+
+        tracked, requeued = [], []
+        for row, result in zip(stale, found):
+            if result:
+                self._attach(row, result)
+                tracked.append(row)
+            elif result is None:
+                row.status = 'REQUESTED' if isinstance(row, Withdrawal) else 'APPROVED'
+                row.claimed_at = None
+                requeued.append(row)
+
+        with transaction.atomic():
+            for model in (Withdrawal, Payout):
+                model.objects.bulk_update(
+                    [row for row in tracked if isinstance(row, model)], ['razorpay_payout_id', 'utr_number']
+                )
+                model.objects.bulk_update(
+                    [row for row in requeued if isinstance(row, model)], ['status', 'claimed_at']
+                )
+        if tracked or requeued:
+            logger.warning(
+                f"Stale payout claims: {len(tracked)} found at Razorpay, {len(requeued)} requeued"
+            )
+
+    @staticmethod
+    def _refund(withdrawals):
+        """Credit failed withdrawals back to their wallets in one posting"""
+        if not withdrawals:
+            return
+        WalletService.post_entries([
+            {
+                'user': withdrawal.wallet.user,
+                'amount': withdrawal.amount,
+                'transaction_type': 'CREDIT',
+                'source': 'ADJUSTMENT',
+                'withdrawal': withdrawal,
+                'description': f'Withdrawal failed - refund for request #{withdrawal.id}',
+                'idempotency_key': f'withdrawal-refund:{withdrawal.id}',
+            }
+            for withdrawal in withdrawals
+        ])
@@ -1,19 +1,32 @@
 import razorpay
 from django.conf import settings
+from razorpay.errors import BadRequestError
+from core.http_client import get_client
 import logging
 
 logger = logging.getLogger(__name__)
 
+_payout_client = None
+
+
+def get_payout_client():
+    """RazorpayX client shared by every service instance in this process"""
+    global _payout_client
+    if _payout_client is None:
+        _payout_client = razorpay.Client(session=get_client('razorpayx'), auth=(
+            settings.RAZORPAY_PAYOUT_KEY_ID,
+            settings.RAZORPAY_PAYOUT_KEY_SECRET
+        ))
+    return _payout_client
+
+
 class RazorpayPayoutService:
     """
     Service to handle automatic payouts to seller bank accounts using Razorpay Payout API
     """
     
     def __init__(self):
-        self.client = razorpay.Client(auth=(
-            settings.RAZORPAY_PAYOUT_KEY_ID,
-            settings.RAZORPAY_PAYOUT_KEY_SECRET
-        ))
+        self.client = get_payout_client()
         self.account_number = settings.RAZORPAY_PAYOUT_ACCOUNT_NUMBER
     
     def create_contact(self, seller_profile):
@@ -59,12 +72,17 @@ class RazorpayPayoutService:
             logger.error(f"Failed to create fund account: {str(e)}")
             raise
     
-    def create_payout(self, fund_account_id, amount, payout_id, purpose="payout"):
+    def create_payout(self, fund_account_id, amount, payout_id, purpose="payout", reference_id=None):
         """
         Create a payout to seller's bank account
         amount: in rupees (will be converted to paise)
-        Returns: payout response with transaction details
+        reference_id: defaults to payout_<payout_id>; also sent as the
+        idempotency key, so a repeated request can't create a second transfer
+        Returns: payout response with transaction details. A failed call is
+        'ambiguous' unless Razorpay rejected it (400): a timeout or 5xx may
+        come after the transfer was accepted, so find_payout() must decide.
         """
+        reference_id = reference_id or f"payout_{payout_id}"
         try:
             # Convert rupees to paise (Razorpay uses paise)
             amount_in_paise = int(float(amount) * 100)
@@ -77,24 +95,38 @@ class RazorpayPayoutService:
                 "mode": "IMPS",  # IMPS, NEFT, RTGS, UPI
                 "purpose": purpose,
                 "queue_if_low_balance": True,
-                "reference_id": f"payout_{payout_id}",
+                "reference_id": reference_id,
                 "narration": f"Seller Payout #{payout_id}"
-            })
+            }, headers={"X-Payout-Idempotency": reference_id})
             
-            return {
-                'success': True,
-                'payout_id': payout['id'],
-                'status': payout['status'],
-                'utr': payout.get('utr', ''),
-                'reference_id': payout.get('reference_id', '')
-            }
+            return self._created(payout)
         except Exception as e:
             logger.error(f"Failed to create payout: {str(e)}")
             return {
                 'success': False,
+                'ambiguous': not isinstance(e, BadRequestError),
                 'error': str(e)
             }
     
+    def find_payout(self, reference_id):
+        """
+        The payout created with `reference_id`, in create_payout()'s shape, or
+        None if Razorpay has none. Raises when Razorpay can't be asked.
+        """
+        payouts = self.client.payout.all({"account_number": self.account_number, "reference_id": reference_id})
+        items = payouts.get('items') or []
+        return self._created(items[0]) if items else None
+    
+    @staticmethod
+    def _created(payout):
+        return {
+            'success': True,
+            'payout_id': payout['id'],
+            'status': payout['status'],
+            'utr': payout.get('utr', ''),
+            'reference_id': payout.get('reference_id', '')
+        }
+    
     def get_payout_status(self, razorpay_payout_id):
         """
         Check the status of a payout
@@ -0,0 +1,243 @@
+"""
+Periodic seller settlement.
+
+Replaces the per-order wallet signal and per-order ETA payout tasks: one run
+selects every delivered, paid and unsettled item past the return window,
+aggregates earnings per (seller, order) in SQL, posts all wallet entries in
+one ledger batch and creates the payouts with bulk_create. Idempotency keys
+on wallet transactions and payouts make a retried or overlapping run a no-op.
+
+A batch that fails (a locked wallet rejects the whole ledger posting) is
+retried seller by seller, each in its own savepoint. A seller whose wallet is
+locked or whose settlement fails keeps its items unsettled for the next run
+and is counted in stats['failed_sellers']. The other sellers still settle.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from accounts.models import SellerProfile
+from notifications.models import Notification
+from orders.models import OrderItem
+from wallet.services import WalletService
+from .models import Payout
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+MINIMUM_PAYOUT_AMOUNT = Decimal('100.00')
+
+
+def settlement_key(kind, order_id, seller_id):
+    return f"settle:{kind}:{order_id}:{seller_id}"
+
+
+class SettlementEngine:
+    def __init__(self, hold_days=None, batch_size=None):
+        self.hold_days = settings.SELLER_SETTLEMENT_HOLD_DAYS if hold_days is None else hold_days
+        self.batch_size = batch_size or settings.SELLER_SETTLEMENT_BATCH_SIZE
+
+    def eligible_items(self, order_ids=None):
+        cutoff = timezone.now() - timedelta(days=self.hold_days)
+        items = OrderItem.objects.filter(
+            status='DELIVERED',
+            settled_at__isnull=True,
+            seller__isnull=False,
+            order__payment_status=True,
+            order__delivered_at__lte=cutoff,
+        )
+        if order_ids is not None:
+            items = items.filter(order_id__in=order_ids)
+        return items
+
+    def earnings(self, items):
+        """One row per (order, seller) with the gross item value, summed in SQL"""
+        line_total = ExpressionWrapper(
+            F('price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+        return list(
+            items.values('order_id', 'seller_id', 'order__order_id')
+            .annotate(gross=Sum(line_total))
+            .order_by('order_id', 'seller_id')
+        )
+
+    def run(self, order_ids=None):
+        stats = {
+            'orders': 0, 'sellers': 0, 'credited': Decimal('0'), 'payouts': 0, 'skipped_payouts': 0,
+            'failed_sellers': 0,
+        }
+        items = self.eligible_items(order_ids)
+        rows = self.earnings(items)
+        if not rows:
+            return stats
+
+        admin = User.objects.filter(role='ADMIN', is_active=True).order_by('id').first()
+        seller_ids = {row['seller_id'] for row in rows}
+        sellers = User.objects.in_bulk(seller_ids)
+        profiles = {p.user_id: p for p in SellerProfile.objects.filter(user_id__in=seller_ids)}
+
+        settled_orders, failed_sellers = set(), set()
+        for batch in self._batches_by_order(rows):
+            try:
+                with transaction.atomic():
+                    result = self._settle_rows(batch, items, admin, sellers, profiles)
+                self._merge(stats, settled_orders, result)
+                continue
+            except Exception as e:
+                logger.warning(f"Settlement batch failed, retrying per seller: {e}")
+
+            for seller_id, seller_rows in self._rows_by_seller(batch).items():
+                try:
+                    with transaction.atomic():
+                        result = self._settle_rows(seller_rows, items, admin, sellers, profiles)
+                except Exception as e:
+                    logger.error(f"Settlement skipped for seller {seller_id}: {e}")
+                    failed_sellers.add(seller_id)
+                    continue
+                self._merge(stats, settled_orders, result)
+
+        stats['orders'] = len(settled_orders)
+        stats['sellers'] = len(seller_ids - failed_sellers)
+        stats['failed_sellers'] = len(failed_sellers)
+        return stats
+
+    @staticmethod
+    def _merge(stats, settled_orders, result):
+        settled_orders |= result['orders']
+        for key in ('credited', 'payouts', 'skipped_payouts'):
+            stats[key] += result[key]
+
+    @staticmethod
+    def _rows_by_seller(rows):
+        by_seller = {}
+        for row in rows:
+            by_seller.setdefault(row['seller_id'], []).append(row)
+        return by_seller
+
+    def _batches_by_order(self, rows):
+        """Chunks of rows that never split one order across two batches"""
+        batch, orders = [], set()
+        for row in rows:
+            if row['order_id'] not in orders and len(orders) >= self.batch_size:
+                yield batch
+                batch, orders = [], set()
+            batch.append(row)
+            orders.add(row['order_id'])
+        if batch:
+            yield batch
+
+    def _settle_rows(self, rows, items, admin, sellers, profiles):
+        """Post, pay out and mark settled the given (order, seller) rows; the caller owns the transaction"""
+        rate = Decimal(str(settings.PLATFORM_COMMISSION_RATE))
+        entries, payouts, notifications = [], [], []
+        result = {'orders': set(), 'credited': Decimal('0'), 'payouts': 0, 'skipped_payouts': 0}
+
+        for row in rows:
+            seller = sellers[row['seller_id']]
+            gross = row['gross'] or Decimal('0')
+            if gross <= 0:
+                continue
+            commission = (gross * rate).quantize(Decimal('0.01'))
+            seller_amount = gross - commission
+            order_ref = row['order__order_id']
+
+            entries.append({
+                'user': seller,
+                'amount': seller_amount,
+                'transaction_type': 'CREDIT',
+                'source': 'ORDER_PAYMENT',
+                'order_id': row['order_id'],
+                'description': f'Payment for order #{order_ref}',
+                'idempotency_key': settlement_key('payment', row['order_id'], seller.id),
+            })
+            if admin:
+                entries.append({
+                    'user': admin,
+                    'amount': commission,
+                    'transaction_type': 'CREDIT',
+                    'source': 'COMMISSION',
+                    'order_id': row['order_id'],
+                    'description': f'Commission from order #{order_ref}',
+                    'idempotency_key': settlement_key('commission', row['order_id'], seller.id),
+                })
+            result['credited'] += seller_amount
+
+            payout = self._build_payout(seller, profiles.get(seller.id), row, seller_amount, commission, notifications)
+            if payout:
+                payouts.append(payout)
+            else:
+                result['skipped_payouts'] += 1
+
+        WalletService.post_entries(entries)
+
+        keys = [p.idempotency_key for p in payouts]
+        existing = set(Payout.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True))
+        payouts = [p for p in payouts if p.idempotency_key not in existing]
+        # ignore_conflicts also covers unique_active_payout_per_order from older flows
+        Payout.objects.bulk_create(payouts, ignore_conflicts=True)
+        Notification.objects.bulk_create(notifications)
+
+        order_ids = {row['order_id'] for row in rows}
+        seller_ids = {row['seller_id'] for row in rows}
+        items.filter(order_id__in=order_ids, seller_id__in=seller_ids).update(settled_at=timezone.now())
+
+        result['orders'] = order_ids
+        result['payouts'] = len(payouts)
+        return result
+
+    @staticmethod
+    def _build_payout(seller, profile, row, amount, commission, notifications):
+        """Unsaved APPROVED payout, or None (with a notification) if not payable"""
+        order_ref = row['order__order_id']
+
+        if profile is None:
+            logger.error(f"Seller {seller.id} has no profile")
+            return None
+        if not profile.is_approved:
+            logger.warning(f"Seller {seller.id} not approved, skipping payout")
+            return None
+
+        if amount < MINIMUM_PAYOUT_AMOUNT:
+            notifications.append(Notification(
+                user=seller,
+                title='Payout Below Minimum',
+                message=f'Order #{order_ref} earnings (₹{amount}) below minimum threshold (₹{MINIMUM_PAYOUT_AMOUNT})',
+                notification_type='INFO',
+                target_url='/seller/payouts'
+            ))
+            return None
+
+        if not profile.bank_account_number or not profile.bank_ifsc_code:
+            logger.error(f"Seller {seller.id} missing bank details")
+            notifications.append(Notification(
+                user=seller,
+                title='Payout Failed - Missing Bank Details',
+                message=f'Please update your bank details to receive payout for order #{order_ref}',
+                notification_type='WARNING',
+                target_url='/seller/profile'
+            ))
+            return None
+
+        notifications.append(Notification(
+            user=seller,
+            title='Payout Approved',
+            message=f'₹{amount:.2f} approved for order #{order_ref}. Amount will be transferred within 2-3 business days.',
+            notification_type='SUCCESS',
+            target_url='/seller/payouts'
+        ))
+        return Payout(
+            seller=seller,
+            order_id=row['order_id'],
+            amount=amount,
+            status='APPROVED',
+            bank_details_snapshot=f"{profile.bank_account_holder_name}|{profile.bank_ifsc_code}|{profile.bank_name or 'N/A'}",
+            admin_note=f'Auto-approved after return window. Commission: ₹{commission:.2f}',
+            idempotency_key=settlement_key('payout', row['order_id'], seller.id),
+        )
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Review
+from .leaderboard import apply_review_change
+
+
+@receiver(post_save, sender=Review)
+def count_review_for_seller(sender, instance, created, **kwargs):
+    """Keep SellerStats rating sum/count in step with reviews on the seller's products"""
+    if created:
+        apply_review_change(instance.product.seller_id, instance.rating, 1)
+        return
+    previous = getattr(instance, '_loaded_rating', None)
+    if previous is not None and previous != instance.rating:
+        apply_review_change(instance.product.seller_id, instance.rating - previous, 0)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review_for_seller(sender, instance, **kwargs):
+    apply_review_change(instance.product.seller_id, -getattr(instance, '_loaded_rating', instance.rating), -1)
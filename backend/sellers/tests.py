@@ -1,3 +1,451 @@
+from datetime import timedelta
+from importlib import import_module
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from razorpay.errors import BadRequestError, ServerError
+from rest_framework.test import APIClient
+
+from catalog.models import Category, Product
+from orders.models import Order, OrderItem
+from wallet.models import Wallet, WalletTransaction, Withdrawal
+from wallet.services import WalletService
+from django.core.cache import cache
+
+from reviews.models import Review
+from . import leaderboard
+from .models import Payout, SellerOrderStatusCount, SellerStats
+from .order_inbox import rebuild_counts, status_counts
+from .payout_queue import PayoutQueue
+from .payout_service import RazorpayPayoutService
+from .settlement import SettlementEngine
+
+User = get_user_model()
+
+
+class SettlementTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass12345', role='ADMIN')
+        self.customer = User.objects.create_user(email='customer@example.com', password='pass12345')
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        profile = self.seller.seller_profile
+        profile.business_name = 'Test Business'
+        profile.bank_account_number = '1234567890'
+        profile.bank_ifsc_code = 'SBIN0001234'
+        profile.bank_account_holder_name = 'Test Seller'
+        profile.save()
+
+        category = Category.objects.create(name='Screens', slug='screens')
+        self.product = Product.objects.create(
+            seller=self.seller, category=category, name='Display', sku='DSP-1',
+            description='Display', price=100, stock_quantity=10
+        )
+
+    def _delivered_order(self, days_ago=8):
+        order = Order.objects.create(
+            user=self.customer, total_amount=200, shipping_address={},
+            status='DELIVERED', payment_status=True
+        )
+        for _ in range(2):
+            OrderItem.objects.create(order=order, product=self.product, product_name='Display', price=100, status='DELIVERED')
+        Order.objects.filter(pk=order.pk).update(delivered_at=timezone.now() - timedelta(days=days_ago))
+        return order
+
+    def test_settles_wallets_and_payouts_once(self):
+        order = self._delivered_order()
+
+        stats = SettlementEngine().run()
+        SettlementEngine().run()
+
+        self.assertEqual(stats['orders'], 1)
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('180.00'))
+        self.assertEqual(Wallet.objects.get(user=self.admin).balance, Decimal('20.00'))
+        payout = Payout.objects.get(seller=self.seller, order=order)
+        self.assertEqual((payout.amount, payout.status), (Decimal('180.00'), 'APPROVED'))
+        self.assertFalse(order.items.filter(settled_at__isnull=True).exists())
+
+    def test_items_inside_return_window_wait(self):
+        self._delivered_order(days_ago=2)
+
+        stats = SettlementEngine().run()
+
+        self.assertEqual(stats['orders'], 0)
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_retried_run_does_not_post_twice(self):
+        order = self._delivered_order()
+        SettlementEngine().run()
+        # A run that crashed after posting but before marking items settled
+        order.items.update(settled_at=None)
+
+        SettlementEngine().run()
+
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('180.00'))
+        self.assertEqual(WalletTransaction.objects.filter(order=order).count(), 2)
+        self.assertEqual(Payout.objects.filter(order=order).count(), 1)
+
+    def test_locked_wallet_only_skips_its_seller(self):
+        other = User.objects.create_user(email='locked@example.com', password='pass12345', role='SELLER')
+        product = Product.objects.create(
+            seller=other, category=self.product.category, name='Battery', sku='BAT-1',
+            description='Battery', price=100, stock_quantity=10
+        )
+        WalletService.get_or_create_wallet(other)
+        Wallet.objects.filter(user=other).update(is_locked=True)
+        order = self._delivered_order()
+        locked_item = OrderItem.objects.create(
+            order=order, product=product, product_name='Battery', price=100, status='DELIVERED'
+        )
+
+        stats = SettlementEngine().run()
+
+        self.assertEqual((stats['orders'], stats['sellers'], stats['failed_sellers']), (1, 1, 1))
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('180.00'))
+        self.assertEqual(Wallet.objects.get(user=other).balance, Decimal('0.00'))
+        self.assertTrue(Payout.objects.filter(seller=self.seller, order=order).exists())
+        locked_item.refresh_from_db()
+        self.assertIsNone(locked_item.settled_at)
+        self.assertFalse(order.items.filter(seller=self.seller, settled_at__isnull=True).exists())
+
+    def test_backfill_leaves_credited_unpaid_orders_for_the_engine(self):
+        backfill = import_module('orders.migrations.0008_backfill_settlement_state').backfill_settlement_state
+        credited, paid = self._delivered_order(), self._delivered_order()
+        # The old delivery signal credited both; the ETA task has only paid out one
+        for order in (credited, paid):
+            WalletService.credit_wallet(self.seller, Decimal('180.00'), 'ORDER_PAYMENT', order=order)
+            WalletService.credit_wallet(self.admin, Decimal('20.00'), 'COMMISSION', order=order)
+        Payout.objects.create(seller=self.seller, order=paid, amount=Decimal('180.00'), status='COMPLETED')
+
+        backfill(apps, None)
+        self.assertFalse(paid.items.filter(settled_at__isnull=True).exists())
+        self.assertFalse(credited.items.filter(settled_at__isnull=False).exists())
+
+        SettlementEngine().run()
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('360.00'))
+        self.assertEqual(Wallet.objects.get(user=self.admin).balance, Decimal('40.00'))
+        self.assertEqual(Payout.objects.get(order=credited).amount, Decimal('180.00'))
+        self.assertEqual(Payout.objects.filter(order=paid).count(), 1)
+
+    def test_settlement_query_count_is_flat(self):
+        def settle(orders):
+            for _ in range(orders):
+                self._delivered_order()
+            with CaptureQueriesContext(connection) as queries:
+                SettlementEngine().run()
+            return len(queries)
+
+        self.assertEqual(settle(1), settle(5))
+
+
+class FakeRazorpay:
+    """Local stand-in for razorpay.Client's contact, fund_account and payout resources"""
+
+    def __init__(self, failing_references=()):
+        self.failing_references = set(failing_references)
+        # Accepted by Razorpay, but the response never arrives
+        self.lost_references = set()
+        self.contacts_created = 0
+        self.payouts = {}
+        self.idempotency_keys = []
+        self.contact = SimpleNamespace(create=self._create_contact)
+        self.fund_account = SimpleNamespace(create=lambda data: {'id': f"fa_{data['contact_id']}"})
+        self.payout = SimpleNamespace(
+            create=self._create_payout, fetch=lambda payout_id: self.payouts[payout_id], all=self._list_payouts
+        )
+
+    def _create_contact(self, data):
+        self.contacts_created += 1
+        return {'id': f'cont_{self.contacts_created}'}
+
+    def _create_payout(self, data, headers=None):
+        self.idempotency_keys.append(headers['X-Payout-Idempotency'])
+        if data['reference_id'] in self.failing_references:
+            raise BadRequestError('Insufficient balance in account')
+        payout_id = f'pout_{len(self.payouts) + 1}'
+        self.payouts[payout_id] = {'id': payout_id, 'status': 'processing', 'reference_id': data['reference_id']}
+        if data['reference_id'] in self.lost_references:
+            raise ServerError('Gateway timeout')
+        return self.payouts[payout_id]
+
+    def _list_payouts(self, params):
+        return {'items': [p for p in self.payouts.values() if p['reference_id'] == params['reference_id']]}
+
+
+class PayoutQueueTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        profile = self.seller.seller_profile
+        profile.business_name = 'Test Business'
+        profile.bank_account_number = '1234567890'
+        profile.bank_ifsc_code = 'SBIN0001234'
+        profile.bank_account_holder_name = 'Test Seller'
+        profile.save()
+        WalletService.credit_wallet(self.seller, Decimal('1000.00'), 'ADJUSTMENT')
+
+        self.razorpay = FakeRazorpay()
+        service = RazorpayPayoutService()
+        service.client = self.razorpay
+        self.queue = PayoutQueue(service=service, concurrency=2)
+
+    def _withdrawal(self, amount='300.00'):
+        wallet = Wallet.objects.get(user=self.seller)
+        withdrawal = Withdrawal.objects.create(
+            wallet=wallet, amount=Decimal(amount), bank_account_number='1234567890',
+            bank_ifsc_code='SBIN0001234', bank_account_holder='Test Seller'
+        )
+        WalletService.debit_wallet(self.seller, withdrawal.amount, 'WITHDRAWAL', withdrawal=withdrawal)
+        return withdrawal
+
+    def test_submits_queue_with_one_fund_account_per_seller(self):
+        withdrawal = self._withdrawal()
+        payout = Payout.objects.create(seller=self.seller, amount=Decimal('150.00'), status='APPROVED')
+
+        stats = self.queue.submit_pending()
+
+        self.assertEqual(stats, {'submitted': 2, 'failed': 0, 'unconfirmed': 0})
+        self.assertEqual(self.razorpay.contacts_created, 1)
+        self.assertEqual(set(self.razorpay.idempotency_keys), {f'withdrawal_{withdrawal.id}', f'payout_{payout.id}'})
+        withdrawal.refresh_from_db()
+        payout.refresh_from_db()
+        self.assertEqual((withdrawal.status, payout.status), ('PROCESSING', 'PROCESSING'))
+        self.assertTrue(withdrawal.razorpay_payout_id and payout.razorpay_payout_id)
+        self.assertEqual(self.queue.submit_pending(), {'submitted': 0, 'failed': 0, 'unconfirmed': 0})
+
+    def test_failed_submission_refunds_withdrawal(self):
+        withdrawal = self._withdrawal()
+        self.razorpay.failing_references = {f'withdrawal_{withdrawal.id}'}
+
+        self.queue.submit_pending()
+
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, 'FAILED')
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('1000.00'))
+
+    def test_stale_claims_are_requeued(self):
+        withdrawal = self._withdrawal()
+        payout = Payout.objects.create(seller=self.seller, amount=Decimal('150.00'), status='APPROVED')
+        self.queue._claim()
+        # The worker died before submitting anything
+        past = timezone.now() - timedelta(hours=1)
+        Withdrawal.objects.filter(pk=withdrawal.pk).update(claimed_at=past)
+        Payout.objects.filter(pk=payout.pk).update(claimed_at=past)
+
+        self.queue.reconcile()
+
+        withdrawal.refresh_from_db()
+        payout.refresh_from_db()
+        self.assertEqual((withdrawal.status, payout.status), ('REQUESTED', 'APPROVED'))
+        self.assertEqual(self.queue.submit_pending(), {'submitted': 2, 'failed': 0, 'unconfirmed': 0})
+
+    def test_lost_response_is_looked_up_not_resubmitted(self):
+        withdrawal = self._withdrawal()
+        payout = Payout.objects.create(seller=self.seller, amount=Decimal('150.00'), status='APPROVED')
+        self.razorpay.lost_references = {f'withdrawal_{withdrawal.id}', f'payout_{payout.id}'}
+
+        self.assertEqual(self.queue.submit_pending(), {'submitted': 0, 'failed': 0, 'unconfirmed': 2})
+        withdrawal.refresh_from_db()
+        payout.refresh_from_db()
+        self.assertEqual((withdrawal.status, payout.status), ('PROCESSING', 'PROCESSING'))
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('700.00'))  # not refunded
+
+        past = timezone.now() - timedelta(hours=1)
+        Withdrawal.objects.filter(pk=withdrawal.pk).update(claimed_at=past)
+        Payout.objects.filter(pk=payout.pk).update(claimed_at=past)
+        self.queue.reconcile()
+
+        withdrawal.refresh_from_db()
+        payout.refresh_from_db()
+        self.assertEqual(
+            {withdrawal.razorpay_payout_id, payout.razorpay_payout_id}, set(self.razorpay.payouts)
+        )
+        self.assertEqual(self.queue.submit_pending()['submitted'], 0)
+        self.assertEqual(len(self.razorpay.payouts), 2)
+
+    def test_payout_fails_after_max_attempts_with_one_note(self):
+        payout = Payout.objects.create(seller=self.seller, amount=Decimal('150.00'), status='APPROVED', admin_note='Auto-approved')
+        self.razorpay.failing_references = {f'payout_{payout.id}'}
+
+        with self.settings(PAYOUT_MAX_SUBMIT_ATTEMPTS=3):
+            for _ in range(4):
+                self.queue.submit_pending()
+
+        payout.refresh_from_db()
+        self.assertEqual((payout.status, payout.submit_attempts), ('FAILED', 3))
+        self.assertEqual(
+            payout.admin_note, 'Auto-approved\nSubmission failed (3/3): Insufficient balance in account'
+        )
+
+    def test_reconcile_updates_statuses_in_batches(self):
+        reversed_withdrawal = self._withdrawal()
+        payouts = [Payout.objects.create(seller=self.seller, amount=Decimal('150.00'), status='APPROVED') for _ in range(3)]
+        self.queue.submit_pending()
+        for remote in self.razorpay.payouts.values():
+            remote['status'] = 'reversed' if remote['reference_id'].startswith('withdrawal') else 'processed'
+            remote['utr'] = 'UTR123'
+
+        self.queue.batch_size = 2
+        stats = self.queue.reconcile()
+        self.queue.reconcile()
+
+        self.assertEqual(stats, {'checked': 4, 'completed': 3, 'failed': 1})
+        self.assertEqual(Payout.objects.filter(id__in=[p.id for p in payouts], status='PAID').count(), 3)
+        reversed_withdrawal.refresh_from_db()
+        self.assertEqual(reversed_withdrawal.status, 'FAILED')
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('1000.00'))
+
+
+class SellerOrderInboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email='customer@example.com', password='pass12345', first_name='Asha', last_name='Rao'
+        )
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        category = Category.objects.create(name='Screens', slug='screens')
+        self.product = Product.objects.create(
+            seller=self.seller, category=category, name='Display', sku='DSP-1',
+            description='Display', price=100, stock_quantity=10
+        )
+        self.client.force_authenticate(self.seller)
+
+    def _order(self, items=1, status='PENDING'):
+        order = Order.objects.create(user=self.customer, total_amount=100 * items, shipping_address={})
+        for _ in range(items):
+            OrderItem.objects.create(order=order, product=self.product, product_name='Display', price=100, status=status)
+        return order
+
+    def test_counters_follow_status_changes(self):
+        order = self._order(items=2)
+        self._order(status='DELIVERED')
+        self.assertEqual(status_counts(self.seller)['PENDING'], 2)
+
+        item = order.items.first()
+        item.status = 'PROCESSING'
+        item.save()
+        order.status = 'SHIPPED'  # Synced down to both items by the order signal
+        order.save()
+
+        counts = status_counts(self.seller)
+        self.assertEqual((counts['PENDING'], counts['PROCESSING'], counts['SHIPPED']), (0, 0, 2))
+        self.assertEqual(counts['ALL'], 3)
+
+        order.items.first().delete()
+        self.assertEqual(status_counts(self.seller)['SHIPPED'], 1)
+
+    def test_rebuild_corrects_drift(self):
+        self._order(items=3)
+        SellerOrderStatusCount.objects.filter(seller=self.seller).update(count=10)
+        self.assertEqual(rebuild_counts()['updated'], 1)
+        self.assertEqual(status_counts(self.seller)['PENDING'], 3)
+
+    def test_inbox_pages_and_filters(self):
+        for _ in range(3):
+            self._order(items=10)
+        self._order(status='DELIVERED')
+
+        response = self.client.get('/api/sellers/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(response.data['results'][0]['status'], 'DELIVERED')
+        self.assertEqual(response.data['results'][0]['customer_name'], 'Asha Rao')
+        self.assertEqual(response.data['counts']['ALL'], 31)
+
+        second = self.client.get(response.data['pagination']['next'])
+        self.assertEqual(len(second.data['results']), 6)
+        seen = {row['id'] for row in response.data['results'] + second.data['results']}
+        self.assertEqual(len(seen), 31)
+
+        delivered = self.client.get('/api/sellers/orders/?status=delivered')
+        self.assertEqual(len(delivered.data['results']), 1)
+        future = (timezone.now() + timedelta(days=1)).date().isoformat()
+        self.assertEqual(self.client.get(f'/api/sellers/orders/?date_from={future}').data['results'], [])
+        impossible = self.client.get('/api/sellers/orders/?date_from=2024-02-30&date_to=2024-13-01')
+        self.assertEqual(impossible.status_code, 200)
+        self.assertEqual(len(impossible.data['results']), 25)
+
+
+class SellerLeaderboardTests(TestCase):
+    def setUp(self):
+        cache.delete(leaderboard.CACHE_KEY)
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        profile = self.seller.seller_profile
+        profile.business_name = 'Screen Masters'
+        profile.bank_account_number = '1234567890'
+        profile.bank_ifsc_code = 'SBIN0001234'
+        profile.save()
+        category = Category.objects.create(name='Screens', slug='screens')
+        self.product = Product.objects.create(
+            seller=self.seller, category=category, name='Display', sku='DSP-1',
+            description='Display', price=100, stock_quantity=10
+        )
+        self.customers = [
+            User.objects.create_user(email=f'customer{i}@example.com', password='pass12345') for i in range(5)
+        ]
+
+    def _deliver(self, items):
+        order = Order.objects.create(user=self.customers[0], total_amount=100 * items, shipping_address={})
+        for _ in range(items):
+            OrderItem.objects.create(order=order, product=self.product, product_name='Display', price=100, quantity=2)
+        order.status = 'DELIVERED'
+        order.save()
+
+    def test_stats_follow_deliveries_and_reviews(self):
+        self._deliver(12)
+        reviews = [Review.objects.create(user=u, product=self.product, rating=5, comment='Great') for u in self.customers]
+
+        stats = SellerStats.objects.get(seller=self.seller)
+        self.assertEqual((stats.delivered_items, stats.delivered_revenue), (12, 2400))
+        self.assertEqual((stats.rating_sum, stats.review_count), (25, 5))
+
+        edited = Review.objects.get(pk=reviews[0].pk)
+        edited.rating = 3
+        edited.save()
+        reviews[1].delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.rating_sum, stats.review_count), (18, 4))
+
+    def test_leaderboard_does_not_fan_out_and_is_cached(self):
+        self._deliver(12)
+        for u in self.customers:
+            Review.objects.create(user=u, product=self.product, rating=5, comment='Great')
+
+        top = leaderboard.top_sellers()
+        self.assertEqual(len(top), 1)
+        self.assertEqual(top[0]['total_sales'], 12)  # Not 12 x 5 from joining reviews
+        self.assertEqual(top[0]['total_reviews'], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(leaderboard.top_sellers(), top)
+
+    def test_rebuild_recomputes_from_source(self):
+        self._deliver(3)
+        SellerStats.objects.filter(seller=self.seller).update(delivered_items=99, rating_sum=7)
+        self.assertEqual(leaderboard.rebuild_stats()['updated'], 1)
+        stats = SellerStats.objects.get(seller=self.seller)
+        self.assertEqual((stats.delivered_items, stats.rating_sum), (3, 0))
+
+
+class BulkShipStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(email='shipper@example.com', password='pass12345', role='SELLER')
+        self.other = User.objects.create_user(email='other@example.com', password='pass12345', role='SELLER')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_only_the_owner_can_poll_a_job(self):
+        response = self.client_for(self.seller).post('/api/sellers/orders/bulk-ship/', {'item_ids': [999999]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        url = f"/api/sellers/orders/bulk-ship/{response.data['task_id']}/"
 
-# Create your tests here.
+        self.assertEqual(self.client_for(self.seller).get(url).status_code, 200)
+        self.assertEqual(self.client_for(self.other).get(url).status_code, 404)
+        self.assertEqual(self.client_for(self.seller).get('/api/sellers/orders/bulk-ship/unknown-task/').status_code, 404)
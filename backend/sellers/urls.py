@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import top_sellers, seller_profile, seller_orders, get_customer_addresses
+from .views import top_sellers, seller_profile, seller_orders, get_customer_addresses, bulk_ship_items, bulk_ship_status
 
 router = DefaultRouter()
 
@@ -8,6 +8,8 @@ urlpatterns = [
     path('top-sellers/', top_sellers, name='top-sellers'),
     path('profile/', seller_profile, name='seller-profile'),
     path('orders/', seller_orders, name='seller-orders'),
+    path('orders/bulk-ship/', bulk_ship_items, name='seller-bulk-ship'),
+    path('orders/bulk-ship/<str:task_id>/', bulk_ship_status, name='seller-bulk-ship-status'),
     path('orders/<str:item_id>/customer-addresses/', get_customer_addresses, name='customer-addresses'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
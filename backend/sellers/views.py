@@ -6,64 +6,28 @@ from django.db.models import Count, Avg, Sum, Q
 from django.contrib.auth import get_user_model
 from accounts.models import SellerProfile
 from orders.models import OrderItem
+from . import leaderboard
+from .order_inbox import SellerInboxPagination, inbox_queryset, inbox_row, status_counts
 from reviews.models import Review
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+BULK_SHIP_OWNER_TTL = 24 * 3600  # As long as Celery keeps task results
+
+
+def bulk_ship_owner_key(task_id):
+    return f"bulk_ship_owner:{task_id}"
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def top_sellers(request):
     """Get top selling sellers with customer satisfaction metrics"""
-    
-    # Get sellers with completed orders and high ratings
-    top_sellers = User.objects.filter(
-        role='SELLER',
-        is_active=True,
-        seller_profile__is_approved=True,
-        sold_items__status='DELIVERED'
-    ).annotate(
-        total_sales=Count('sold_items', filter=Q(sold_items__status='DELIVERED')),
-        total_revenue=Sum('sold_items__price', filter=Q(sold_items__status='DELIVERED')),
-        avg_rating=Avg('products__reviews__rating'),
-        total_reviews=Count('products__reviews', distinct=True)
-    ).filter(
-        total_sales__gte=10,  # Minimum 10 sales
-        avg_rating__gte=4.5,  # Minimum 4.5 rating
-        total_reviews__gte=5  # Minimum 5 reviews
-    ).order_by('-total_sales')[:6]  # Top 6 sellers
-    
-    sellers_data = []
-    for seller in top_sellers:
-        try:
-            profile = seller.seller_profile
-            sellers_data.append({
-                'id': seller.id,
-                'business_name': profile.business_name,
-                'city': profile.city or 'India',
-                'total_sales': seller.total_sales,
-                'avg_rating': round(seller.avg_rating or 0, 1),
-                'total_reviews': seller.total_reviews,
-                'satisfaction_rate': min(100, round((seller.avg_rating or 0) * 20, 0)),  # Convert 5-star to percentage
-                'badge': get_seller_badge(seller.total_sales, seller.avg_rating or 0)
-            })
-        except:
-            continue
-    
-    return Response(sellers_data)
-
-def get_seller_badge(sales, rating):
-    """Determine seller badge based on performance"""
-    if sales >= 100 and rating >= 4.8:
-        return {'name': 'Top Seller', 'color': 'gold', 'icon': '👑'}
-    elif sales >= 50 and rating >= 4.5:
-        return {'name': 'Trusted Seller', 'color': 'blue', 'icon': '⭐'}
-    elif sales >= 25 and rating >= 4.0:
-        return {'name': 'Rising Star', 'color': 'green', 'icon': '🌟'}
-    else:
-        return {'name': 'Verified', 'color': 'gray', 'icon': '✓'}
+    # Served from the materialized SellerStats table behind a cache (see sellers.leaderboard)
+    return Response(leaderboard.top_sellers())
 
 @api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
@@ -130,38 +94,24 @@ def seller_profile(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def seller_orders(request):
-    """Get orders for the seller"""
+    """
+    Seller order inbox, newest first, one cursor page at a time.
+    Filters: ?status=PENDING,PROCESSING&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+    """
     if request.user.role != 'SELLER':
         return Response({'error': 'Only sellers can access this endpoint'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Get order items where this user is the seller
-        order_items = OrderItem.objects.filter(
-            seller=request.user
-        ).select_related(
-            'order', 'product'
-        ).order_by('-order__created_at')
-        
-        logger.info(f"Found {order_items.count()} order items for seller {request.user.id}")
-        
-        # Format response
-        items_data = []
-        for item in order_items:
-            items_data.append({
-                'id': str(item.id),
-                'order_id': item.order.order_id,
-                'order_date': item.order.created_at,
-                'product_name': item.product_name,
-                'quantity': item.quantity,
-                'price': str(item.price),
-                'status': item.status,
-                'customer_name': item.order.user.get_full_name() or item.order.user.email,
-            })
-        
-        return Response({'results': items_data})
+        paginator = SellerInboxPagination()
+        page = paginator.paginate_queryset(inbox_queryset(request.user, request.query_params), request)
+        response = paginator.get_paginated_response([inbox_row(item) for item in page])
+        response.data['counts'] = status_counts(request.user)
+        return response
         
     except Exception as e:
         logger.error(f"Seller orders error: {str(e)}")
+        return Response({'error': 'Failed to load orders'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_customer_addresses(request, item_id):
@@ -200,4 +150,62 @@ def get_customer_addresses(request, item_id):
         return Response({'error': 'Order item not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         logger.error(f"Get customer addresses error: {str(e)}")
-        return Response({'error': 'Failed to fetch addresses'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return Response({'error': 'Failed to fetch addresses'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_ship_items(request):
+    """Queue shipment + AWB creation for many of the seller's order items"""
+    if request.user.role != 'SELLER':
+        return Response({'error': 'Only sellers can access this endpoint'}, status=status.HTTP_403_FORBIDDEN)
+    
+    item_ids = request.data.get('item_ids') or []
+    if not isinstance(item_ids, list) or not item_ids:
+        return Response({'error': 'item_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        item_ids = [int(i) for i in item_ids]
+    except (TypeError, ValueError):
+        return Response({'error': 'item_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    from shipping.tasks import bulk_create_shipments
+    task = bulk_create_shipments.delay(item_ids, seller_id=request.user.id)
+    # Only the seller who queued the job may poll it
+    try:
+        cache.set(bulk_ship_owner_key(task.id), request.user.id, BULK_SHIP_OWNER_TTL)
+    except Exception as e:
+        logger.warning(f"Could not record owner of bulk shipment {task.id}: {e}")
+    logger.info(f"Queued bulk shipment of {len(item_ids)} items for seller {request.user.id}: {task.id}")
+    
+    return Response({
+        'task_id': task.id,
+        'total': len(item_ids),
+        'message': 'Shipments queued for creation.'
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_ship_status(request, task_id):
+    """Per-item progress of a bulk shipment job"""
+    if request.user.role != 'SELLER':
+        return Response({'error': 'Only sellers can access this endpoint'}, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        owner_id = cache.get(bulk_ship_owner_key(task_id))
+    except Exception as e:
+        logger.warning(f"Bulk shipment owner lookup failed for {task_id}: {e}")
+        owner_id = None
+    if owner_id != request.user.id:
+        return Response({'error': 'Bulk shipment job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    from celery.result import AsyncResult
+    task = AsyncResult(task_id)
+    info = task.info if isinstance(task.info, dict) else {}
+    items = info.get('items', {})
+    
+    return Response({
+        'state': task.state,
+        'current': info.get('current', sum(1 for state in items.values() if state != 'PENDING')),
+        'total': info.get('total', len(items)),
+        'items': items,
+    })
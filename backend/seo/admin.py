@@ -3,8 +3,8 @@ from .models import SEOMetadata, SitemapEntry, RobotsRule, StructuredData
 
 @admin.register(SEOMetadata)
 class SEOMetadataAdmin(admin.ModelAdmin):
-    list_display = ['content_object', 'title', 'updated_at']
-    list_filter = ['content_type', 'updated_at']
+    list_display = ['content_object', 'title', 'is_override', 'updated_at']
+    list_filter = ['content_type', 'is_override', 'updated_at']
     search_fields = ['title', 'description', 'keywords']
 
 @admin.register(SitemapEntry)
@@ -1,38 +1,38 @@
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 from catalog.models import Product, Category
+from seo.payloads import refresh
 from seo.services import SEOService
-from seo.models import RobotsRule, SitemapEntry
+from seo.sitemaps import build as build_sitemaps
+from seo.models import RobotsRule, SEOMetadata, SitemapEntry
 
 class Command(BaseCommand):
-    help = 'Generate SEO data for existing products and categories'
+    help = 'Generate SEO data for existing products and categories, then build the sitemaps'
 
     def handle(self, *args, **options):
         self.stdout.write('Generating SEO data...')
-        
-        # Generate SEO metadata for products
-        products = Product.objects.filter(is_active=True, is_deleted=False)
-        for product in products:
-            SEOService.get_or_create_metadata(product)
-            SEOService.update_sitemap_entry(
-                f"/products/{product.slug}/",
-                priority=0.8,
-                changefreq='weekly'
-            )
-        
-        self.stdout.write(f'Generated SEO data for {products.count()} products')
-        
-        # Generate SEO metadata for categories
-        categories = Category.objects.all()
-        for category in categories:
-            SEOService.get_or_create_metadata(category)
-            SEOService.update_sitemap_entry(
-                f"/categories/{category.slug}/",
-                priority=0.6,
-                changefreq='monthly'
-            )
-        
-        self.stdout.write(f'Generated SEO data for {categories.count()} categories')
-        
+
+        # Page metadata and JSON-LD for products, rendered and upserted in batches
+        product_ids = Product.objects.filter(is_active=True, is_deleted=False).values_list('pk', flat=True)
+        count = refresh(product_ids.iterator(chunk_size=5000))
+
+        self.stdout.write(f'Generated SEO data for {count} products')
+
+        # Default metadata and sitemap entries for categories, only where missing
+        content_type = ContentType.objects.get_for_model(Category)
+        existing = set(SEOMetadata.objects.filter(content_type=content_type).values_list('object_id', flat=True))
+        categories = list(Category.objects.all())
+        SEOMetadata.objects.bulk_create([
+            SEOMetadata(content_type=content_type, object_id=category.pk, **SEOService._generate_default_metadata(category))
+            for category in categories if category.pk not in existing
+        ], batch_size=1000, ignore_conflicts=True)
+        SitemapEntry.objects.bulk_create([
+            SitemapEntry(url=f"/categories/{category.slug}/", priority=0.6, changefreq='monthly', is_active=True)
+            for category in categories
+        ], batch_size=1000, ignore_conflicts=True)
+
+        self.stdout.write(f'Generated SEO data for {len(categories)} categories')
+
         # Create default robots.txt rules
         RobotsRule.objects.get_or_create(
             user_agent='*',
@@ -43,7 +43,7 @@ class Command(BaseCommand):
                 'is_active': True
             }
         )
-        
+
         # Add static pages to sitemap
         static_pages = [
             ('/', 1.0, 'daily'),
@@ -52,17 +52,15 @@ class Command(BaseCommand):
             ('/contact/', 0.5, 'monthly'),
             ('/help/', 0.5, 'monthly'),
         ]
-        
-        for url, priority, changefreq in static_pages:
-            SitemapEntry.objects.get_or_create(
-                url=url,
-                defaults={
-                    'priority': priority,
-                    'changefreq': changefreq,
-                    'is_active': True
-                }
-            )
-        
+        SitemapEntry.objects.bulk_create([
+            SitemapEntry(url=url, priority=priority, changefreq=changefreq, is_active=True)
+            for url, priority, changefreq in static_pages
+        ], ignore_conflicts=True)
+
+        # Sitemap files, every shard
+        stats = build_sitemaps(full=True)
+        self.stdout.write(f"Built sitemaps: {stats['shards']} product shards, {stats['urls']} product URLs")
+
         self.stdout.write(
             self.style.SUCCESS('Successfully generated SEO data!')
-        )
\ No newline at end of file
+        )
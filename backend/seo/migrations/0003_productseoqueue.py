@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo', '0002_productseo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSEOQueue',
+            fields=[
+                ('product_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['queued_at'], name='seo_product_queued__5b1dd7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo', '0003_productseoqueue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('url_count', models.PositiveIntegerField(default=0)),
+                ('lastmod', models.DateTimeField(blank=True, null=True)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seo', '0004_sitemapshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seometadata',
+            name='is_override',
+            field=models.BooleanField(default=False, help_text='Use these tags instead of the generated ones. Blank fields keep the generated value.'),
+        ),
+    ]
@@ -23,6 +23,10 @@ class SEOMetadata(models.Model):
     og_title = models.CharField(max_length=60, blank=True)
     og_description = models.CharField(max_length=160, blank=True)
     og_image = models.URLField(blank=True)
+    is_override = models.BooleanField(
+        default=False,
+        help_text="Use these tags instead of the generated ones. Blank fields keep the generated value."
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -72,4 +76,52 @@ class StructuredData(models.Model):
     is_active = models.BooleanField(default=True)
     
     class Meta:
-        unique_together = ('content_type', 'object_id', 'schema_type')
\ No newline at end of file
+        unique_together = ('content_type', 'object_id', 'schema_type')
+
+class ProductSEO(models.Model):
+    """
+    Rendered SEO payload per product: page metadata and JSON-LD. Written by
+    seo.payloads when the product changes, so product pages read one joined
+    row instead of rendering per request.
+    """
+    product = models.OneToOneField('catalog.Product', on_delete=models.CASCADE, primary_key=True, related_name='seo')
+    metadata = models.JSONField(default=dict)
+    json_ld = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"SEO for product {self.product_id}"
+
+
+class ProductSEOQueue(models.Model):
+    """
+    Products whose ProductSEO needs re-rendering. One row per product, so a
+    burst of changes to the same product coalesces into one render. Not a
+    foreign key: a product deleted while queued is simply skipped.
+    """
+    product_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['queued_at']),
+        ]
+
+    def __str__(self):
+        return f"SEO refresh queued for product {self.product_id}"
+
+
+class SitemapShard(models.Model):
+    """
+    A pre-rendered sitemap file (seo.sitemaps): 'products-N' for the Nth
+    product id range, 'pages' for categories and static pages. The 'index'
+    row's built_at is when the last build started, and the next incremental
+    build re-renders shards with products updated since then.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    url_count = models.PositiveIntegerField(default=0)
+    lastmod = models.DateTimeField(null=True, blank=True)
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"sitemap-{self.name} ({self.url_count} URLs)"
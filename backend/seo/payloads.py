@@ -0,0 +1,90 @@
+"""
+Product SEO payloads.
+
+A product page needs its meta tags and its JSON-LD. Both are rendered here
+from the product, its brand, category, seller profile and images. An
+SEOMetadata row marked is_override replaces the generated tags it fills in;
+its blank fields, and unmarked rows (older code created one per product with
+the defaults of the day), change nothing. The result is stored in one
+ProductSEO row, which product detail reads through select_related with no
+further queries and no writes.
+
+Rendering is batched. render_many() takes a list of products loaded with
+payload_queryset() and fetches every SEOMetadata override with one query.
+refresh() writes a batch of ProductSEO rows with one upsert. The same
+functions back the signals, the generate_seo_data command and list or
+sitemap callers that need payloads for many products.
+"""
+from django.contrib.contenttypes.models import ContentType
+
+from catalog.models import Product
+from .models import ProductSEO, SEOMetadata
+from .services import SEOService
+
+BATCH_SIZE = 500
+
+META_FIELDS = ['title', 'description', 'keywords', 'canonical_url', 'og_title', 'og_description', 'og_image']
+
+
+def payload_queryset():
+    """Products with everything rendering reads"""
+    return Product.objects.select_related('brand', 'category', 'seller__seller_profile').prefetch_related('images')
+
+
+def overrides(model, object_ids):
+    """{object_id: SEOMetadata} for the admin overrides of `model` rows with these ids"""
+    rows = SEOMetadata.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids, is_override=True
+    )
+    return {row.object_id: row for row in rows}
+
+
+def apply_override(metadata, override=None):
+    """Overlay the override's non-empty fields on `metadata`"""
+    if override is not None:
+        metadata.update({field: value for field in META_FIELDS if (value := getattr(override, field))})
+    return metadata
+
+
+def _metadata(product, override=None):
+    metadata = dict.fromkeys(META_FIELDS, '')
+    metadata.update(SEOService._generate_default_metadata(product))
+    # Seller-entered SEO fields, then any admin override
+    for field in ('title', 'description', 'keywords'):
+        metadata[field] = getattr(product, f'seo_{field}') or metadata[field]
+    return apply_override(metadata, override)
+
+
+def render_many(products):
+    """{product_id: (metadata, json_ld)} for products loaded with payload_queryset()"""
+    rows = overrides(Product, [p.pk for p in products])
+    return {
+        product.pk: (_metadata(product, rows.get(product.pk)), SEOService.generate_product_structured_data(product))
+        for product in products
+    }
+
+
+def refresh(product_ids):
+    """Re-render and upsert ProductSEO for the given products, BATCH_SIZE at a time"""
+    product_ids = list(product_ids)
+    written = 0
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        products = list(payload_queryset().filter(pk__in=product_ids[start:start + BATCH_SIZE]))
+        rows = [
+            ProductSEO(product_id=product_id, metadata=metadata, json_ld=json_ld)
+            for product_id, (metadata, json_ld) in render_many(products).items()
+        ]
+        ProductSEO.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['product'], update_fields=['metadata', 'json_ld', 'updated_at']
+        )
+        written += len(rows)
+    return written
+
+
+def product_payload(product):
+    """(metadata, json_ld) for one product: the stored row, else rendered in memory without writing"""
+    try:
+        seo = product.seo
+    except ProductSEO.DoesNotExist:
+        return render_many([product])[product.pk]
+    return seo.metadata, seo.json_ld
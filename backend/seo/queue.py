@@ -0,0 +1,79 @@
+"""
+SEO regeneration queue.
+
+Product, image and review signals only enqueue: one INSERT ... ON CONFLICT DO
+UPDATE into ProductSEOQueue that moves the row's queued_at forward. Product
+saves enqueue only when a field the payload renders from actually changed
+(Product.seo_state), so a stock decrement that leaves the product in stock
+costs nothing. Repeated changes to a product before the drain runs share one
+queue row.
+
+A burst of enqueues schedules a single delayed drain (debounced through a
+cache flag, like the webhook inbox). The drain renders queued products in
+batches with seo.payloads.refresh(), then deletes only the exact
+(product_id, queued_at) rows it read when it took the batch. A change
+committed while the batch was rendering has replaced queued_at, so its row
+stays for the next batch. The render holds no locks, so product saves never wait on it; two overlapping
+drains may render a product twice, which the upsert makes harmless. A
+periodic run picks up anything a lost schedule left behind. Sitemaps don't
+need the queue: seo.sitemaps rebuilds from Product.updated_at.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProductSEOQueue
+from .payloads import refresh
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SCHEDULED_KEY = 'seo:refresh_scheduled'
+
+
+def enqueue(product_ids):
+    product_ids = {pid for pid in product_ids if pid is not None}
+    if not product_ids:
+        return
+    ProductSEOQueue.objects.bulk_create(
+        [ProductSEOQueue(product_id=pid, queued_at=timezone.now()) for pid in product_ids],
+        update_conflicts=True, unique_fields=['product_id'], update_fields=['queued_at'],
+    )
+    # After commit, so the drain can see the rows
+    transaction.on_commit(schedule_drain)
+
+
+def schedule_drain():
+    """Queue one delayed drain for a burst of changes instead of one task per product"""
+    from .tasks import refresh_product_seo
+
+    delay = settings.SEO_REFRESH_DELAY
+    try:
+        if not cache.add(DRAIN_SCHEDULED_KEY, 1, timeout=delay or 1):
+            return
+    except Exception as e:
+        logger.warning(f"SEO refresh debounce unavailable: {e}")
+    refresh_product_seo.apply_async(countdown=delay)
+
+
+def drain(batch_size=None, max_batches=None):
+    """Render queued products batch by batch until the queue is empty"""
+    batch_size = batch_size or settings.SEO_REFRESH_BATCH_SIZE
+    rendered, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        batch = dict(ProductSEOQueue.objects.order_by('queued_at').values_list('product_id', 'queued_at')[:batch_size])
+        if not batch:
+            break
+        rendered += refresh(batch)
+        # Only the exact rows read: a re-enqueue since then changed queued_at, even if its
+        # timestamp (taken before its commit) is older than others in the batch
+        ProductSEOQueue.objects.filter(
+            reduce(or_, (Q(product_id=product_id, queued_at=queued_at) for product_id, queued_at in batch.items()))
+        ).delete()
+        batches += 1
+    return rendered
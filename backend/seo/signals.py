@@ -1,36 +1,29 @@
+from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from catalog.models import Product, Category
+from catalog.models import Product, Category, ProductImage
+from reviews.models import Review
+from .models import SEOMetadata
+from .queue import enqueue
 from .services import SEOService
-from .models import StructuredData
-from django.contrib.contenttypes.models import ContentType
 
 @receiver(post_save, sender=Product)
 def create_product_seo_data(sender, instance, created, **kwargs):
-    if created or not instance.seo_title:
-        # Generate SEO metadata
-        SEOService.get_or_create_metadata(instance)
-        
-        # Generate structured data
-        content_type = ContentType.objects.get_for_model(Product)
-        structured_data = SEOService.generate_product_structured_data(instance)
-        
-        StructuredData.objects.update_or_create(
-            content_type=content_type,
-            object_id=instance.pk,
-            schema_type='Product',
-            defaults={
-                'json_ld': structured_data,
-                'is_active': True
-            }
-        )
-        
-        # Update sitemap
-        SEOService.update_sitemap_entry(
-            f"/products/{instance.slug}/",
-            priority=0.8,
-            changefreq='weekly'
-        )
+    # Re-render (in the background) only when something the payload shows changed
+    if created or getattr(instance, '_loaded_seo_state', None) != instance.seo_state():
+        enqueue([instance.pk])
+
+# og:image and the JSON-LD image list come from the product's images, and
+# aggregateRating from Product.rating (set by reviews.signals)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=Review)
+def refresh_product_seo(sender, instance, **kwargs):
+    enqueue([instance.product_id])
+
+@receiver([post_save, post_delete], sender=SEOMetadata)
+def refresh_overridden_product_seo(sender, instance, **kwargs):
+    if ContentType.objects.get_for_id(instance.content_type_id).model_class() is Product:
+        enqueue([instance.object_id])
 
 @receiver(post_save, sender=Category)
 def create_category_seo_data(sender, instance, created, **kwargs):
@@ -0,0 +1,193 @@
+"""
+Pre-rendered sitemaps.
+
+Crawlers get static files instead of a sitemap rendered from the catalog on
+each request. The files live in default storage under SITEMAP_DIR:
+
+- sitemap.xml: the sitemap index, listing every file below with its lastmod
+- sitemap-products-N.xml.gz: active products with ids in
+  [N * SITEMAP_SHARD_SIZE, (N + 1) * SITEMAP_SHARD_SIZE), so no file exceeds
+  the 50,000 URL limit and a product always lands in the same shard
+- sitemap-pages.xml.gz: categories and the static SitemapEntry pages
+
+Page URLs point at SITEMAP_BASE_URL (the storefront). The files themselves
+are served by this backend (seo.views.sitemap_file), so the index lists them
+under SITEMAP_FILES_URL.
+
+Shards are streamed from the database with iterator() and gzipped into a
+temporary file, so memory stays flat however large the catalog. A file is
+replaced without a moment where it is missing or half written: on local
+disk a sibling temporary file is renamed over it, and object storage (S3)
+overwrites the key in one PUT. An
+incremental build re-renders only the shards holding products updated since
+the previous build started. A full build also drops shards that emptied
+through hard deletes.
+"""
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import Max
+from django.utils import timezone
+
+from catalog.models import Category, Product
+from .models import SitemapEntry, SitemapShard
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_DIR = 'sitemaps'
+INDEX_FILE = 'sitemap.xml'
+INDEX = 'index'
+PAGES = 'pages'
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+
+
+def file_name(shard):
+    return f'sitemap-{shard}.xml.gz'
+
+
+def product_shard(number):
+    return f'products-{number}'
+
+
+def storage_path(name):
+    return f'{SITEMAP_DIR}/{name}'
+
+
+def absolute(path, base_url=None):
+    return f"{(base_url or settings.SITEMAP_BASE_URL).rstrip('/')}{path}"
+
+
+def _url(loc, lastmod=None, changefreq=None, priority=None):
+    parts = [f'<url><loc>{escape(absolute(loc))}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    if changefreq:
+        parts.append(f'<changefreq>{changefreq}</changefreq>')
+    if priority is not None:
+        parts.append(f'<priority>{priority:.1f}</priority>')
+    parts.append('</url>\n')
+    return ''.join(parts)
+
+
+def _save(name, fileobj):
+    path = storage_path(name)
+    fileobj.seek(0)
+    if not isinstance(default_storage, FileSystemStorage):
+        # S3Boto3Storage overwrites by default (file_overwrite)
+        default_storage.save(path, File(fileobj))
+        return
+    # FileSystemStorage would pick a new name rather than overwrite
+    target = default_storage.path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(target), suffix='.tmp', delete=False) as tmp:
+        shutil.copyfileobj(fileobj, tmp)
+    try:
+        if default_storage.file_permissions_mode is not None:
+            os.chmod(tmp.name, default_storage.file_permissions_mode)
+        os.replace(tmp.name, target)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def _write_shard(shard, urls):
+    """Gzip `urls` (an iterable of (loc, lastmod, changefreq, priority)) into the shard's file"""
+    count, lastmod = 0, None
+    with tempfile.TemporaryFile() as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as out:
+            out.write(URLSET_OPEN.encode())
+            for loc, modified, changefreq, priority in urls:
+                out.write(_url(loc, modified, changefreq, priority).encode())
+                count += 1
+                if modified and (lastmod is None or modified > lastmod):
+                    lastmod = modified
+            out.write(URLSET_CLOSE.encode())
+        if count:
+            _save(file_name(shard), raw)
+
+    if not count:
+        _drop(shard)
+        return 0
+    SitemapShard.objects.update_or_create(
+        name=shard, defaults={'url_count': count, 'lastmod': lastmod, 'built_at': timezone.now()}
+    )
+    return count
+
+
+def _drop(shard):
+    path = storage_path(file_name(shard))
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    SitemapShard.objects.filter(name=shard).delete()
+
+
+def _product_urls(number):
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = Product.objects.filter(
+        pk__gte=number * size, pk__lt=(number + 1) * size, is_active=True, is_deleted=False
+    ).order_by('pk').values_list('slug', 'updated_at')
+    for slug, updated_at in rows.iterator(chunk_size=5000):
+        yield f'/products/{slug}/', updated_at, 'weekly', 0.8
+
+
+def _page_urls():
+    entries = SitemapEntry.objects.filter(is_active=True).exclude(url__startswith='/products/').exclude(
+        url__startswith='/categories/'
+    ).order_by('-priority', 'url')
+    for entry in entries.iterator():
+        yield entry.url, entry.lastmod, entry.changefreq, entry.priority
+    for slug in Category.objects.order_by('pk').values_list('slug', flat=True).iterator():
+        yield f'/categories/{slug}/', None, 'monthly', 0.6
+
+
+def _write_index():
+    shards = SitemapShard.objects.exclude(name=INDEX).order_by('name')
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+    ]
+    for shard in shards:
+        lastmod = f'<lastmod>{shard.lastmod.date().isoformat()}</lastmod>' if shard.lastmod else ''
+        loc = absolute('/' + storage_path(file_name(shard.name)), settings.SITEMAP_FILES_URL)
+        lines.append(f'<sitemap><loc>{escape(loc)}</loc>{lastmod}</sitemap>\n')
+    lines.append('</sitemapindex>\n')
+    with tempfile.TemporaryFile() as out:
+        out.write(''.join(lines).encode())
+        _save(INDEX_FILE, out)
+
+
+def build(full=False):
+    """Render changed product shards (every shard when `full`), the pages shard and the index"""
+    started = timezone.now()
+    size = settings.SITEMAP_SHARD_SIZE
+    marker = SitemapShard.objects.filter(name=INDEX).first()
+
+    if full or marker is None:
+        max_id = Product.objects.aggregate(max_id=Max('pk'))['max_id'] or 0
+        numbers = set(range(max_id // size + 1)) if max_id else set()
+        # Shards past the last product (hard deletes) go too
+        existing = SitemapShard.objects.filter(name__startswith='products-').values_list('name', flat=True)
+        numbers |= {int(name.split('-')[1]) for name in existing}
+    else:
+        changed = Product.objects.filter(updated_at__gte=marker.built_at).values_list('pk', flat=True)
+        numbers = {pk // size for pk in changed.iterator(chunk_size=5000)}
+
+    urls = 0
+    for number in sorted(numbers):
+        urls += _write_shard(product_shard(number), _product_urls(number))
+    _write_shard(PAGES, _page_urls())
+    _write_index()
+    SitemapShard.objects.update_or_create(name=INDEX, defaults={'built_at': started})
+
+    logger.info(f"Sitemaps built ({'full' if full or marker is None else 'incremental'}): "
+                f"{len(numbers)} product shards, {urls} product URLs")
+    return {'shards': len(numbers), 'urls': urls}
@@ -0,0 +1,37 @@
+from celery import shared_task
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def refresh_product_seo():
+    """Re-render SEO payloads for queued products"""
+    from .queue import DRAIN_SCHEDULED_KEY, drain
+    # Clear the debounce flag first so changes arriving mid-drain schedule a new run
+    try:
+        cache.delete(DRAIN_SCHEDULED_KEY)
+    except Exception:
+        pass
+
+    rendered = drain()
+    if rendered:
+        logger.info(f"SEO payloads refreshed for {rendered} products")
+    return rendered
+
+
+SITEMAP_LOCK_KEY = 'seo:sitemap_build_lock'
+
+@shared_task
+def build_sitemaps(full=False):
+    """Rebuild sitemap files: changed product shards only, or every shard when `full`"""
+    from .sitemaps import build
+    # One build at a time; the next scheduled run picks up whatever this one skipped
+    if not cache.add(SITEMAP_LOCK_KEY, 1, 3600):
+        logger.info("Sitemap build already running, skipping")
+        return "Sitemap build already running"
+    try:
+        stats = build(full=full)
+        return f"Sitemaps: {stats['shards']} product shards, {stats['urls']} URLs"
+    finally:
+        cache.delete(SITEMAP_LOCK_KEY)
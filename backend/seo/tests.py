@@ -0,0 +1,236 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from catalog.models import Brand, Category, Product, ProductImage
+from .models import ProductSEO, ProductSEOQueue, SEOMetadata, SitemapEntry, SitemapShard
+from .payloads import payload_queryset, refresh, render_many
+from .queue import drain
+from .sitemaps import build
+
+User = get_user_model()
+
+
+class ProductSEOPayloadTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        self.category = Category.objects.create(name='Displays', slug='displays')
+        self.brand = Brand.objects.create(name='Acme')
+
+    def make_product(self, n=0, **fields):
+        return Product.objects.create(
+            seller=self.seller, category=self.category, brand=self.brand, name=f'OLED Display {n}', sku=f'OLED-{n}',
+            description='Replacement OLED panel', price=2000, stock_quantity=5, is_active=True, **fields
+        )
+
+    def test_payload_stored_on_change(self):
+        product = self.make_product(seo_title='Custom OLED title')
+        ProductImage.objects.create(product=product, image='products/oled.jpg')
+        drain()
+
+        seo = ProductSEO.objects.get(product=product)
+        self.assertEqual(seo.metadata['title'], 'Custom OLED title')
+        self.assertEqual(seo.json_ld['brand']['name'], 'Acme')
+        self.assertTrue(seo.json_ld['image'][0].endswith('products/oled.jpg'))
+
+    def test_admin_override_wins(self):
+        product = self.make_product(seo_description='Seller description')
+        SEOMetadata.objects.create(
+            content_type=ContentType.objects.get_for_model(Product), object_id=product.pk,
+            title='Admin title', description='', is_override=True,
+        )
+        drain()
+        metadata = ProductSEO.objects.get(product=product).metadata
+        # Blank override fields keep the generated value
+        self.assertEqual((metadata['title'], metadata['description']), ('Admin title', 'Seller description'))
+
+    def test_unmarked_metadata_rows_are_ignored(self):
+        product = self.make_product(seo_title='Seller title')
+        # The shape of the rows older code created for every product
+        SEOMetadata.objects.create(
+            content_type=ContentType.objects.get_for_model(Product), object_id=product.pk,
+            title='OLED Display 0 - Buy Online at Best Price', description='Stale default',
+        )
+        refresh([product.pk])
+        self.assertEqual(ProductSEO.objects.get(product=product).metadata['title'], 'Seller title')
+
+    def test_metadata_endpoint_does_not_write(self):
+        product = self.make_product(seo_title='Seller title')
+        drain()
+        rows = SEOMetadata.objects.count()
+
+        response = APIClient().get(f'/api/seo/product/{product.pk}/')
+        self.assertEqual(response.data['title'], 'Seller title')
+        response = APIClient().get(f'/api/seo/category/{self.category.pk}/')
+        self.assertEqual(response.data['title'], 'Displays - Mobile Parts & Accessories')
+        self.assertEqual(SEOMetadata.objects.count(), rows)
+
+    def test_rendering_is_batched(self):
+        ids = [self.make_product(i).pk for i in range(5)]
+        # products, images, overrides
+        with self.assertNumQueries(3):
+            payloads = render_many(list(payload_queryset().filter(pk__in=ids)))
+        self.assertEqual(set(payloads), set(ids))
+
+    def test_product_detail_reads_stored_payload_without_writes(self):
+        product = self.make_product()
+        drain()
+        ProductSEO.objects.filter(product=product).update(metadata={'title': 'Stored'}, json_ld={'@type': 'Product'})
+
+        response = APIClient().get(f'/api/catalog/products/{product.slug}/')
+        self.assertEqual(response.data['seo_data'], {'title': 'Stored'})
+        self.assertEqual(response.data['structured_data'], {'@type': 'Product'})
+        self.assertFalse(SEOMetadata.objects.filter(content_type=ContentType.objects.get_for_model(Product)).exists())
+
+
+class ProductSEOQueueTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        self.product = Product.objects.create(
+            seller=seller, category=Category.objects.create(name='Cables', slug='cables'), name='USB-C Cable',
+            sku='USBC-1', description='Braided cable', price=300, stock_quantity=10, is_active=True
+        )
+        drain()
+
+    def reload(self):
+        return Product.objects.get(pk=self.product.pk)
+
+    def test_only_seo_relevant_changes_enqueue(self):
+        product = self.reload()
+        product.stock_quantity = 9
+        product.save()
+        self.assertFalse(ProductSEOQueue.objects.exists())
+
+        product.stock_quantity = 0  # now out of stock
+        product.save()
+        product.price = 350
+        product.save()
+        self.assertEqual(list(ProductSEOQueue.objects.values_list('product_id', flat=True)), [product.pk])
+
+    def test_drain_renders_and_empties_queue(self):
+        product = self.reload()
+        product.name = 'USB-C Cable 2m'
+        product.save()
+
+        self.assertEqual(drain(), 1)
+        self.assertFalse(ProductSEOQueue.objects.exists())
+        self.assertEqual(ProductSEO.objects.get(product=product).json_ld['name'], 'USB-C Cable 2m')
+
+    def test_change_during_render_stays_queued(self):
+        product = self.reload()
+        product.name = 'USB-C Cable 2m'
+        product.save()
+
+        def render_then_edit(product_ids):
+            rendered = refresh(product_ids)
+            edited = self.reload()
+            edited.name = 'USB-C Cable 3m'
+            edited.save()
+            return rendered
+
+        with mock.patch('seo.queue.refresh', side_effect=render_then_edit):
+            drain(max_batches=1)
+        self.assertEqual(list(ProductSEOQueue.objects.values_list('product_id', flat=True)), [product.pk])
+
+        drain()
+        self.assertEqual(ProductSEO.objects.get(product=product).json_ld['name'], 'USB-C Cable 3m')
+
+    def test_older_enqueue_committed_during_render_stays_queued(self):
+        product = self.reload()
+        product.name = 'USB-C Cable 2m'
+        product.save()
+        other = Product.objects.create(
+            seller=product.seller, category=product.category, name='HDMI Cable', sku='HDMI-1',
+            description='HDMI', price=100, stock_quantity=10, is_active=True
+        )
+        first = ProductSEOQueue.objects.get(product_id=product.pk).queued_at
+        ProductSEOQueue.objects.filter(product_id=other.pk).update(queued_at=first + timedelta(seconds=10))
+
+        def render_then_commit_older(product_ids):
+            # Stamped before the batch read, committed after it: older than the batch maximum
+            ProductSEOQueue.objects.filter(product_id=product.pk).update(queued_at=first + timedelta(seconds=5))
+            return refresh(product_ids)
+
+        with mock.patch('seo.queue.refresh', side_effect=render_then_commit_older):
+            drain(max_batches=1)
+        self.assertEqual(list(ProductSEOQueue.objects.values_list('product_id', flat=True)), [product.pk])
+
+
+class SitemapBuildTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=self.media, SITEMAP_SHARD_SIZE=2, SITEMAP_BASE_URL='https://shop.example',
+            SITEMAP_FILES_URL='https://api.shop.example',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        category = Category.objects.create(name='Chargers', slug='chargers')
+        self.products = [
+            Product.objects.create(
+                seller=seller, category=category, name=f'Charger {i}', sku=f'CHG-{i}',
+                description='Fast charger', price=800, stock_quantity=3, is_active=True
+            )
+            for i in range(5)
+        ]
+        SitemapEntry.objects.create(url='/about/', priority=0.5, changefreq='monthly')
+
+    def shard(self, product):
+        return product.pk // 2
+
+    def read(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        return gzip.decompress(content).decode() if url.endswith('.gz') else content.decode()
+
+    def test_index_and_shards_cover_the_catalog(self):
+        build(full=True)
+
+        index = self.read('/sitemap.xml')
+        shards = {self.shard(p) for p in self.products}
+        for number in shards:
+            self.assertIn(f'<loc>https://api.shop.example/sitemaps/sitemap-products-{number}.xml.gz</loc>', index)
+        self.assertIn('<loc>https://api.shop.example/sitemaps/sitemap-pages.xml.gz</loc>', index)
+
+        listed = ''.join(self.read(f'/sitemaps/sitemap-products-{n}.xml.gz') for n in shards)
+        for product in self.products:
+            self.assertIn(f'<loc>https://shop.example/products/{product.slug}/</loc>', listed)
+        pages = self.read('/sitemaps/sitemap-pages.xml.gz')
+        self.assertIn('https://shop.example/about/', pages)
+        self.assertIn('https://shop.example/categories/chargers/', pages)
+
+    def test_incremental_build_renders_only_changed_shards(self):
+        build(full=True)
+        # A product that shares its shard, so the shard survives without it
+        changed = next(p for p in self.products if sum(self.shard(q) == self.shard(p) for q in self.products) > 1)
+        changed.is_active = False
+        changed.save()
+
+        self.assertEqual(build()['shards'], 1)
+        shard = self.read(f'/sitemaps/sitemap-products-{self.shard(changed)}.xml.gz')
+        self.assertNotIn(changed.slug, shard)
+        self.assertEqual(SitemapShard.objects.get(name=f'products-{self.shard(changed)}').url_count,
+                         sum(1 for p in self.products if p != changed and self.shard(p) == self.shard(changed)))
+
+    def test_rebuild_replaces_files_in_place(self):
+        build(full=True)
+        files = sorted(os.listdir(os.path.join(self.media, 'sitemaps')))
+        self.products[0].name = 'Charger 0 v2'
+        self.products[0].save()
+
+        build(full=True)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media, 'sitemaps'))), files)
+        shard = self.read(f'/sitemaps/sitemap-products-{self.shard(self.products[0])}.xml.gz')
+        self.assertIn(self.products[0].slug, shard)
@@ -1,14 +1,9 @@
-from django.urls import path
-from django.contrib.sitemaps.views import sitemap
-from .views import ProductSitemap, CategorySitemap, robots_txt, get_seo_metadata
-
-sitemaps = {
-    'products': ProductSitemap,
-    'categories': CategorySitemap,
-}
+from django.urls import path, re_path
+from .views import sitemap_file, robots_txt, get_seo_metadata
 
 urlpatterns = [
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
+    path('sitemap.xml', sitemap_file, name='sitemap'),
+    re_path(r'^sitemaps/(?P<name>sitemap-[a-z0-9-]+\.xml\.gz)$', sitemap_file, name='sitemap_shard'),
     path('robots.txt', robots_txt, name='robots_txt'),
     path('api/seo/<str:content_type>/<int:object_id>/', get_seo_metadata, name='seo_metadata'),
 ]
\ No newline at end of file
@@ -1,35 +1,22 @@
-from django.http import HttpResponse
-from django.template.response import TemplateResponse
-from django.contrib.sitemaps import Sitemap
-from django.urls import reverse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import SitemapEntry, RobotsRule, SEOMetadata
+from catalog.models import Product
+from .models import RobotsRule
+from .payloads import META_FIELDS, apply_override, overrides, product_payload
 from .services import SEOService
-from catalog.models import Product, Category
-
-class ProductSitemap(Sitemap):
-    changefreq = "weekly"
-    priority = 0.8
-
-    def items(self):
-        return Product.objects.filter(is_active=True, is_deleted=False)
-
-    def lastmod(self, obj):
-        return obj.updated_at
-
-    def location(self, obj):
-        return f"/products/{obj.slug}/"
-
-class CategorySitemap(Sitemap):
-    changefreq = "monthly"
-    priority = 0.6
-
-    def items(self):
-        return Category.objects.all()
-
-    def location(self, obj):
-        return f"/categories/{obj.slug}/"
+from .sitemaps import INDEX_FILE, storage_path
+
+def sitemap_file(request, name=INDEX_FILE):
+    """Serve a pre-rendered sitemap file (seo.sitemaps) from storage"""
+    path = storage_path(name)
+    if not default_storage.exists(path):
+        raise Http404("Sitemap not built yet")
+    content_type = 'application/gzip' if name.endswith('.gz') else 'application/xml'
+    response = FileResponse(default_storage.open(path), content_type=content_type)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 def robots_txt(request):
     rules = RobotsRule.objects.filter(is_active=True)
@@ -59,16 +46,14 @@ def get_seo_metadata(request, content_type, object_id):
         from django.contrib.contenttypes.models import ContentType
         ct = ContentType.objects.get(model=content_type)
         obj = ct.get_object_for_this_type(pk=object_id)
-        metadata = SEOService.get_or_create_metadata(obj)
+        # Read only: products use the stored payload, anything else the defaults plus any override
+        if isinstance(obj, Product):
+            metadata, _ = product_payload(obj)
+        else:
+            metadata = dict.fromkeys(META_FIELDS, '')
+            metadata.update(SEOService._generate_default_metadata(obj))
+            apply_override(metadata, overrides(obj, [obj.pk]).get(obj.pk))
         
-        return Response({
-            'title': metadata.title,
-            'description': metadata.description,
-            'keywords': metadata.keywords,
-            'canonical_url': metadata.canonical_url,
-            'og_title': metadata.og_title,
-            'og_description': metadata.og_description,
-            'og_image': metadata.og_image,
-        })
+        return Response({field: metadata.get(field, '') for field in META_FIELDS})
     except Exception as e:
         return Response({'error': str(e)}, status=404)
\ No newline at end of file
@@ -1,10 +1,16 @@
 from django.contrib import admin
-from .models import ShippingZone, ShippingMethod, Shipment
+from .models import ShippingZone, ShippingZoneRegion, ShippingMethod, Shipment
 
 class ShippingMethodInline(admin.TabularInline):
     model = ShippingMethod
     extra = 1
 
+@admin.register(ShippingZoneRegion)
+class ShippingZoneRegionAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'zone')
+    list_filter = ('zone',)
+    search_fields = ('prefix',)
+
 @admin.register(ShippingZone)
 class ShippingZoneAdmin(admin.ModelAdmin):
     list_display = ('name', 'countries')
@@ -5,4 +5,5 @@ class ShippingConfig(AppConfig):
     name = 'shipping'
     
     def ready(self):
-        import reviews.signals
\ No newline at end of file
+        import reviews.signals
+        import shipping.signals
\ No newline at end of file
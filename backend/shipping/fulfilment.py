@@ -0,0 +1,190 @@
+"""
+Bulk shipment / AWB creation.
+
+A seller's pending items are grouped into one package per (order, seller),
+each package is created in Shiprocket and assigned an AWB on a bounded thread
+pool (the shiprocket session rate-limits calls), and the AWBs are persisted
+with bulk_update once per batch of packages.
+
+A job runs for minutes, so each batch first claims its items: one locked
+re-read keeps only items still shippable and unclaimed, and stamps
+ship_claimed_at. An item cancelled since the job started, or claimed by an
+overlapping job (a double-clicked POST), is skipped before any Shiprocket
+call. The AWBs are written under a second locked re-read, only to items still
+shippable and still holding this claim. A claim is released when its package
+fails, and expires after SHIPPING_FULFILMENT_CLAIM_TIMEOUT_MINUTES if the
+worker dies.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from sellers.order_inbox import apply_count_changes, take_count_changes
+from .shiprocket_service import shiprocket_service
+
+logger = logging.getLogger(__name__)
+
+SHIPPABLE_ITEM_STATUSES = ('PENDING', 'PROCESSING', 'PACKAGED')
+
+
+class BulkFulfilmentEngine:
+    def __init__(self, service=None, concurrency=None, batch_size=None):
+        self.service = service or shiprocket_service
+        self.concurrency = concurrency or settings.SHIPPING_FULFILMENT_CONCURRENCY
+        self.batch_size = batch_size or settings.SHIPPING_FULFILMENT_BATCH_SIZE
+
+    @staticmethod
+    def shippable_items(item_ids, seller=None):
+        claim_expired = timezone.now() - timedelta(minutes=settings.SHIPPING_FULFILMENT_CLAIM_TIMEOUT_MINUTES)
+        items = OrderItem.objects.filter(
+            id__in=item_ids,
+            status__in=SHIPPABLE_ITEM_STATUSES,
+            order__status__in=['PENDING', 'PROCESSING'],
+        ).filter(
+            Q(tracking_number__isnull=True) | Q(tracking_number=''),
+            Q(ship_claimed_at__isnull=True) | Q(ship_claimed_at__lt=claim_expired),
+        ).select_related('order__user', 'product').order_by('order_id', 'id')
+        if seller is not None:
+            items = items.filter(seller=seller)
+        return items
+
+    @staticmethod
+    def group_packages(items):
+        """One package per (order, seller) so each seller ships separately"""
+        packages = {}
+        for item in items:
+            packages.setdefault((item.order_id, item.seller_id), []).append(item)
+        return list(packages.values())
+
+    def run(self, item_ids, seller=None, progress=None):
+        """
+        Create shipments for `item_ids`. `progress(results)` is called after
+        every batch with {item_id: 'SHIPPED' | 'FAILED' | 'SKIPPED'}.
+        """
+        item_ids = [int(i) for i in item_ids]
+        results = {item_id: 'PENDING' for item_id in item_ids}
+        items = list(self.shippable_items(item_ids, seller))
+        eligible = {item.id for item in items}
+        for item_id in item_ids:
+            if item_id not in eligible:
+                results[item_id] = 'SKIPPED'
+
+        if items:
+            # Warm the token once instead of racing logins from every thread
+            self.service.get_token()
+
+        packages = self.group_packages(items)
+        for start in range(0, len(packages), self.batch_size):
+            self._ship_batch(packages[start:start + self.batch_size], results, seller)
+            if progress:
+                progress(results)
+
+        return results
+
+    def _claim(self, packages, seller):
+        """Stamp the batch's still-shippable, unclaimed items; returns (claimed_at, packages trimmed to them)"""
+        claimed_at = timezone.now()
+        with transaction.atomic():
+            item_ids = [item.id for package in packages for item in package]
+            claimable = self.shippable_items(item_ids, seller).select_for_update(of=('self',))
+            claimed = set(claimable.values_list('id', flat=True))
+            OrderItem.objects.filter(id__in=claimed).update(ship_claimed_at=claimed_at)
+        packages = [[item for item in package if item.id in claimed] for package in packages]
+        return claimed_at, [package for package in packages if package]
+
+    def _ship_batch(self, packages, results, seller=None):
+        for package in packages:
+            for item in package:
+                results[item.id] = 'SKIPPED'
+        claimed_at, packages = self._claim(packages, seller)
+        if not packages:
+            return
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(packages)))) as pool:
+            outcomes = list(pool.map(self._ship_package, packages))
+
+        shipped = []
+        for package, awb in zip(packages, outcomes):
+            for item in package:
+                if awb:
+                    item.tracking_number = awb['awb_code']
+                    item.courier_name = awb.get('courier_name') or ''
+                    item.shiprocket_shipment_id = str(awb['shipment_id'])
+                    item.status = 'SHIPPED'
+                    item.ship_claimed_at = None
+                    shipped.append(item)
+                else:
+                    results[item.id] = 'FAILED'
+
+        with transaction.atomic():
+            # Items cancelled or returned during the HTTP calls keep their status
+            current = dict(
+                OrderItem.objects.select_for_update().filter(
+                    id__in=[item.id for item in shipped],
+                    status__in=SHIPPABLE_ITEM_STATUSES,
+                    ship_claimed_at=claimed_at,
+                ).values_list('id', 'status')
+            )
+            lost = [item for item in shipped if item.id not in current]
+            shipped = [item for item in shipped if item.id in current]
+            for item in shipped:
+                # Count the move from the status just read, not the one loaded at job start
+                item._loaded_status = current[item.id]
+                results[item.id] = 'SHIPPED'
+            OrderItem.objects.bulk_update(
+                shipped, ['tracking_number', 'courier_name', 'shiprocket_shipment_id', 'status', 'ship_claimed_at']
+            )
+            apply_count_changes(take_count_changes(shipped))
+            # Failed packages give their items back
+            OrderItem.objects.filter(
+                id__in=[item.id for package in packages for item in package], ship_claimed_at=claimed_at
+            ).update(ship_claimed_at=None)
+
+        for item in lost:
+            logger.warning(
+                f"AWB {item.tracking_number} created for item {item.id}, which was closed or reclaimed meanwhile"
+            )
+        if shipped:
+            self._mark_orders_shipped({item.order_id for item in shipped})
+
+    def _ship_package(self, items):
+        order = items[0].order
+        seller_id = items[0].seller_id
+        try:
+            created = self.service.create_order(
+                order, items=items, channel_order_id=f"{order.order_id}-{seller_id}"
+            )
+            if not created or not created.get('shipment_id'):
+                return None
+            awb = self.service.generate_awb(
+                created['shipment_id'],
+                delivery_pincode=order.shipping_address.get('postal_code'),
+            )
+            if not awb or not awb.get('awb_code'):
+                return None
+            awb['shipment_id'] = created['shipment_id']
+            return awb
+        except Exception as e:
+            logger.error(f"Bulk shipment failed for order {order.order_id} seller {seller_id}: {e}")
+            return None
+
+    @staticmethod
+    def _mark_orders_shipped(order_ids):
+        """Orders whose every item now has an AWB move to SHIPPED"""
+        orders = Order.objects.filter(id__in=order_ids).exclude(status='SHIPPED').annotate(
+            unshipped=Count('items', filter=Q(items__status__in=SHIPPABLE_ITEM_STATUSES))
+        ).filter(unshipped=0)
+
+        for order in orders:
+            order.status = 'SHIPPED'
+            # Items were written above; cancelled or returned ones keep their
+            # status instead of being synced to SHIPPED
+            order._items_synced = True
+            # Per-order save so the status signals (notifications) still fire
+            order.save(update_fields=['status', 'updated_at'])
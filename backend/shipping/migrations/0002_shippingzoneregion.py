@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShippingZoneRegion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(db_index=True, max_length=50)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_entries', to='shipping.shippingzone')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zone', 'prefix'), name='unique_zone_region_prefix')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:09
+
+from django.db import migrations
+
+
+def populate_zone_regions(apps, schema_editor):
+    ShippingZone = apps.get_model('shipping', 'ShippingZone')
+    ShippingZoneRegion = apps.get_model('shipping', 'ShippingZoneRegion')
+    rows = []
+    for zone in ShippingZone.objects.all():
+        prefixes = {r.strip() for r in (zone.regions or '').split(',') if r.strip()}
+        rows.extend(ShippingZoneRegion(zone=zone, prefix=p) for p in prefixes)
+    ShippingZoneRegion.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipping', '0002_shippingzoneregion'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_zone_regions, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,37 @@ class ShippingZone(models.Model):
     def __str__(self):
         return self.name
 
+    def region_prefixes(self):
+        """Distinct, cleaned entries from the comma-separated regions field"""
+        return sorted({r.strip() for r in (self.regions or '').split(',') if r.strip()})
+
+    def sync_regions(self):
+        """Mirror the regions text field into ShippingZoneRegion rows"""
+        prefixes = self.region_prefixes()
+        existing = set(self.region_entries.values_list('prefix', flat=True))
+        ShippingZoneRegion.objects.bulk_create(
+            [ShippingZoneRegion(zone=self, prefix=p) for p in prefixes if p not in existing],
+            ignore_conflicts=True
+        )
+        # Delete last: region post_delete rewrites the text from the remaining rows
+        self.region_entries.exclude(prefix__in=prefixes).delete()
+
+class ShippingZoneRegion(models.Model):
+    """
+    One pincode prefix (or state) served by a zone.
+    Normalized form of ShippingZone.regions used to build the zone index.
+    """
+    zone = models.ForeignKey(ShippingZone, on_delete=models.CASCADE, related_name='region_entries')
+    prefix = models.CharField(max_length=50, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'prefix'], name='unique_zone_region_prefix')
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.zone.name}"
+
 class ShippingMethod(models.Model):
     """
     Available services: Standard, Express, Same Day.
@@ -0,0 +1,132 @@
+"""
+Courier rate/serviceability quote cache.
+
+Quotes are keyed by (origin pincode, destination pincode prefix, weight band)
+so every shipment on the same lane reuses one carrier lookup. Entries have a
+soft TTL after which the stale quote is still served while a background task
+refreshes it, and a hard TTL after which a live lookup is required. When
+the cache is unreachable every call falls back to a live lookup.
+"""
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COURIER_ID = 1
+
+
+def weight_band(weight_kg):
+    """Round a weight up to the next 0.5 kg slab carriers price by"""
+    try:
+        weight = float(weight_kg)
+    except (TypeError, ValueError):
+        weight = 0.5
+    return max(0.5, math.ceil(weight * 2) / 2)
+
+
+def destination_prefix(pincode):
+    return str(pincode or '').strip()[:settings.COURIER_QUOTE_PREFIX_LENGTH]
+
+
+class CourierQuoteCache:
+    """
+    `fetch(origin, delivery_pincode, weight, cod)` performs the live lookup and
+    returns courier dicts (courier_company_id, courier_name, rate, etd).
+    """
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+    @staticmethod
+    def key(origin, delivery_pincode, weight, cod=False):
+        mode = 'cod' if cod else 'prepaid'
+        return f"courier_quote:{origin}:{destination_prefix(delivery_pincode)}:{weight_band(weight)}:{mode}"
+
+    def get(self, origin, delivery_pincode, weight, cod=False):
+        """Cached courier list for the lane, refreshing in the background when stale"""
+        key = self.key(origin, delivery_pincode, weight, cod)
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Courier quote cache unavailable, looking up {key} live: {e}")
+            entry = None
+
+        if entry is None:
+            return self.refresh(origin, delivery_pincode, weight, cod)
+
+        if entry['fresh_until'] < timezone.now().timestamp():
+            self._schedule_refresh(key, origin, delivery_pincode, weight, cod)
+        return entry['couriers']
+
+    def refresh(self, origin, delivery_pincode, weight, cod=False):
+        couriers = self.fetch(origin, delivery_pincode, weight_band(weight), cod)
+        if couriers:
+            entry = {
+                'couriers': couriers,
+                'fresh_until': timezone.now().timestamp() + settings.COURIER_QUOTE_TTL,
+            }
+            try:
+                cache.set(self.key(origin, delivery_pincode, weight, cod), entry, settings.COURIER_QUOTE_MAX_AGE)
+            except Exception as e:
+                logger.warning(f"Could not cache courier quote: {e}")
+        return couriers
+
+    def _schedule_refresh(self, key, origin, delivery_pincode, weight, cod):
+        # Only one refresh per lane in flight
+        try:
+            if not cache.add(f"{key}:refreshing", 1, 300):
+                return
+        except Exception as e:
+            logger.warning(f"Courier quote refresh lock unavailable for {key}: {e}")
+            return
+        from .tasks import refresh_courier_quote
+        try:
+            refresh_courier_quote.delay(origin, delivery_pincode, weight_band(weight), cod)
+        except Exception as e:
+            logger.warning(f"Could not schedule courier quote refresh for {key}: {e}")
+            try:
+                cache.delete(f"{key}:refreshing")
+            except Exception:
+                pass
+
+    def recommend(self, origin, delivery_pincode, weight, cod=False):
+        """Cheapest courier id for the lane"""
+        couriers = self.get(origin, delivery_pincode, weight, cod)
+        if not couriers:
+            return DEFAULT_COURIER_ID
+        return min(couriers, key=lambda c: float(c.get('rate') or 999999))['courier_company_id']
+
+    def recommend_many(self, origin, shipments, concurrency=None):
+        """
+        Resolve couriers for many shipments with one lookup per distinct lane.
+        `shipments` is an iterable of dicts with shipment_id, delivery_pincode,
+        weight and optional cod. Returns {shipment_id: courier_id}.
+        """
+        lanes = {}
+        for shipment in shipments:
+            key = self.key(origin, shipment['delivery_pincode'], shipment.get('weight', 0.5), shipment.get('cod', False))
+            lanes.setdefault(key, []).append(shipment)
+
+        def resolve(group):
+            first = group[0]
+            try:
+                return self.recommend(origin, first['delivery_pincode'], first.get('weight', 0.5), first.get('cod', False))
+            except Exception as e:
+                logger.warning(f"Courier quote failed for {first['delivery_pincode']}: {e}")
+                return DEFAULT_COURIER_ID
+
+        groups = list(lanes.values())
+        workers = concurrency or settings.SHIPPING_TRACKING_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups) or 1))) as pool:
+            courier_ids = list(pool.map(resolve, groups))
+
+        return {
+            shipment['shipment_id']: courier_id
+            for group, courier_id in zip(groups, courier_ids)
+            for shipment in group
+        }
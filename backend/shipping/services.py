@@ -1,24 +1,19 @@
-from .models import ShippingZone, ShippingMethod
+from .zone_index import get_zone_index
 
 class ShippingCalculator:
     @staticmethod
     def identify_zone(pincode, country='IN'):
         """
         Logic to match a user's address to a Shipping Zone.
-        In a real app, this matches Pincode Prefixes.
+        Matches the longest pincode prefix from the in-memory zone index.
         """
-        # 1. Try to find a zone that specifically mentions this pincode prefix
-        prefix = str(pincode)[:3]
-        
-        # Simple lookup logic (can be made complex with Regex)
-        zones = ShippingZone.objects.filter(countries__contains=country)
-        
-        for zone in zones:
-            if prefix in zone.regions:
-                return zone
+        index = get_zone_index()
+        zone = index.match(pincode)
+        if zone and country in zone.countries:
+            return zone
         
         # Fallback to a "Default" or "National" zone
-        return ShippingZone.objects.filter(name="National").first()
+        return index.zones.get(index.fallback_id)
 
     @staticmethod
     def get_rates(pincode, weight_kg):
@@ -26,5 +21,4 @@ class ShippingCalculator:
         if not zone:
             return []
             
-        methods = ShippingMethod.objects.filter(zone=zone, is_active=True)
-        return methods
\ No newline at end of file
+        return get_zone_index().methods_for(zone)
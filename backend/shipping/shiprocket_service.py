@@ -1,6 +1,8 @@
 import requests
 from django.conf import settings
 from datetime import datetime, timedelta
+from core.http_client import get_client, TokenCache
+from .rate_cache import CourierQuoteCache, DEFAULT_COURIER_ID
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,34 +14,39 @@ class ShiprocketService:
     BASE_URL = "https://apiv2.shiprocket.in/v1/external"
     
     def __init__(self):
-        self.token = None
+        # Pooled, instrumented session shared by every Shiprocket integration
+        self.session = get_client('shiprocket')
+        # Token is shared across workers and refreshed before it expires
+        self.token_cache = TokenCache('shiprocket', self._login, ttl=settings.SHIPROCKET_TOKEN_TTL)
+        # Serviceability quotes cached per (origin, destination prefix, weight band)
+        self.quotes = CourierQuoteCache(self.get_serviceability)
     
-    def get_token(self):
-        """Get authentication token"""
-        if self.token:
-            return self.token
-            
+    def _login(self):
         url = f"{self.BASE_URL}/auth/login"
         payload = {
             "email": settings.SHIPROCKET_EMAIL,
             "password": settings.SHIPROCKET_PASSWORD
         }
-        
+        response = self.session.post(url, json=payload, timeout=10)
+        response.raise_for_status()
+        return response.json()['token']
+    
+    def get_token(self):
+        """Get authentication token"""
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            self.token = response.json()['token']
-            return self.token
+            return self.token_cache.get()
         except requests.exceptions.RequestException as e:
             logger.error(f"Shiprocket auth failed: {e}")
             return None
-        except KeyError as e:
+        except (KeyError, ValueError) as e:
             logger.error(f"Shiprocket auth response missing token: {e}")
             return None
     
-    def create_order(self, order):
+    def create_order(self, order, items=None, channel_order_id=None):
         """
         Create order in Shiprocket
+        `items` limits the package to a subset of the order's items (one
+        seller's share); `channel_order_id` must then be unique per package.
         Returns: order_id, shipment_id
         """
         token = self.get_token()
@@ -49,9 +56,14 @@ class ShiprocketService:
         url = f"{self.BASE_URL}/orders/create/adhoc"
         headers = {"Authorization": f"Bearer {token}"}
         
+        if items is None:
+            package_items, sub_total = order.items.all(), order.total_amount
+        else:
+            package_items, sub_total = items, sum(item.subtotal for item in items)
+        
         # Prepare order data
         payload = {
-            "order_id": order.order_id,
+            "order_id": channel_order_id or order.order_id,
             "order_date": order.created_at.strftime("%Y-%m-%d %H:%M"),
             "pickup_location": "Primary",  # Your warehouse name in Shiprocket
             "billing_customer_name": order.shipping_address.get('full_name'),
@@ -75,10 +87,10 @@ class ShiprocketService:
                     "tax": "0",
                     "hsn": ""
                 }
-                for item in order.items.all()
+                for item in package_items
             ],
             "payment_method": "Prepaid" if order.payment_status else "COD",
-            "sub_total": str(order.total_amount),
+            "sub_total": str(sub_total),
             "length": 10,  # Package dimensions (cm)
             "breadth": 10,
             "height": 10,
@@ -86,7 +98,7 @@ class ShiprocketService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=15)
+            response = self.session.post(url, json=payload, headers=headers, timeout=15)
             response.raise_for_status()
             data = response.json()
             return {
@@ -100,7 +112,7 @@ class ShiprocketService:
             logger.error(f"Shiprocket order response parsing failed: {e}")
             return None
     
-    def generate_awb(self, shipment_id, courier_id=None):
+    def generate_awb(self, shipment_id, courier_id=None, delivery_pincode=None, weight=0.5):
         """
         Generate AWB (tracking number) for shipment
         If courier_id not provided, uses recommended courier
@@ -111,7 +123,7 @@ class ShiprocketService:
         
         # Step 1: Get available couriers if not specified
         if not courier_id:
-            courier_id = self.get_recommended_courier(shipment_id)
+            courier_id = self.get_recommended_courier(shipment_id, delivery_pincode=delivery_pincode, weight=weight)
         
         # Step 2: Assign courier and generate AWB
         url = f"{self.BASE_URL}/courier/assign/awb"
@@ -122,7 +134,7 @@ class ShiprocketService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=15)
+            response = self.session.post(url, json=payload, headers=headers, timeout=15)
             response.raise_for_status()
             data = response.json()
             return {
@@ -137,18 +149,79 @@ class ShiprocketService:
             logger.error(f"AWB response parsing failed: {e}")
             return None
     
-    def get_recommended_courier(self, shipment_id):
+    def get_serviceability(self, pickup_pincode, delivery_pincode, weight, cod=False):
+        """
+        Live courier serviceability for a lane.
+        Returns: couriers sorted by rate (empty list on failure)
+        """
+        token = self.get_token()
+        if not token:
+            return []
+        
+        url = f"{self.BASE_URL}/courier/serviceability/"
+        headers = {"Authorization": f"Bearer {token}"}
+        params = {
+            "pickup_postcode": pickup_pincode,
+            "delivery_postcode": delivery_pincode,
+            "weight": weight,
+            "cod": 1 if cod else 0
+        }
+        
+        try:
+            response = self.session.get(url, headers=headers, params=params, timeout=10)
+            response.raise_for_status()
+            companies = response.json().get('data', {}).get('available_courier_companies', [])
+            couriers = [
+                {
+                    'courier_company_id': c.get('courier_company_id'),
+                    'courier_name': c.get('courier_name', ''),
+                    'rate': float(c.get('rate', 999999)),
+                    'etd': c.get('etd', '')
+                }
+                for c in companies
+            ]
+            return sorted(couriers, key=lambda c: c['rate'])
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Serviceability lookup failed for {pickup_pincode}->{delivery_pincode}: {e}")
+            return []
+        except (KeyError, ValueError, TypeError) as e:
+            logger.warning(f"Serviceability response parsing failed: {e}")
+            return []
+    
+    def recommend_couriers(self, shipments):
+        """
+        Cheapest courier for many shipments at once.
+        shipments: [{'shipment_id', 'delivery_pincode', 'weight', 'cod'}]
+        Returns: {shipment_id: courier_id}
+        """
+        shipments = list(shipments)
+        origin = settings.SHIPROCKET_PICKUP_PINCODE
+        if not origin:
+            return {s['shipment_id']: self.get_recommended_courier(s['shipment_id']) for s in shipments}
+        
+        with_pincode = [s for s in shipments if s.get('delivery_pincode')]
+        result = self.quotes.recommend_many(origin, with_pincode)
+        for s in shipments:
+            if not s.get('delivery_pincode'):
+                result[s['shipment_id']] = self.get_recommended_courier(s['shipment_id'])
+        return result
+    
+    def get_recommended_courier(self, shipment_id, delivery_pincode=None, weight=0.5, cod=False):
         """Get cheapest/fastest courier for shipment"""
+        # Lane-level quotes are cached, so repeat lookups skip the network
+        if delivery_pincode and settings.SHIPROCKET_PICKUP_PINCODE:
+            return self.quotes.recommend(settings.SHIPROCKET_PICKUP_PINCODE, delivery_pincode, weight, cod)
+        
         token = self.get_token()
         if not token:
-            return 1  # Default courier ID
+            return DEFAULT_COURIER_ID
         
         url = f"{self.BASE_URL}/courier/serviceability/"
         headers = {"Authorization": f"Bearer {token}"}
         params = {"shipment_id": shipment_id}
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = self.session.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             couriers = response.json().get('data', {}).get('available_courier_companies', [])
             
@@ -177,7 +250,7 @@ class ShiprocketService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.session.post(url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -200,7 +273,7 @@ class ShiprocketService:
         headers = {"Authorization": f"Bearer {token}"}
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -235,7 +308,7 @@ class ShiprocketService:
         headers = {"Authorization": f"Bearer {token}"}
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import ShippingZone, ShippingZoneRegion, ShippingMethod
+from .zone_index import invalidate_zone_index
+
+
+@receiver(post_save, sender=ShippingZone)
+def sync_zone_regions(sender, instance, **kwargs):
+    """Keep the normalized region rows in step with the regions text field"""
+    instance.sync_regions()
+    transaction.on_commit(invalidate_zone_index)
+
+
+@receiver(post_save, sender=ShippingZoneRegion)
+@receiver(post_delete, sender=ShippingZoneRegion)
+def sync_zone_regions_text(sender, instance, **kwargs):
+    """Region rows edited directly (admin) are written back to the text field"""
+    prefixes = ShippingZoneRegion.objects.filter(zone_id=instance.zone_id).values_list('prefix', flat=True)
+    # update() skips post_save, so this doesn't loop back into sync_regions
+    ShippingZone.objects.filter(pk=instance.zone_id).update(regions=', '.join(sorted(prefixes)))
+    transaction.on_commit(invalidate_zone_index)
+
+
+@receiver(post_delete, sender=ShippingZone)
+@receiver(post_save, sender=ShippingMethod)
+@receiver(post_delete, sender=ShippingMethod)
+def invalidate_zone_index_on_change(sender, **kwargs):
+    # After commit, or another process could rebuild from the old rows under the new version
+    transaction.on_commit(invalidate_zone_index)
@@ -1,42 +1,81 @@
 from celery import shared_task
-from django.utils import timezone
-from .shiprocket_service import shiprocket_service
-from orders.models import OrderItem
+from django.conf import settings
+from django.core.cache import cache
+from .fulfilment import BulkFulfilmentEngine
+from .tracking import TrackingSyncEngine
 import logging
 
 logger = logging.getLogger(__name__)
 
 @shared_task
 def sync_tracking_updates():
-    """Sync tracking updates for all active shipments"""
+    """Fan tracking sync out across shards so workers poll the carrier in parallel"""
+    num_shards = max(1, settings.SHIPPING_TRACKING_SHARDS)
+    for shard in range(num_shards):
+        sync_tracking_shard.delay(shard, num_shards)
+
+    logger.info(f"Queued tracking sync across {num_shards} shards")
+    return f"Queued tracking sync across {num_shards} shards"
+
+@shared_task
+def sync_tracking_shard(shard, num_shards):
+    """Sync tracking updates for the shipped items in one shard"""
+    try:
+        stats = TrackingSyncEngine().sync(shard=shard, num_shards=num_shards)
+        logger.info(f"Tracking sync shard {shard}/{num_shards}: {stats}")
+        return f"Updated tracking for {stats['updated']} shipments"
+    except Exception as e:
+        logger.error(f"Tracking sync shard {shard}/{num_shards} failed: {e}")
+        return f"Tracking sync failed: {e}"
+
+@shared_task
+def refresh_courier_quote(origin, delivery_pincode, weight, cod=False):
+    """Refresh a stale courier quote lane in the background"""
+    from .shiprocket_service import shiprocket_service
+    key = shiprocket_service.quotes.key(origin, delivery_pincode, weight, cod)
     try:
-        # Get all order items that are shipped but not delivered
-        active_items = OrderItem.objects.filter(
-            status__in=['SHIPPED'],
-            tracking_number__isnull=False
-        ).exclude(tracking_number='')
-        
-        updated_count = 0
-        for item in active_items:
-            try:
-                updates = shiprocket_service.track_shipment(item.tracking_number)
-                if updates:
-                    item.tracking_updates = updates
-                    # Update status based on latest update
-                    if updates:
-                        latest_status = updates[-1].get('status', '').upper()
-                        if 'DELIVERED' in latest_status:
-                            item.status = 'DELIVERED'
-                        elif 'OUT FOR DELIVERY' in latest_status:
-                            item.status = 'SHIPPED'  # Keep as shipped until delivered
-                    item.save()
-                    updated_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to update tracking for item {item.id}: {e}")
-                continue
-        
-        logger.info(f"Updated tracking for {updated_count} shipments")
-        return f"Updated tracking for {updated_count} shipments"
+        couriers = shiprocket_service.quotes.refresh(origin, delivery_pincode, weight, cod)
+        return f"Refreshed {len(couriers)} courier quotes for {key}"
     except Exception as e:
-        logger.error(f"Tracking sync failed: {e}")
-        return f"Tracking sync failed: {e}"
\ No newline at end of file
+        logger.error(f"Courier quote refresh failed for {key}: {e}")
+        return f"Courier quote refresh failed: {e}"
+    finally:
+        try:
+            cache.delete(f"{key}:refreshing")
+        except Exception as e:
+            logger.warning(f"Could not release courier quote refresh lock for {key}: {e}")
+
+@shared_task(bind=True)
+def bulk_create_shipments(self, item_ids, seller_id=None):
+    """
+    Create Shiprocket shipments + AWBs for a batch of order items.
+    Per-item progress is published in the task state for status polling.
+    """
+    from django.contrib.auth import get_user_model
+    seller = get_user_model().objects.filter(id=seller_id).first() if seller_id else None
+
+    def progress(results):
+        done = sum(1 for state in results.values() if state != 'PENDING')
+        try:
+            self.update_state(
+                state='PROGRESS',
+                meta={'current': done, 'total': len(results), 'items': results}
+            )
+        except Exception as e:
+            logger.debug(f"Could not update task state (likely running synchronously): {e}")
+
+    try:
+        results = BulkFulfilmentEngine().run(item_ids, seller=seller, progress=progress)
+    except Exception as e:
+        logger.error(f"Bulk shipment creation failed: {e}")
+        return {'status': 'failed', 'error': str(e)}
+
+    shipped = sum(1 for state in results.values() if state == 'SHIPPED')
+    logger.info(f"Bulk shipment creation: {shipped}/{len(results)} items shipped")
+    return {
+        'status': 'success',
+        'shipped': shipped,
+        'failed': sum(1 for state in results.values() if state == 'FAILED'),
+        'skipped': sum(1 for state in results.values() if state == 'SKIPPED'),
+        'items': results,
+    }
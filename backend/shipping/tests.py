@@ -1,3 +1,450 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from catalog.models import Category, Product
+from orders.models import Order, OrderItem
+from sellers.models import SellerOrderStatusCount
+from .shiprocket_service import ShiprocketService
+from .fulfilment import BulkFulfilmentEngine
+from .rate_cache import weight_band
+from .tracking import TrackingSyncEngine, is_delivered
+
+User = get_user_model()
+
+
+class FakeCarrierHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Shiprocket auth, serviceability and AWB tracking endpoints"""
+    shipments = {}
+    requests_seen = []
+    serviceability_seen = []
+    orders_created = []
+    failing_orders = set()
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self.path.endswith('/auth/login'):
+            self._send_json({'token': 'fake-token'})
+        elif self.path.endswith('/orders/create/adhoc'):
+            if body['order_id'] in self.failing_orders:
+                self._send_json({}, status=500)
+                return
+            self.orders_created.append(body['order_id'])
+            shipment_id = len(self.orders_created)
+            self._send_json({'order_id': shipment_id, 'shipment_id': shipment_id})
+        elif self.path.endswith('/courier/assign/awb'):
+            self._send_json({'response': {'data': {
+                'awb_code': f"AWB{body['shipment_id']}", 'courier_name': 'Surface'
+            }}})
+        else:
+            self._send_json({}, status=404)
+
+    def do_GET(self):
+        if self.path.startswith('/courier/serviceability/'):
+            params = parse_qs(urlsplit(self.path).query)
+            self.serviceability_seen.append(params.get('delivery_postcode', [''])[0])
+            self._send_json({'data': {'available_courier_companies': [
+                {'courier_company_id': 10, 'courier_name': 'Express', 'rate': 120.0, 'etd': '2 days'},
+                {'courier_company_id': 20, 'courier_name': 'Surface', 'rate': 80.0, 'etd': '5 days'},
+            ]}})
+            return
+        prefix = '/courier/track/awb/'
+        if not self.path.startswith(prefix):
+            self._send_json({}, status=404)
+            return
+        awb = self.path[len(prefix):]
+        self.requests_seen.append(awb)
+        self._send_json({'tracking_data': {'shipment_track': self.shipments.get(awb, [])}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TrackingSyncTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCarrierHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakeCarrierHandler.shipments = {}
+        FakeCarrierHandler.requests_seen = []
+
+        self.service = ShiprocketService()
+        self.service.BASE_URL = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.engine = TrackingSyncEngine(service=self.service, concurrency=4, batch_size=2)
+
+        self.customer = User.objects.create_user(email='customer@example.com', password='pass12345')
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        category = Category.objects.create(name='Screens', slug='screens')
+        self.product = Product.objects.create(
+            seller=self.seller, category=category, name='Display', sku='DSP-1',
+            description='Display', price=100, stock_quantity=10
+        )
+
+    def _shipped_order(self, awbs):
+        order = Order.objects.create(
+            user=self.customer, total_amount=100, shipping_address={}, status='SHIPPED'
+        )
+        for awb in awbs:
+            OrderItem.objects.create(
+                order=order, product=self.product, product_name='Display',
+                price=100, status='SHIPPED', tracking_number=awb
+            )
+        return order
+
+    @staticmethod
+    def _track(*statuses):
+        return [
+            {'date': f'2025-01-0{i + 1}', 'location': 'Hub', 'status': s, 'activity': s}
+            for i, s in enumerate(statuses)
+        ]
+
+    def test_updates_tracking_and_marks_order_delivered_once(self):
+        order = self._shipped_order(['AWB1', 'AWB2'])
+        FakeCarrierHandler.shipments = {
+            'AWB1': self._track('In Transit', 'Delivered'),
+            'AWB2': self._track('Delivered'),
+        }
+
+        stats = self.engine.sync()
+
+        self.assertEqual(stats['updated'], 2)
+        self.assertEqual(stats['orders_delivered'], 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'DELIVERED')
+        item = order.items.get(tracking_number='AWB1')
+        self.assertEqual(item.status, 'DELIVERED')
+        self.assertEqual(item.tracking_updates[-1]['status'], 'Delivered')
+
+    def test_delivery_keeps_cancelled_and_returned_items(self):
+        order = self._shipped_order(['AWB1'])
+        for status in ('CANCELLED', 'RETURNED'):
+            OrderItem.objects.create(
+                order=order, product=self.product, product_name='Display', price=100, status=status
+            )
+        FakeCarrierHandler.shipments = {'AWB1': self._track('Delivered')}
+
+        stats = self.engine.sync()
+
+        self.assertEqual(stats['orders_delivered'], 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'DELIVERED')
+        self.assertEqual(
+            sorted(order.items.values_list('status', flat=True)), ['CANCELLED', 'DELIVERED', 'RETURNED']
+        )
+
+    def test_item_cancelled_during_sync_is_not_delivered(self):
+        order = self._shipped_order(['AWB1'])
+        FakeCarrierHandler.shipments = {'AWB1': self._track('Delivered')}
+        checks = []
+
+        def cancel_then_check(status):
+            # The customer's cancellation commits after the carrier call, before the write
+            if not checks:
+                item = order.items.get()
+                item.status = 'CANCELLED'
+                item.save()
+            checks.append(status)
+            return is_delivered(status)
+
+        with mock.patch('shipping.tracking.is_delivered', side_effect=cancel_then_check):
+            stats = self.engine.sync()
+
+        self.assertEqual(stats['orders_delivered'], 0)
+        item = order.items.get()
+        self.assertEqual(item.status, 'CANCELLED')
+        self.assertEqual(item.tracking_updates[-1]['status'], 'Delivered')
+        counts = dict(SellerOrderStatusCount.objects.filter(seller=self.seller).values_list('status', 'count'))
+        self.assertEqual((counts.get('SHIPPED'), counts.get('CANCELLED'), counts.get('DELIVERED', 0)), (0, 1, 0))
+
+    def test_order_stays_shipped_while_items_in_transit(self):
+        order = self._shipped_order(['AWB1', 'AWB2'])
+        FakeCarrierHandler.shipments = {
+            'AWB1': self._track('Delivered'),
+            'AWB2': self._track('Out For Delivery'),
+        }
+
+        stats = self.engine.sync()
+
+        self.assertEqual(stats['orders_delivered'], 0)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'SHIPPED')
+        self.assertEqual(order.items.get(tracking_number='AWB2').status, 'SHIPPED')
+
+    def test_unchanged_payload_is_skipped(self):
+        self._shipped_order(['AWB1'])
+        FakeCarrierHandler.shipments = {'AWB1': self._track('In Transit')}
+
+        first = self.engine.sync()
+        second = self.engine.sync()
+
+        self.assertEqual(first['updated'], 1)
+        self.assertEqual(second['updated'], 0)
+        self.assertEqual(second['unchanged'], 1)
+
+    def test_shards_partition_items(self):
+        self._shipped_order(['AWB1', 'AWB2', 'AWB3', 'AWB4'])
+        FakeCarrierHandler.shipments = {awb: self._track('In Transit') for awb in ['AWB1', 'AWB2', 'AWB3', 'AWB4']}
+
+        checked = [self.engine.sync(shard=shard, num_shards=2)['checked'] for shard in range(2)]
+
+        self.assertEqual(sum(checked), 4)
+        self.assertEqual(sorted(FakeCarrierHandler.requests_seen), ['AWB1', 'AWB2', 'AWB3', 'AWB4'])
+
+
+@override_settings(SHIPROCKET_PICKUP_PINCODE='110001')
+class CourierQuoteCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCarrierHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        FakeCarrierHandler.serviceability_seen = []
+        self.service = ShiprocketService()
+        self.service.BASE_URL = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def test_weight_band_rounds_up(self):
+        self.assertEqual(weight_band(0.2), 0.5)
+        self.assertEqual(weight_band(1.2), 1.5)
+        self.assertEqual(weight_band(None), 0.5)
+
+    def test_shipments_on_same_lane_share_one_lookup(self):
+        courier_ids = self.service.recommend_couriers([
+            {'shipment_id': 1, 'delivery_pincode': '560001', 'weight': 0.4},
+            {'shipment_id': 2, 'delivery_pincode': '560034', 'weight': 0.5},
+            {'shipment_id': 3, 'delivery_pincode': '400001', 'weight': 0.5},
+        ])
+
+        self.assertEqual(courier_ids, {1: 20, 2: 20, 3: 20})
+        self.assertEqual(sorted(p[:3] for p in FakeCarrierHandler.serviceability_seen), ['400', '560'])
+
+        self.assertEqual(self.service.get_recommended_courier(4, delivery_pincode='560099'), 20)
+        self.assertEqual(len(FakeCarrierHandler.serviceability_seen), 2)
+
+    @override_settings(COURIER_QUOTE_TTL=-1)
+    def test_stale_quote_served_while_refresh_scheduled(self):
+        self.service.quotes.refresh('110001', '560001', 0.5)
+
+        with mock.patch('shipping.tasks.refresh_courier_quote.delay') as delay:
+            self.assertEqual(self.service.get_recommended_courier(1, delivery_pincode='560001'), 20)
+            self.assertEqual(self.service.get_recommended_courier(2, delivery_pincode='560001'), 20)
+
+        delay.assert_called_once_with('110001', '560001', 0.5, False)
+        self.assertEqual(len(FakeCarrierHandler.serviceability_seen), 1)
+
+    def test_cache_outage_falls_back_to_live_lookup(self):
+        with mock.patch('shipping.rate_cache.cache') as broken:
+            broken.get.side_effect = broken.set.side_effect = ConnectionError('redis down')
+            self.assertEqual(self.service.get_recommended_courier(1, delivery_pincode='560001'), 20)
+            self.assertEqual(self.service.get_recommended_courier(2, delivery_pincode='560001'), 20)
+
+        self.assertEqual(len(FakeCarrierHandler.serviceability_seen), 2)
+
+
+class ZoneIndexTests(TestCase):
+    def setUp(self):
+        from .models import ShippingZone, ShippingMethod
+        self.metro = ShippingZone.objects.create(name='Metro', countries='IN', regions='110, 400')
+        self.north = ShippingZone.objects.create(name='North', countries='IN', regions='11')
+        self.national = ShippingZone.objects.create(name='National', countries='IN', regions='')
+        ShippingMethod.objects.create(zone=self.metro, name='Metro Express', base_cost=40, cost_per_kg=10)
+        ShippingMethod.objects.create(zone=self.north, name='North Standard', base_cost=60, cost_per_kg=20)
+        ShippingMethod.objects.create(zone=self.national, name='Standard', base_cost=80, cost_per_kg=20)
+
+    def _rates(self, pincode, weight=1):
+        from rest_framework.test import APIClient
+        response = APIClient().post('/api/shipping/calculate/', {'pincode': pincode, 'weight': weight}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [m['name'] for m in response.data]
+
+    def test_longest_prefix_match_without_substring_false_positives(self):
+        self.assertEqual(self._rates('110001'), ['Metro Express'])
+        self.assertEqual(self._rates('111001'), ['North Standard'])
+        self.assertEqual(self._rates('560001'), ['Standard'])
+
+    def test_rate_lookup_is_served_from_index(self):
+        self._rates('110001')
+        with self.assertNumQueries(0):
+            self._rates('400001')
+
+    def test_cache_outage_rebuilds_index_from_database(self):
+        self._rates('110001')
+        with mock.patch('shipping.zone_index.cache') as broken:
+            broken.get.side_effect = broken.set.side_effect = ConnectionError('redis down')
+            self.assertEqual(self._rates('400001'), ['Metro Express'])
+
+            from .models import ShippingZone
+            ShippingZone.objects.filter(pk=self.metro.pk).update(regions='110')
+            self.metro.region_entries.filter(prefix='400').delete()
+            # No version to compare against: every lookup reads the database
+            self.assertEqual(self._rates('400001'), ['Standard'])
+
+    def test_zone_edit_invalidates_index(self):
+        from .services import ShippingCalculator
+        self.assertEqual(ShippingCalculator.identify_zone('560001'), self.national)
+
+        self.metro.regions = '110, 400, 560'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.metro.save()
+            # Until the admin's transaction commits, lookups keep the old index
+            self.assertEqual(ShippingCalculator.identify_zone('560001'), self.national)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(ShippingCalculator.identify_zone('560001'), self.metro)
+        self.assertEqual(
+            sorted(self.metro.region_entries.values_list('prefix', flat=True)), ['110', '400', '560']
+        )
+
+
+class BulkFulfilmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCarrierHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakeCarrierHandler.orders_created = []
+        FakeCarrierHandler.failing_orders = set()
+
+        self.service = ShiprocketService()
+        self.service.BASE_URL = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.engine = BulkFulfilmentEngine(service=self.service, concurrency=4, batch_size=1)
+
+        self.customer = User.objects.create_user(email='customer@example.com', password='pass12345')
+        self.seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        category = Category.objects.create(name='Screens', slug='screens')
+        self.product = Product.objects.create(
+            seller=self.seller, category=category, name='Display', sku='DSP-1',
+            description='Display', price=100, stock_quantity=10
+        )
+
+    def _order(self, items=1):
+        order = Order.objects.create(
+            user=self.customer, total_amount=100 * items, status='PROCESSING',
+            shipping_address={'full_name': 'Customer', 'postal_code': '560001'}
+        )
+        for _ in range(items):
+            OrderItem.objects.create(order=order, product=self.product, product_name='Display', price=100)
+        return order
+
+    def test_items_grouped_per_order_and_awbs_persisted(self):
+        first, second = self._order(items=2), self._order(items=1)
+        already_shipped = OrderItem.objects.create(
+            order=second, product=self.product, product_name='Display', price=100,
+            status='SHIPPED', tracking_number='OLD1'
+        )
+        item_ids = list(OrderItem.objects.values_list('id', flat=True))
+        progress = mock.Mock()
+
+        results = self.engine.run(item_ids, seller=self.seller, progress=progress)
+
+        self.assertEqual(len(FakeCarrierHandler.orders_created), 2)
+        self.assertEqual(results[already_shipped.id], 'SKIPPED')
+        self.assertEqual(list(results.values()).count('SHIPPED'), 3)
+        self.assertEqual(progress.call_count, 2)
+        awbs = set(first.items.values_list('tracking_number', flat=True))
+        self.assertEqual(len(awbs), 1)
+        self.assertTrue(awbs.pop().startswith('AWB'))
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'SHIPPED')
+
+    def test_mixed_order_ships_without_touching_closed_items(self):
+        order = self._order(items=1)
+        for status in ('CANCELLED', 'RETURNED'):
+            OrderItem.objects.create(order=order, product=self.product, product_name='Display', price=100, status=status)
+
+        results = self.engine.run(order.items.values_list('id', flat=True), seller=self.seller)
+
+        self.assertEqual(list(results.values()).count('SHIPPED'), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'SHIPPED')
+        self.assertEqual(
+            sorted(order.items.values_list('status', flat=True)), ['CANCELLED', 'RETURNED', 'SHIPPED']
+        )
+
+    def test_item_cancelled_mid_job_is_not_shipped(self):
+        order = self._order(items=2)
+        cancelled, kept = order.items.order_by('id')
+        claim = self.engine._claim
+
+        def claim_then_cancel(packages, seller):
+            claimed = claim(packages, seller)
+            # The customer cancels while the job is talking to Shiprocket
+            OrderItem.objects.filter(pk=cancelled.pk).update(status='CANCELLED')
+            return claimed
+
+        with mock.patch.object(self.engine, '_claim', side_effect=claim_then_cancel):
+            results = self.engine.run([cancelled.id, kept.id], seller=self.seller)
+
+        self.assertEqual((results[cancelled.id], results[kept.id]), ('SKIPPED', 'SHIPPED'))
+        cancelled.refresh_from_db()
+        self.assertEqual((cancelled.status, cancelled.tracking_number, cancelled.ship_claimed_at), ('CANCELLED', None, None))
+        kept.refresh_from_db()
+        self.assertEqual((kept.status, kept.ship_claimed_at), ('SHIPPED', None))
+
+    def test_items_claimed_by_another_job_are_skipped(self):
+        claimed, expired = self._order(), self._order()
+        claimed.items.update(ship_claimed_at=timezone.now())
+        expired.items.update(ship_claimed_at=timezone.now() - timedelta(hours=1))
+
+        results = self.engine.run(OrderItem.objects.values_list('id', flat=True), seller=self.seller)
+
+        self.assertEqual(results[claimed.items.get().id], 'SKIPPED')
+        self.assertEqual(results[expired.items.get().id], 'SHIPPED')
+        self.assertEqual(FakeCarrierHandler.orders_created, [f"{expired.order_id}-{self.seller.id}"])
+
+    def test_failed_package_reported_per_item(self):
+        ok, failing = self._order(), self._order()
+        FakeCarrierHandler.failing_orders = {f"{failing.order_id}-{self.seller.id}"}
+
+        results = self.engine.run(OrderItem.objects.values_list('id', flat=True), seller=self.seller)
+
+        self.assertEqual(results[ok.items.get().id], 'SHIPPED')
+        self.assertEqual(results[failing.items.get().id], 'FAILED')
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, 'PROCESSING')
+        self.assertFalse(failing.items.get().tracking_number)
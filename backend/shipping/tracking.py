@@ -0,0 +1,165 @@
+"""
+Batched shipment tracking sync.
+
+Shipped items are split into shards so several workers can poll the carrier
+in parallel. Each shard fetches tracking through the pooled Shiprocket session
+with bounded concurrency, skips payloads that have not changed, and writes
+back only the fields that did.
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Mod
+
+from orders.models import Order, OrderItem
+from sellers.order_inbox import apply_count_changes, take_count_changes
+from .shiprocket_service import shiprocket_service
+
+logger = logging.getLogger(__name__)
+
+# Item statuses that no longer block an order from being marked delivered
+SETTLED_ITEM_STATUSES = [
+    OrderItem.ItemStatus.DELIVERED,
+    OrderItem.ItemStatus.CANCELLED,
+    OrderItem.ItemStatus.RETURNED,
+]
+
+
+def payload_hash(updates):
+    """Stable hash of a tracking payload, used to skip unchanged responses"""
+    encoded = json.dumps(updates or [], sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def is_delivered(carrier_status):
+    status = (carrier_status or '').upper()
+    return 'DELIVERED' in status and 'UNDELIVERED' not in status
+
+
+class TrackingSyncEngine:
+    """Polls the carrier for in-flight shipments and applies changes in bulk"""
+
+    def __init__(self, service=None, concurrency=None, batch_size=None):
+        self.service = service or shiprocket_service
+        self.concurrency = concurrency or settings.SHIPPING_TRACKING_CONCURRENCY
+        self.batch_size = batch_size or settings.SHIPPING_TRACKING_BATCH_SIZE
+
+    @staticmethod
+    def active_items(shard=0, num_shards=1):
+        """Shipped items with a tracking number, restricted to one shard"""
+        queryset = OrderItem.objects.filter(
+            status=OrderItem.ItemStatus.SHIPPED,
+            tracking_number__isnull=False
+        ).exclude(tracking_number='')
+
+        if num_shards > 1:
+            queryset = queryset.annotate(shard=Mod('id', num_shards)).filter(shard=shard)
+
+        return queryset.order_by('id')
+
+    def sync(self, shard=0, num_shards=1):
+        """Sync one shard and return counters for logging"""
+        stats = {'checked': 0, 'unchanged': 0, 'updated': 0, 'failed': 0, 'orders_delivered': 0}
+
+        # Fetch the token once up front so worker threads share it
+        if not self.service.get_token():
+            logger.error(f"Tracking sync shard {shard}/{num_shards} skipped: carrier auth failed")
+            return stats
+
+        item_ids = list(self.active_items(shard, num_shards).values_list('id', flat=True))
+        delivered_order_ids = set()
+
+        for start in range(0, len(item_ids), self.batch_size):
+            chunk = item_ids[start:start + self.batch_size]
+            items = list(
+                OrderItem.objects.filter(id__in=chunk)
+                .only('id', 'order_id', 'seller_id', 'price', 'quantity', 'status', 'tracking_number', 'tracking_updates')
+            )
+            delivered_order_ids |= self._sync_batch(items, stats)
+
+        if delivered_order_ids:
+            stats['orders_delivered'] = self._mark_orders_delivered(delivered_order_ids)
+
+        return stats
+
+    def _fetch(self, item):
+        try:
+            return item, self.service.track_shipment(item.tracking_number), None
+        except Exception as e:
+            return item, None, e
+
+    def _sync_batch(self, items, stats):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self._fetch, items))
+
+        tracking_changed = []
+        status_changed = []
+
+        for item, updates, error in results:
+            stats['checked'] += 1
+            if error is not None:
+                logger.warning(f"Failed to update tracking for item {item.id}: {error}")
+                stats['failed'] += 1
+                continue
+            if not updates:
+                continue
+            if payload_hash(updates) == payload_hash(item.tracking_updates):
+                stats['unchanged'] += 1
+                continue
+
+            item.tracking_updates = updates
+            if is_delivered(updates[-1].get('status')):
+                status_changed.append(item)
+            else:
+                tracking_changed.append(item)
+
+        with transaction.atomic():
+            # Items cancelled or returned during the HTTP calls keep their status
+            current = dict(
+                OrderItem.objects.select_for_update().filter(
+                    id__in=[item.id for item in status_changed],
+                    status=OrderItem.ItemStatus.SHIPPED,
+                ).values_list('id', 'status')
+            )
+            tracking_changed += [item for item in status_changed if item.id not in current]
+            status_changed = [item for item in status_changed if item.id in current]
+            for item in status_changed:
+                # Count the move from the status just read, not the one loaded before the calls
+                item._loaded_status = current[item.id]
+                item.status = OrderItem.ItemStatus.DELIVERED
+
+            if tracking_changed:
+                OrderItem.objects.bulk_update(tracking_changed, ['tracking_updates'])
+            if status_changed:
+                OrderItem.objects.bulk_update(status_changed, ['tracking_updates', 'status'])
+                apply_count_changes(take_count_changes(status_changed))
+
+        stats['updated'] += len(tracking_changed) + len(status_changed)
+        return {item.order_id for item in status_changed}
+
+    @staticmethod
+    def _mark_orders_delivered(order_ids):
+        """
+        Flip each order whose items have all settled to DELIVERED with a single
+        save, so notification and settlement signals fire once per order. The
+        items already carry their own final status: cancelled or returned ones
+        must not be pushed to DELIVERED (and paid out) by the item sync.
+        """
+        orders = Order.objects.filter(id__in=order_ids).exclude(
+            status=Order.Status.DELIVERED
+        ).annotate(
+            open_items=Count('items', filter=~Q(items__status__in=SETTLED_ITEM_STATUSES))
+        ).filter(open_items=0)
+
+        count = 0
+        for order in orders:
+            order.status = Order.Status.DELIVERED
+            order._items_synced = True
+            order.save(update_fields=['status', 'updated_at'])
+            count += 1
+        return count
@@ -3,6 +3,7 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from .serializers import ShippingMethodSerializer, ShipmentSerializer
 from .models import Shipment, ShippingZone, ShippingMethod # Added Missing Imports
+from .zone_index import get_zone_index
 from orders.models import Order
 from notifications.services import NotificationService
 
@@ -26,26 +27,17 @@ class ShippingRateView(APIView):
             return Response({"error": "Pincode is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         # --- 1. Identify Zone Logic ---
-        # Logic: Look for a zone where the 'regions' field contains the Pincode prefix (first 3 digits)
-        # Example: Pincode 110001 -> Prefix 110
-        prefix = pincode[:3]
-        
-        zone = ShippingZone.objects.filter(regions__contains=prefix).first()
-        
-        # Fallback: If no specific zone found, look for a 'National' or 'Default' zone
-        # or simply take the first available zone to ensure checkout doesn't block.
-        if not zone:
-            zone = ShippingZone.objects.filter(name__icontains='National').first()
-        
-        if not zone:
-            # Ultimate fallback: Just grab any zone so the user can checkout
-            zone = ShippingZone.objects.first()
+        # Longest pincode-prefix match from the cached zone index
+        # Example: Pincode 110001 -> region 110. Falls back to the 'National'
+        # zone (or any zone) so checkout doesn't block.
+        index = get_zone_index()
+        zone = index.zone_for(pincode)
 
         if not zone:
             return Response({"error": "Shipping not available for this area."}, status=status.HTTP_404_NOT_FOUND)
 
         # --- 2. Get Methods for Zone ---
-        methods = ShippingMethod.objects.filter(zone=zone, is_active=True)
+        methods = index.methods_for(zone)
         
         # --- 3. Serialize ---
         # We pass 'weight' to context so the Serializer's get_total_cost method works
@@ -0,0 +1,107 @@
+"""
+Compiled pincode-prefix -> shipping zone index.
+
+Built once per process from ShippingZoneRegion rows (plus each zone's active
+methods) and reused until a zone, region or method edit bumps the version key
+in the shared cache once its transaction commits. Lookups are a handful of dict probes (longest prefix
+first) instead of LIKE scans over the regions text. While the cache is
+unreachable there is no version to trust, so each lookup rebuilds from the
+database.
+"""
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'shipping_zone_index:version'
+
+
+class ZoneIndex:
+    def __init__(self, zones, prefixes, methods, fallback_id):
+        self.zones = zones            # {zone_id: ShippingZone}
+        self.prefixes = prefixes      # {prefix: zone_id}
+        self.methods = methods        # {zone_id: [ShippingMethod, ...]}
+        self.fallback_id = fallback_id
+        self.max_prefix = max((len(p) for p in prefixes), default=0)
+
+    @classmethod
+    def build(cls):
+        from .models import ShippingZone, ShippingZoneRegion, ShippingMethod
+
+        zones = {zone.id: zone for zone in ShippingZone.objects.order_by('id')}
+
+        prefixes = {}
+        for prefix, zone_id in ShippingZoneRegion.objects.order_by('zone_id').values_list('prefix', 'zone_id'):
+            # First zone wins when a prefix is listed twice, like the old .first() lookup
+            prefixes.setdefault(prefix, zone_id)
+
+        methods = {}
+        for method in ShippingMethod.objects.filter(is_active=True).order_by('id'):
+            methods.setdefault(method.zone_id, []).append(method)
+
+        national = [z for z in zones.values() if 'national' in z.name.lower()]
+        exact = [z for z in national if z.name == 'National']
+        fallback = (exact or national or list(zones.values()) or [None])[0]
+
+        return cls(zones, prefixes, methods, fallback.id if fallback else None)
+
+    def match(self, pincode):
+        """Zone whose region prefix is the longest match for the pincode, or None"""
+        pincode = str(pincode or '').strip()
+        for length in range(min(len(pincode), self.max_prefix), 0, -1):
+            zone_id = self.prefixes.get(pincode[:length])
+            if zone_id is not None:
+                return self.zones[zone_id]
+        return None
+
+    def zone_for(self, pincode):
+        """Matching zone, falling back to the National (or first) zone"""
+        return self.match(pincode) or self.zones.get(self.fallback_id)
+
+    def methods_for(self, zone):
+        return list(self.methods.get(zone.id, [])) if zone else []
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    try:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(VERSION_KEY, version, None):
+                version = cache.get(VERSION_KEY)
+        return version
+    except Exception as e:
+        logger.warning(f"Zone index version lookup failed: {e}")
+        return None
+
+
+def get_zone_index():
+    """Process-wide zone index, rebuilt when the shared version key changes"""
+    global _index, _index_version
+    version = _current_version()
+    if _index is not None and version is not None and version == _index_version:
+        return _index
+
+    with _lock:
+        if _index is None or version is None or version != _index_version:
+            _index = ZoneIndex.build()
+            _index_version = version
+    return _index
+
+
+def invalidate_zone_index():
+    """Force every process to rebuild its index on next lookup"""
+    global _index
+    _index = None
+    try:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Zone index invalidation failed: {e}")
@@ -0,0 +1,264 @@
+"""
+Query budgets per API endpoint.
+
+Every endpoint in QUERY_BUDGETS is requested against a dataset built at each
+size in DATASET_SIZES (N products, cart lines, order items, ...). A request
+must issue the same number of queries at every size, so an N+1 fails here
+before it reaches production, and no more than its budget. Budgets are the
+current counts: lower them when an endpoint gets cheaper, and raise one only
+with a reason in the commit.
+
+Set QUERY_BUDGET_REPORT to a file path to write the measured table (markdown)
+for CI to publish.
+"""
+import os
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem
+from catalog.models import Brand, Category, DeviceModel, Product, ProductImage
+from notifications.models import Notification
+from orders.models import Order, OrderItem
+from shipping.models import Shipment
+from reviews.models import Review
+from seo.queue import drain as drain_seo_queue
+from wishlist.models import WishlistItem
+
+User = get_user_model()
+
+DATASET_SIZES = (1, 5)
+
+QUERY_BUDGETS = {
+    'GET /api/catalog/products/': 4,
+    'GET /api/catalog/products/<slug>/': 4,  # SEO payload joined in
+    'GET /api/catalog/categories/': 1,
+    'GET /api/cart/': 3,
+    'GET /api/wishlist/': 2,
+    'GET /api/wishlist/check/': 0,  # per-user Redis set
+    'GET /api/reviews/': 0,  # cached first page
+    'GET /api/reviews/ (cursor page)': 2,
+    'GET /api/notifications/': 2,
+    'GET /api/sellers/orders/': 2,  # page + per-status counters
+    'GET /api/orders/': 3,
+    'GET /api/sellers/top-sellers/': 0,  # cached leaderboard
+}
+
+_results = {}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        report = os.environ.get('QUERY_BUDGET_REPORT')
+        if report and _results:
+            with open(report, 'w') as f:
+                f.write(budget_table())
+
+    # --- Datasets ---
+
+    def make_seller(self):
+        seller = User.objects.create_user(email='budget-seller@example.com', password='SellerPass123!', role='SELLER')
+        profile = seller.seller_profile
+        profile.business_name = 'Budget Parts'
+        profile.bank_account_number = '1234567890'
+        profile.bank_ifsc_code = 'SBIN0001234'
+        profile.save()
+        return seller
+
+    def make_customer(self, n=0):
+        return User.objects.create_user(
+            email=f'budget-customer-{n}@example.com', password='BuyerPass123!', role='CUSTOMER', first_name=f'Buyer{n}'
+        )
+
+    def make_products(self, n, seller=None):
+        seller = seller or self.make_seller()
+        brand = Brand.objects.create(name='Budget Brand')
+        products = []
+        for i in range(n):
+            category = Category.objects.create(name=f'Budget Category {i}', slug=f'budget-category-{i}')
+            product = Product.objects.create(
+                seller=seller, category=category, brand=brand, name=f'Budget Part {i}', sku=f'BUDGET-{i}',
+                description='Replacement part', price=Decimal('500'), stock_quantity=10, is_active=True,
+            )
+            ProductImage.objects.create(product=product, image=f'products/budget-{i}-a.jpg')
+            ProductImage.objects.create(product=product, image=f'products/budget-{i}-b.jpg', is_feature=True)
+            products.append(product)
+        return products
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    # --- Endpoints (each returns the client and URL to request) ---
+
+    def product_list(self, n):
+        seller = self.make_seller()
+        self.make_products(n, seller)
+        return self.client_for(), f'/api/catalog/products/?seller={seller.id}'
+
+    def product_detail(self, n):
+        product = self.make_products(1)[0]
+        brand = Brand.objects.create(name='Device Brand')
+        for i in range(n):
+            ProductImage.objects.create(product=product, image=f'products/detail-{i}.jpg')
+            product.compatible_devices.add(DeviceModel.objects.create(brand=brand, name=f'Model {i}'))
+        drain_seo_queue()  # steady state: the background render has run
+        return self.client_for(), f'/api/catalog/products/{product.slug}/'
+
+    def categories(self, n):
+        self.make_products(n)
+        return self.client_for(), '/api/catalog/categories/'
+
+    def cart(self, n):
+        customer = self.make_customer()
+        cart = Cart.objects.create(user=customer)
+        for product in self.make_products(n):
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        return self.client_for(customer), '/api/cart/'
+
+    def wishlist(self, n):
+        customer = self.make_customer()
+        for product in self.make_products(n):
+            WishlistItem.objects.create(user=customer, product=product)
+        return self.client_for(customer), '/api/wishlist/'
+
+    def wishlist_status(self, n):
+        client, url = self.wishlist(n)
+        ids = ','.join(str(pk) for pk in Product.objects.values_list('pk', flat=True))
+        return client, f'{url}check/?ids={ids}'
+
+    def reviews(self, n):
+        product = self.make_products(1)[0]
+        for i in range(n):
+            Review.objects.create(user=self.make_customer(i), product=product, rating=4, comment='Fits well')
+        return self.client_for(), f'/api/reviews/?product_slug={product.slug}'
+
+    def review_page(self, n):
+        client, url = self.reviews(n)
+        return client, f'{url}&ordering=helpful&page_size=10'
+
+    def notifications(self, n):
+        customer = self.make_customer()
+        for i in range(n):
+            Notification.objects.create(user=customer, title=f'Update {i}', message='Order shipped')
+        return self.client_for(customer), '/api/notifications/'
+
+    def seller_orders(self, n):
+        seller = self.make_seller()
+        for i, product in enumerate(self.make_products(n, seller)):
+            order = Order.objects.create(
+                user=self.make_customer(i), total_amount=product.price, shipping_address={'postal_code': '560001'}
+            )
+            OrderItem.objects.create(
+                order=order, product=product, seller=seller, product_name=product.name,
+                price=product.price, quantity=1,
+            )
+        return self.client_for(seller), '/api/sellers/orders/'
+
+    def order_history(self, n):
+        customer = self.make_customer()
+        products = self.make_products(3)
+        for i in range(n):
+            order = Order.objects.create(
+                user=customer, total_amount=1500, status='PROCESSING', shipping_address={'postal_code': '560001'}
+            )
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, product_name=product.name, quantity=1)
+            Shipment.objects.create(order=order, tracking_number=f'BUDGET-TRK-{i}', carrier_name='Bluedart')
+        return self.client_for(customer), '/api/orders/'
+
+    def top_sellers(self, n):
+        from sellers.models import SellerStats
+        for i in range(n):
+            seller = User.objects.create_user(email=f'top-{i}@example.com', password='SellerPass123!', role='SELLER')
+            SellerStats.objects.create(seller=seller, delivered_items=20, rating_sum=50, review_count=10)
+        return self.client_for(), '/api/sellers/top-sellers/'
+
+    # --- Measurement ---
+
+    def count_queries(self, build, n):
+        """Queries for a warm request against a dataset of size n (rolled back afterwards)"""
+        with transaction.atomic():
+            cache.clear()
+            client, url = build(n)
+            self.assertEqual(client.get(url).status_code, 200, url)
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            transaction.set_rollback(True)
+        return len(ctx.captured_queries), [q['sql'] for q in ctx.captured_queries]
+
+    def check_budget(self, endpoint, build):
+        counts, largest = {}, None
+        for n in DATASET_SIZES:
+            counts[n], largest = self.count_queries(build, n)
+        budget = QUERY_BUDGETS[endpoint]
+        _results[endpoint] = (budget, counts)
+
+        smallest, biggest = counts[DATASET_SIZES[0]], counts[DATASET_SIZES[-1]]
+        queries = '\n'.join(largest)
+        self.assertEqual(
+            smallest, biggest,
+            f"{endpoint}: queries grow with dataset size {counts} (N+1). Queries at N={DATASET_SIZES[-1]}:\n{queries}"
+        )
+        self.assertLessEqual(
+            biggest, budget,
+            f"{endpoint}: {biggest} queries exceeds budget of {budget}. Queries:\n{queries}"
+        )
+
+    def test_product_list(self):
+        self.check_budget('GET /api/catalog/products/', self.product_list)
+
+    def test_product_detail(self):
+        self.check_budget('GET /api/catalog/products/<slug>/', self.product_detail)
+
+    def test_categories(self):
+        self.check_budget('GET /api/catalog/categories/', self.categories)
+
+    def test_cart(self):
+        self.check_budget('GET /api/cart/', self.cart)
+
+    def test_wishlist(self):
+        self.check_budget('GET /api/wishlist/', self.wishlist)
+
+    def test_wishlist_status(self):
+        self.check_budget('GET /api/wishlist/check/', self.wishlist_status)
+
+    def test_reviews(self):
+        self.check_budget('GET /api/reviews/', self.reviews)
+
+    def test_review_page(self):
+        self.check_budget('GET /api/reviews/ (cursor page)', self.review_page)
+
+    def test_notifications(self):
+        self.check_budget('GET /api/notifications/', self.notifications)
+
+    def test_seller_orders(self):
+        self.check_budget('GET /api/sellers/orders/', self.seller_orders)
+
+    def test_top_sellers(self):
+        self.check_budget('GET /api/sellers/top-sellers/', self.top_sellers)
+
+    def test_order_history(self):
+        self.check_budget('GET /api/orders/', self.order_history)
+
+
+def budget_table():
+    sizes = ' | '.join(f'N={n}' for n in DATASET_SIZES)
+    lines = [f'| Endpoint | Budget | {sizes} | Status |', '|' + ' --- |' * (len(DATASET_SIZES) + 3)]
+    for endpoint in sorted(_results):
+        budget, counts = _results[endpoint]
+        values = [counts[n] for n in DATASET_SIZES]
+        ok = len(set(values)) == 1 and values[-1] <= budget
+        cells = ' | '.join(str(v) for v in values)
+        lines.append(f"| {endpoint} | {budget} | {cells} | {'ok' if ok else 'FAIL'} |")
+    return '\n'.join(lines) + '\n'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Wallet, WalletTransaction, Withdrawal
+from .models import Wallet, WalletTransaction, Withdrawal, WalletBalanceSnapshot
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
@@ -16,6 +16,13 @@ class WalletTransactionAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
 
+@admin.register(WalletBalanceSnapshot)
+class WalletBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'date', 'closing_balance', 'total_credits', 'total_debits', 'transaction_count']
+    list_filter = ['date']
+    search_fields = ['wallet__user__email']
+    date_hierarchy = 'date'
+
 @admin.register(Withdrawal)
 class WithdrawalAdmin(admin.ModelAdmin):
     list_display = ['wallet', 'amount', 'status', 'requested_at', 'processed_at']
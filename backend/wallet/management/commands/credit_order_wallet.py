@@ -5,6 +5,7 @@ from wallet.models import WalletTransaction
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 from django.conf import settings
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -94,4 +95,7 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'  ✗ Failed: {str(e)}'))
         
+        # Keep the periodic settlement from crediting this order again
+        order.items.filter(settled_at__isnull=True).update(settled_at=timezone.now())
+        
         self.stdout.write(self.style.SUCCESS(f'\n✓ Wallet credit completed for order {order_id}'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_wallettransaction_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_credits', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('total_debits', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('last_transaction_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='wallet.wallet')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['wallet', '-date'], name='wallet_wall_wallet__71262e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'date'), name='unique_wallet_snapshot_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_in_flight_claims(apps, schema_editor):
+    # Claimed before claims were timestamped; the requeue counts from now
+    Withdrawal = apps.get_model('wallet', 'Withdrawal')
+    Withdrawal.objects.filter(status='PROCESSING', razorpay_payout_id='').update(claimed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0003_walletbalancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='withdrawal',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a payout worker took it off the queue', null=True),
+        ),
+        migrations.RunPython(stamp_in_flight_claims, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,9 @@ class WalletTransaction(models.Model):
     
     description = models.TextField()
     
+    # Set by batch postings (e.g. settlement) so a retried run can't post twice
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -92,6 +95,7 @@ class Withdrawal(models.Model):
     
     requested_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a payout worker took it off the queue")
     
     class Meta:
         ordering = ['-requested_at']
@@ -102,3 +106,29 @@ class Withdrawal(models.Model):
     
     def __str__(self):
         return f"{self.wallet.user.email} - ₹{self.amount} ({self.status})"
+
+
+class WalletBalanceSnapshot(models.Model):
+    """End-of-day balance checkpoint per wallet, used by statements and reconciliation"""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    
+    closing_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    total_credits = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    total_debits = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    transaction_count = models.PositiveIntegerField(default=0)
+    last_transaction_id = models.BigIntegerField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'date'], name='unique_wallet_snapshot_per_day')
+        ]
+        indexes = [
+            models.Index(fields=['wallet', '-date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallet.user.email} - {self.date}: ₹{self.closing_balance}"
@@ -1,4 +1,5 @@
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 from decimal import Decimal
 from .models import Wallet, WalletTransaction
 import logging
@@ -14,63 +15,121 @@ class WalletService:
         wallet, created = Wallet.objects.get_or_create(user=user)
         return wallet
     
+    @staticmethod
+    def _apply_delta(wallet_id, delta):
+        """
+        Atomically add `delta` to one wallet and return (balance_after, is_locked).
+        The UPDATE takes the row lock, so concurrent postings serialize on it;
+        a wallet driven negative is locked in the same statement.
+        Returns None if the wallet is locked.
+        """
+        table = connection.ops.quote_name(Wallet._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET balance = balance + %s, "
+                f"is_locked = CASE WHEN balance + %s < 0 THEN %s ELSE is_locked END, "
+                f"updated_at = %s "
+                f"WHERE id = %s AND is_locked = %s "
+                f"RETURNING balance, is_locked",
+                [delta, delta, True, now, wallet_id, False]
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return Decimal(str(row[0])).quantize(Decimal('0.01')), bool(row[1])
+    
     @staticmethod
     @transaction.atomic
-    def credit_wallet(user, amount, source, order=None, description=""):
-        """Credit amount to user's wallet"""
-        wallet = WalletService.get_or_create_wallet(user)
+    def post_entries(entries):
+        """
+        Apply several ledger postings (possibly across wallets) in one transaction.
         
-        if wallet.is_locked:
-            raise ValueError("Wallet is locked")
+        Each entry is a dict with user, amount, transaction_type ('CREDIT' or
+        'DEBIT'), source and optional order (or order_id), withdrawal,
+        description and idempotency_key (entries whose key was already posted
+        are skipped).
+        Balances move with one UPDATE per wallet, transactions are written with
+        one bulk insert. Raises ValueError (rolling everything back) if any
+        wallet is locked.
+        Returns: {user_id: Wallet} with the updated balances
+        """
+        entries = [
+            dict(e, amount=Decimal(str(e['amount'])).quantize(Decimal('0.01')))
+            for e in entries if e.get('amount') is not None
+        ]
+        
+        # Entries carrying an idempotency key are posted at most once
+        keys = [e['idempotency_key'] for e in entries if e.get('idempotency_key')]
+        if keys:
+            posted = set(WalletTransaction.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True))
+            entries = [e for e in entries if e.get('idempotency_key') not in posted]
+        
+        users = {entry['user'].id: entry['user'] for entry in entries}
+        
+        wallets = {w.user_id: w for w in Wallet.objects.filter(user_id__in=users)}
+        for user_id, user in users.items():
+            if user_id not in wallets:
+                wallets[user_id] = WalletService.get_or_create_wallet(user)
+        
+        deltas = {}
+        for entry in entries:
+            amount = entry['amount']
+            signed = amount if entry['transaction_type'] == 'CREDIT' else -amount
+            deltas[entry['user'].id] = deltas.get(entry['user'].id, Decimal('0')) + signed
+        
+        # Update wallets in id order so concurrent batches can't deadlock
+        running = {}
+        for user_id in sorted(deltas, key=lambda uid: wallets[uid].id):
+            wallet = wallets[user_id]
+            result = WalletService._apply_delta(wallet.id, deltas[user_id])
+            if result is None:
+                raise ValueError("Wallet is locked")
+            wallet.balance, wallet.is_locked = result
+            running[user_id] = wallet.balance - deltas[user_id]
+            if wallet.is_locked:
+                logger.warning(f"Wallet locked for {users[user_id].email} due to negative balance: ₹{wallet.balance}")
         
-        balance_before = wallet.balance
-        wallet.balance += Decimal(str(amount))
-        wallet.save()
+        transactions = []
+        for entry in entries:
+            user_id = entry['user'].id
+            amount = entry['amount']
+            balance_before = running[user_id]
+            running[user_id] += amount if entry['transaction_type'] == 'CREDIT' else -amount
+            transactions.append(WalletTransaction(
+                wallet=wallets[user_id],
+                transaction_type=entry['transaction_type'],
+                source=entry['source'],
+                amount=amount,
+                balance_before=balance_before,
+                balance_after=running[user_id],
+                order_id=entry['order'].pk if entry.get('order') else entry.get('order_id'),
+                withdrawal=entry.get('withdrawal'),
+                description=entry.get('description', ''),
+                idempotency_key=entry.get('idempotency_key')
+            ))
+        WalletTransaction.objects.bulk_create(transactions)
         
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type='CREDIT',
-            source=source,
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=wallet.balance,
-            order=order,
-            description=description
-        )
+        return {user_id: wallets[user_id] for user_id in users}
+    
+    @staticmethod
+    def credit_wallet(user, amount, source, order=None, description=""):
+        """Credit amount to user's wallet"""
+        wallet = WalletService.post_entries([{
+            'user': user, 'amount': amount, 'transaction_type': 'CREDIT',
+            'source': source, 'order': order, 'description': description
+        }])[user.id]
         
         logger.info(f"Credited ₹{amount} to {user.email} wallet. New balance: ₹{wallet.balance}")
         return wallet
     
     @staticmethod
-    @transaction.atomic
     def debit_wallet(user, amount, source, order=None, withdrawal=None, description=""):
         """Debit amount from user's wallet"""
-        wallet = WalletService.get_or_create_wallet(user)
-        
-        if wallet.is_locked:
-            raise ValueError("Wallet is locked")
-        
-        balance_before = wallet.balance
-        wallet.balance -= Decimal(str(amount))
-        wallet.save()
-        
-        # Lock wallet if negative balance
-        if wallet.balance < 0:
-            wallet.is_locked = True
-            wallet.save()
-            logger.warning(f"Wallet locked for {user.email} due to negative balance: ₹{wallet.balance}")
-        
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type='DEBIT',
-            source=source,
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=wallet.balance,
-            order=order,
-            withdrawal=withdrawal,
-            description=description
-        )
+        wallet = WalletService.post_entries([{
+            'user': user, 'amount': amount, 'transaction_type': 'DEBIT',
+            'source': source, 'order': order, 'withdrawal': withdrawal, 'description': description
+        }])[user.id]
         
         logger.info(f"Debited ₹{amount} from {user.email} wallet. New balance: ₹{wallet.balance}")
         return wallet
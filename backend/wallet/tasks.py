@@ -0,0 +1,15 @@
+from celery import shared_task
+from .statements import snapshot_balances
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def snapshot_wallet_balances():
+    """Record yesterday's end-of-day balance for every wallet with activity"""
+    try:
+        count = snapshot_balances()
+        return f"Snapshotted {count} wallets"
+    except Exception as e:
+        logger.error(f"Wallet snapshot failed: {e}")
+        return f"Wallet snapshot failed: {e}"
@@ -61,3 +61,97 @@ class WalletTests(TestCase):
         response = self.client.post('/api/wallet/withdrawals/', {'amount': '5000.00'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertTrue('error' in response.data or 'message' in response.data)
+
+
+class WalletLedgerTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(email='ledger-seller@example.com', password='pass12345', role='SELLER')
+        self.admin = User.objects.create_user(email='ledger-admin@example.com', password='pass12345', role='ADMIN')
+
+    def test_postings_apply_on_top_of_stored_balance(self):
+        from .services import WalletService
+        stale = Wallet.objects.get(user=self.seller)
+        WalletService.credit_wallet(self.seller, Decimal('100.00'), 'ORDER_PAYMENT')
+        WalletService.credit_wallet(self.seller, Decimal('50.00'), 'ORDER_PAYMENT')
+        wallet = WalletService.debit_wallet(self.seller, Decimal('30.00'), 'WITHDRAWAL')
+
+        self.assertEqual(wallet.balance, Decimal('120.00'))
+        stale.refresh_from_db()
+        self.assertEqual(stale.balance, Decimal('120.00'))
+        last = WalletTransaction.objects.filter(wallet=stale).order_by('-id').first()
+        self.assertEqual((last.balance_before, last.balance_after), (Decimal('150.00'), Decimal('120.00')))
+
+    def test_negative_debit_locks_wallet_in_same_update(self):
+        from .services import WalletService
+        wallet = WalletService.debit_wallet(self.seller, Decimal('10.00'), 'ORDER_REFUND')
+
+        self.assertTrue(wallet.is_locked)
+        self.assertTrue(Wallet.objects.get(user=self.seller).is_locked)
+        with self.assertRaises(ValueError):
+            WalletService.credit_wallet(self.seller, Decimal('10.00'), 'ORDER_PAYMENT')
+
+    def test_multi_wallet_posting_is_all_or_nothing(self):
+        from .services import WalletService
+        wallets = WalletService.post_entries([
+            {'user': self.seller, 'amount': Decimal('90.00'), 'transaction_type': 'CREDIT', 'source': 'ORDER_PAYMENT'},
+            {'user': self.admin, 'amount': Decimal('10.00'), 'transaction_type': 'CREDIT', 'source': 'COMMISSION'},
+        ])
+        self.assertEqual(wallets[self.seller.id].balance, Decimal('90.00'))
+        self.assertEqual(wallets[self.admin.id].balance, Decimal('10.00'))
+
+        Wallet.objects.filter(user=self.admin).update(is_locked=True)
+        with self.assertRaises(ValueError):
+            WalletService.post_entries([
+                {'user': self.seller, 'amount': Decimal('90.00'), 'transaction_type': 'CREDIT', 'source': 'ORDER_PAYMENT'},
+                {'user': self.admin, 'amount': Decimal('10.00'), 'transaction_type': 'CREDIT', 'source': 'COMMISSION'},
+            ])
+        self.assertEqual(Wallet.objects.get(user=self.seller).balance, Decimal('90.00'))
+        self.assertEqual(WalletTransaction.objects.count(), 2)
+
+
+class WalletStatementTests(TestCase):
+    def setUp(self):
+        from .services import WalletService
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='statement@example.com', password='pass12345', role='SELLER')
+        WalletService.credit_wallet(self.user, Decimal('500.00'), 'ORDER_PAYMENT', description='Sale')
+        WalletService.debit_wallet(self.user, Decimal('200.00'), 'WITHDRAWAL', description='Payout, bank "A"')
+        self.client.force_authenticate(user=self.user)
+
+    def test_daily_snapshot_totals(self):
+        from django.utils import timezone
+        from .models import WalletBalanceSnapshot
+        from .statements import snapshot_balances
+        today = timezone.localdate()
+
+        snapshot_balances(today)
+        snapshot_balances(today)  # re-run upserts in place
+
+        snapshot = WalletBalanceSnapshot.objects.get(wallet__user=self.user, date=today)
+        self.assertEqual(snapshot.closing_balance, Decimal('300.00'))
+        self.assertEqual((snapshot.total_credits, snapshot.total_debits), (Decimal('500.00'), Decimal('200.00')))
+        self.assertEqual(snapshot.transaction_count, 2)
+
+        response = self.client.get('/api/wallet/statement/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['closing_balance']), Decimal('300.00'))
+        self.assertEqual(len(response.data['days']), 1)
+
+    def test_csv_export_streams_rows(self):
+        import csv
+        response = self.client.get('/api/wallet/statement/export/', {'file_format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0][:2], ['id', 'created_at'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][-1], 'Payout, bank "A"')
+
+    def test_jsonl_export(self):
+        import json
+        response = self.client.get('/api/wallet/statement/export/', {'file_format': 'jsonl'})
+
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([r['transaction_type'] for r in records], ['CREDIT', 'DEBIT'])
+        self.assertEqual(records[-1]['balance_after'], '300.00')
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WalletView, WalletTransactionViewSet, WithdrawalViewSet
+from .views import WalletView, WalletTransactionViewSet, WithdrawalViewSet, WalletStatementView, WalletStatementExportView
 
 router = DefaultRouter()
 router.register(r'transactions', WalletTransactionViewSet, basename='wallet-transaction')
@@ -8,5 +8,7 @@ router.register(r'withdrawals', WithdrawalViewSet, basename='withdrawal')
 
 urlpatterns = [
     path('', WalletView.as_view(), name='wallet-detail'),
+    path('statement/', WalletStatementView.as_view(), name='wallet-statement'),
+    path('statement/export/', WalletStatementExportView.as_view(), name='wallet-statement-export'),
     path('', include(router.urls)),
 ]
@@ -1,11 +1,15 @@
 from rest_framework import viewsets, views, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from .models import Wallet, WalletTransaction, Withdrawal
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from .models import Wallet, WalletTransaction, Withdrawal, WalletBalanceSnapshot
 from .serializers import WalletSerializer, WalletTransactionSerializer, WithdrawalSerializer, WithdrawalCreateSerializer
 from .services import WalletService
-from sellers.payout_service import RazorpayPayoutService
+from .statements import balance_at, day_start, statement_rows, stream_csv, stream_jsonl
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,6 +34,65 @@ class WalletTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         return WalletTransaction.objects.filter(wallet=wallet)
 
 
+def _statement_period(request):
+    """(start_date, end_date) from ?start=&end= (inclusive), default last 30 days"""
+    end = parse_date(request.query_params.get('end', '')) or timezone.localdate()
+    start = parse_date(request.query_params.get('start', '')) or end - timedelta(days=29)
+    if start > end:
+        raise ValueError("start must be on or before end")
+    return start, end
+
+
+class WalletStatementView(views.APIView):
+    """Opening/closing balance and daily totals, read from balance snapshots"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            start, end = _statement_period(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        wallet = WalletService.get_or_create_wallet(request.user)
+        days = WalletBalanceSnapshot.objects.filter(
+            wallet=wallet, date__gte=start, date__lte=end
+        ).order_by('date').values('date', 'closing_balance', 'total_credits', 'total_debits', 'transaction_count')
+        
+        return Response({
+            'start': start,
+            'end': end,
+            'opening_balance': balance_at(wallet, day_start(start)),
+            'closing_balance': balance_at(wallet, day_start(end + timedelta(days=1))),
+            'days': list(days),
+        })
+
+
+class WalletStatementExportView(views.APIView):
+    """Stream the wallet ledger for a period as CSV or JSON Lines"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            start, end = _statement_period(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Not "format": DRF reserves that query param for renderer selection
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in ('csv', 'jsonl'):
+            return Response({'error': 'file_format must be csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        wallet = WalletService.get_or_create_wallet(request.user)
+        rows = statement_rows(wallet, day_start(start), day_start(end + timedelta(days=1)))
+        
+        if file_format == 'csv':
+            response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(stream_jsonl(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="wallet-statement-{start}-{end}.{file_format}"'
+        return response
+
+
 class WithdrawalViewSet(viewsets.ModelViewSet):
     """Manage withdrawal requests"""
     serializer_class = WithdrawalSerializer
@@ -79,102 +142,40 @@ class WithdrawalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create withdrawal request
-        withdrawal = Withdrawal.objects.create(
-            wallet=wallet,
-            amount=amount,
-            bank_account_number=bank_account,
-            bank_ifsc_code=bank_ifsc,
-            bank_account_holder=bank_holder,
-            bank_name=bank_name,
-            status='REQUESTED'
-        )
-        
-        # Debit wallet immediately
-        try:
-            WalletService.debit_wallet(
-                user=request.user,
-                amount=amount,
-                source='WITHDRAWAL',
-                withdrawal=withdrawal,
-                description=f'Withdrawal request #{withdrawal.id}'
-            )
-        except Exception as e:
-            withdrawal.delete()
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Process payout via Razorpay
+        # Create withdrawal request and debit wallet together, so the payout
+        # queue never sees a withdrawal whose debit failed
         try:
-            payout_service = RazorpayPayoutService()
-            
-            # Create contact and fund account if not exists
-            if not seller_profile.razorpay_contact_id:
-                contact_id = payout_service.create_contact(seller_profile)
-                seller_profile.razorpay_contact_id = contact_id
-                seller_profile.save()
-            
-            if not seller_profile.razorpay_fund_account_id:
-                fund_account_id = payout_service.create_fund_account(
-                    seller_profile.razorpay_contact_id,
-                    {
-                        'account_number': bank_account,
-                        'ifsc': bank_ifsc,
-                        'name': bank_holder
-                    }
+            with transaction.atomic():
+                withdrawal = Withdrawal.objects.create(
+                    wallet=wallet,
+                    amount=amount,
+                    bank_account_number=bank_account,
+                    bank_ifsc_code=bank_ifsc,
+                    bank_account_holder=bank_holder,
+                    bank_name=bank_name,
+                    status='REQUESTED'
                 )
-                seller_profile.razorpay_fund_account_id = fund_account_id
-                seller_profile.save()
-            
-            # Create payout
-            result = payout_service.create_payout(
-                seller_profile.razorpay_fund_account_id,
-                amount,
-                withdrawal.id
-            )
-            
-            if result['success']:
-                withdrawal.status = 'PROCESSING'
-                withdrawal.razorpay_payout_id = result['payout_id']
-                withdrawal.utr_number = result.get('utr', '')
-                withdrawal.save()
-                
-                return Response({
-                    'message': 'Withdrawal request submitted successfully',
-                    'withdrawal_id': withdrawal.id,
-                    'amount': amount,
-                    'status': 'PROCESSING'
-                }, status=status.HTTP_201_CREATED)
-            else:
-                # Payout failed, credit back to wallet
-                WalletService.credit_wallet(
+                WalletService.debit_wallet(
                     user=request.user,
                     amount=amount,
-                    source='ADJUSTMENT',
-                    description=f'Withdrawal failed - refund for request #{withdrawal.id}'
+                    source='WITHDRAWAL',
+                    withdrawal=withdrawal,
+                    description=f'Withdrawal request #{withdrawal.id}'
                 )
-                withdrawal.status = 'FAILED'
-                withdrawal.rejection_reason = result.get('error', 'Payout failed')
-                withdrawal.save()
-                
-                return Response({
-                    'error': 'Withdrawal failed. Amount credited back to wallet.',
-                    'reason': result.get('error', 'Unknown error')
-                }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Razorpay submission and status polling happen in the payout queue worker
+        try:
+            from sellers.tasks import process_payout_queue
+            process_payout_queue.delay()
         except Exception as e:
-            logger.error(f"Withdrawal processing error: {str(e)}")
-            # Credit back to wallet
-            WalletService.credit_wallet(
-                user=request.user,
-                amount=amount,
-                source='ADJUSTMENT',
-                description=f'Withdrawal failed - refund for request #{withdrawal.id}'
-            )
-            withdrawal.status = 'FAILED'
-            withdrawal.rejection_reason = str(e)
-            withdrawal.save()
-            
-            return Response({
-                'error': 'Withdrawal processing failed. Amount credited back to wallet.',
-                'reason': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Beat picks the withdrawal up on its next run
+            logger.warning(f"Could not trigger payout queue for withdrawal {withdrawal.id}: {e}")
+        
+        return Response({
+            'message': 'Withdrawal request submitted successfully',
+            'withdrawal_id': withdrawal.id,
+            'amount': amount,
+            'status': withdrawal.status
+        }, status=status.HTTP_201_CREATED)
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class WishlistConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'wishlist'
\ No newline at end of file
+    name = 'wishlist'
+
+    def ready(self):
+        import wishlist.signals
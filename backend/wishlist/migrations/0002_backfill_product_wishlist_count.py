@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_wishlist_counts(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    WishlistItem = apps.get_model('wishlist', 'WishlistItem')
+
+    rows = WishlistItem.objects.values('product_id').annotate(total=Count('id')).order_by()
+    batch = []
+    for row in rows.iterator(chunk_size=5000):
+        batch.append(Product(pk=row['product_id'], wishlist_count=row['total']))
+        if len(batch) == 5000:
+            Product.objects.bulk_update(batch, ['wishlist_count'])
+            batch = []
+    Product.objects.bulk_update(batch, ['wishlist_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wishlist', '0001_initial'),
+        ('catalog', '0004_product_wishlist_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_wishlist_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import store
+from .models import WishlistItem
+
+
+@receiver([post_save, post_delete], sender=WishlistItem)
+def drop_cached_wishlist(sender, instance, **kwargs):
+    if getattr(instance, '_written_through', False):
+        return  # store.toggle() updates the set itself
+    # After commit, so a reload can't cache the rows from before this change
+    user_id = instance.user_id
+    transaction.on_commit(lambda: store.invalidate(user_id))
@@ -0,0 +1,225 @@
+"""
+Wishlist store.
+
+Each customer's wishlist is mirrored in a Redis set of product ids. A product
+grid asks "which of these are wishlisted" with one SMISMEMBER and the header
+badge reads SCARD instead of running a COUNT. WishlistItem stays the source of
+truth. toggle() writes the row, then applies the same change to the set once
+the transaction has committed (write-through) and reads the new size from
+it. Any other write to a WishlistItem (the admin, a cascade from a deleted
+user or product) drops the owner's set on commit instead (wishlist.signals),
+and the next read reloads it. Bulk writes that skip signals must call
+invalidate() themselves.
+
+A set is loaded from the database on first use and expires after
+WISHLIST_CACHE_SECONDS. It always holds the sentinel member LOADED, so an
+empty wishlist is cached too, and a set without it is reloaded rather than
+trusted. Every committed write also bumps a per-user generation. A load
+stores its set only if the generation is the one it saw before reading the
+database, so a read that raced a write never caches the rows from before
+it. Without Redis, or when a command fails, reads fall back to the database.
+
+toggle() also moves Product.wishlist_count by one. The count is a popularity
+signal for ranking (?ordering=-wishlist_count). reconcile() recomputes it from
+WishlistItem nightly.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from redis.exceptions import RedisError, WatchError
+
+from catalog.models import Product
+from core.cache import redis_client
+from .models import WishlistItem
+
+logger = logging.getLogger(__name__)
+
+LOADED = 0  # Sentinel member; no product has pk 0
+
+
+def _key(user_id):
+    return cache.make_key(f'wishlist:{user_id}')
+
+
+def _generation_key(user_id):
+    return cache.make_key(f'wishlist:{user_id}:generation')
+
+
+def _db_ids(user_id):
+    return set(WishlistItem.objects.filter(user_id=user_id).values_list('product_id', flat=True))
+
+
+def _load(client, user_id):
+    """Replace the user's set with their wishlist from the database, unless a write committed meanwhile"""
+    key, generation_key = _key(user_id), _generation_key(user_id)
+    generation = client.get(generation_key)
+    product_ids = _db_ids(user_id)
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(generation_key)
+            if pipe.get(generation_key) != generation:
+                return product_ids
+            pipe.multi()
+            pipe.delete(key)
+            pipe.sadd(key, LOADED, *product_ids)
+            pipe.expire(key, settings.WISHLIST_CACHE_SECONDS)
+            pipe.execute()
+        except WatchError:
+            # Our rows may predate that write; the next read loads again
+            pass
+    return product_ids
+
+
+def _bump(pipe, user_id):
+    generation_key = _generation_key(user_id)
+    pipe.incr(generation_key)
+    pipe.expire(generation_key, settings.WISHLIST_CACHE_SECONDS)
+
+
+def product_ids(user_id):
+    """Every product id in the user's wishlist"""
+    client = redis_client()
+    if client is None:
+        return _db_ids(user_id)
+    try:
+        members = {int(member) for member in client.smembers(_key(user_id))}
+        if LOADED not in members:
+            return _load(client, user_id)
+    except RedisError as e:
+        logger.warning(f"Wishlist store unavailable: {e}")
+        return _db_ids(user_id)
+    members.discard(LOADED)
+    return members
+
+
+def wishlisted(user_id, product_ids):
+    """The subset of `product_ids` in the user's wishlist, in one round trip"""
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return set()
+    client = redis_client()
+    if client is None:
+        return _db_ids(user_id) & set(product_ids)
+    key = _key(user_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.sismember(key, LOADED)
+        pipe.smismember(key, product_ids)
+        loaded, flags = pipe.execute()
+        if not loaded:
+            return _load(client, user_id) & set(product_ids)
+    except RedisError as e:
+        logger.warning(f"Wishlist store unavailable: {e}")
+        return _db_ids(user_id) & set(product_ids)
+    return {product_id for product_id, flag in zip(product_ids, flags) if flag}
+
+
+def count(user_id):
+    """Number of products in the user's wishlist"""
+    client = redis_client()
+    if client is None:
+        return WishlistItem.objects.filter(user_id=user_id).count()
+    key = _key(user_id)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.sismember(key, LOADED)
+        pipe.scard(key)
+        loaded, size = pipe.execute()
+        return size - 1 if loaded else len(_load(client, user_id))
+    except RedisError as e:
+        logger.warning(f"Wishlist store unavailable: {e}")
+        return WishlistItem.objects.filter(user_id=user_id).count()
+
+
+def invalidate(user_id):
+    """Drop the user's set; the next read reloads it from the database"""
+    client = redis_client()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        _bump(pipe, user_id)
+        pipe.delete(_key(user_id))
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Wishlist store unavailable, user {user_id}'s set not dropped: {e}")
+
+
+def _write_through(user_id, product_id, action):
+    """Apply a committed toggle to the user's set; returns the wishlist size"""
+    client = redis_client()
+    if client is None:
+        return WishlistItem.objects.filter(user_id=user_id).count()
+    key = _key(user_id)
+    try:
+        pipe = client.pipeline()
+        _bump(pipe, user_id)
+        if action == 'added':
+            pipe.sadd(key, product_id)
+        else:
+            pipe.srem(key, product_id)
+        pipe.expire(key, settings.WISHLIST_CACHE_SECONDS)
+        pipe.sismember(key, LOADED)
+        pipe.scard(key)
+        *_, loaded, size = pipe.execute()
+        # No sentinel: the set had expired or was never loaded, and this write recreated it partially
+        return size - 1 if loaded else len(_load(client, user_id))
+    except RedisError as e:
+        logger.warning(f"Wishlist store write failed, dropping user {user_id}'s set: {e}")
+        invalidate(user_id)
+        return WishlistItem.objects.filter(user_id=user_id).count()
+
+
+def toggle(user, product_id):
+    """
+    Add the product, or remove it if already wishlisted. Returns (action,
+    wishlist size). Call it outside any transaction: the set is updated as
+    soon as the row change has committed.
+    """
+    with transaction.atomic():
+        item = WishlistItem.objects.filter(user=user, product_id=product_id).first()
+        removed = 0
+        if item:
+            # The set is written through below, not dropped by wishlist.signals
+            item._written_through = True
+            removed, _ = item.delete()
+        if removed:
+            action, delta = 'removed', -1
+        else:
+            try:
+                with transaction.atomic():
+                    item = WishlistItem(user=user, product_id=product_id)
+                    item._written_through = True
+                    item.save()
+                action, delta = 'added', 1
+            except IntegrityError:
+                # A concurrent click from the same user got there first
+                action, delta = 'added', 0
+        if delta:
+            Product.objects.filter(pk=product_id).update(wishlist_count=Greatest(F('wishlist_count') + delta, 0))
+
+    return action, _write_through(user.id, product_id, action)
+
+
+def reconcile():
+    """Recompute Product.wishlist_count from WishlistItem; only products that differ are written"""
+    actual = dict(WishlistItem.objects.values_list('product_id').annotate(total=Count('id')).order_by())
+
+    with transaction.atomic():
+        stored = dict(Product.objects.filter(wishlist_count__gt=0).values_list('pk', 'wishlist_count').iterator())
+        changed = [
+            Product(pk=product_id, wishlist_count=actual.get(product_id, 0))
+            for product_id, total in stored.items() if actual.get(product_id, 0) != total
+        ] + [
+            Product(pk=product_id, wishlist_count=total)
+            for product_id, total in actual.items() if product_id not in stored
+        ]
+        Product.objects.bulk_update(changed, ['wishlist_count'], batch_size=1000)
+
+    if changed:
+        logger.warning(f"Wishlist counts corrected for {len(changed)} products")
+    return {'updated': len(changed)}
@@ -0,0 +1,12 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def reconcile_wishlist_counts():
+    """Recompute Product.wishlist_count from wishlist rows to correct any drift"""
+    from .store import reconcile
+    stats = reconcile()
+    logger.info(f"Wishlist count reconciliation: {stats}")
+    return f"Wishlist counts: {stats['updated']} corrected"
@@ -1,3 +1,140 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from catalog.models import Category, Product
+from core.cache import redis_client
+from . import store
+from .models import WishlistItem
+
+User = get_user_model()
+
+
+class WishlistStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user(email='seller@example.com', password='pass12345', role='SELLER')
+        category = Category.objects.create(name='Cables', slug='cables')
+        self.products = [
+            Product.objects.create(
+                seller=seller, category=category, name=f'Cable {i}', sku=f'CBL-{i}', description='Cable',
+                price=100, stock_quantity=10, is_active=True
+            )
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def toggle(self, product):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/wishlist/toggle/', {'product_id': product.id}).data
+
+    def status(self, products):
+        ids = ','.join(str(p.id) for p in products)
+        return self.client.get(f'/api/wishlist/check/?ids={ids}').data
+
+    def test_toggle_writes_through_to_set_and_counter(self):
+        first, second, third = self.products
+        self.assertEqual(self.toggle(first), {'status': 'success', 'action': 'added', 'wishlist_count': 1})
+        self.assertEqual(self.toggle(second)['wishlist_count'], 2)
+        self.assertEqual(self.toggle(first), {'status': 'success', 'action': 'removed', 'wishlist_count': 1})
+
+        self.assertEqual(set(WishlistItem.objects.values_list('product_id', flat=True)), {second.id})
+        self.assertEqual(store.product_ids(self.user.id), {second.id})
+        self.assertEqual(self.status(self.products), {'wishlisted': [second.id], 'wishlist_count': 1})
+        self.assertEqual(
+            dict(Product.objects.values_list('pk', 'wishlist_count')), {first.id: 0, second.id: 1, third.id: 0}
+        )
+
+    def test_bulk_check_served_from_set(self):
+        WishlistItem.objects.create(user=self.user, product=self.products[0])
+        WishlistItem.objects.create(user=self.user, product=self.products[2])
+        self.assertEqual(self.status(self.products)['wishlisted'], [self.products[0].id, self.products[2].id])
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.status(self.products[:2])
+            single = self.client.get(f'/api/wishlist/check/{self.products[2].id}/').data
+        self.assertEqual(data, {'wishlisted': [self.products[0].id], 'wishlist_count': 2})
+        self.assertEqual(single, {'is_wishlisted': True})
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_empty_wishlist_is_cached(self):
+        self.assertEqual(self.status(self.products), {'wishlisted': [], 'wishlist_count': 0})
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(store.count(self.user.id), 0)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_toggle_count_comes_from_the_set(self):
+        store.product_ids(self.user.id)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.toggle(self.products[0])['wishlist_count'], 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_expired_set_is_reloaded(self):
+        WishlistItem.objects.create(user=self.user, product=self.products[0])
+        store.product_ids(self.user.id)
+        redis_client().delete(store._key(self.user.id))
+
+        # A write racing the expiry must not leave a partial set behind
+        self.assertEqual(self.toggle(self.products[1])['wishlist_count'], 2)
+        self.assertEqual(store.wishlisted(self.user.id, [p.id for p in self.products]),
+                         {self.products[0].id, self.products[1].id})
+
+    def test_load_racing_a_write_is_not_cached(self):
+        db_ids = store._db_ids
+
+        def read_then_commit_elsewhere(user_id):
+            rows = db_ids(user_id)
+            # Another process commits a change and drops the set after these rows were read
+            WishlistItem.objects.create(user=self.user, product=self.products[0])
+            store.invalidate(user_id)
+            return rows
+
+        with mock.patch.object(store, '_db_ids', side_effect=read_then_commit_elsewhere):
+            self.assertEqual(store.product_ids(self.user.id), set())
+        self.assertEqual(redis_client().exists(store._key(self.user.id)), 0)
+        self.assertEqual(store.product_ids(self.user.id), {self.products[0].id})
+
+    def test_other_writers_drop_the_set(self):
+        first, second, third = self.products
+        WishlistItem.objects.create(user=self.user, product=first)
+        WishlistItem.objects.create(user=self.user, product=second)
+        self.assertEqual(store.product_ids(self.user.id), {first.id, second.id})
+
+        # Admin edits and cascades, not toggle()
+        with self.captureOnCommitCallbacks(execute=True):
+            WishlistItem.objects.filter(user=self.user, product=first).delete()
+            Product.objects.filter(pk=second.pk).delete()  # hard delete, cascading
+            WishlistItem.objects.create(user=self.user, product=third)
+        self.assertEqual(self.status(self.products), {'wishlisted': [third.id], 'wishlist_count': 1})
+
+    def test_set_is_dropped_only_after_commit(self):
+        self.assertEqual(store.product_ids(self.user.id), set())
+        with self.captureOnCommitCallbacks() as callbacks:
+            WishlistItem.objects.create(user=self.user, product=self.products[0])
+            self.assertEqual(redis_client().exists(store._key(self.user.id)), 1)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(redis_client().exists(store._key(self.user.id)), 0)
+
+    def test_too_many_ids_rejected(self):
+        ids = ','.join(str(i) for i in range(1, 202))
+        self.assertEqual(self.client.get(f'/api/wishlist/check/?ids={ids}').status_code, 400)
+        self.assertEqual(self.client.get('/api/wishlist/check/?ids=1,x').status_code, 400)
+
+    def test_reconcile_corrects_drift(self):
+        WishlistItem.objects.create(user=self.user, product=self.products[0])
+        Product.objects.filter(pk=self.products[1].pk).update(wishlist_count=4)
 
-# Create your tests here.
+        self.assertEqual(store.reconcile(), {'updated': 2})
+        self.assertEqual(
+            dict(Product.objects.values_list('pk', 'wishlist_count')),
+            {self.products[0].id: 1, self.products[1].id: 0, self.products[2].id: 0}
+        )
+        self.assertEqual(store.reconcile(), {'updated': 0})
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import WishlistListView, WishlistToggleView, CheckItemStatusView
+from .views import WishlistListView, WishlistToggleView, WishlistStatusView, CheckItemStatusView
 
 urlpatterns = [
     # List all items
@@ -8,6 +8,9 @@ urlpatterns = [
     # Toggle (Add/Remove)
     path('toggle/', WishlistToggleView.as_view(), name='wishlist-toggle'),
     
+    # Check status for a page of products: ?ids=1,2,3
+    path('check/', WishlistStatusView.as_view(), name='wishlist-status'),
+
     # Check status for a single product (for UI state)
     path('check/<int:product_id>/', CheckItemStatusView.as_view(), name='wishlist-check'),
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@ from rest_framework import generics, views, permissions, status
 from rest_framework.response import Response
 from .models import WishlistItem
 from .serializers import WishlistItemSerializer, WishlistToggleSerializer
-from catalog.models import Product
+from . import store
 
 class WishlistListView(generics.ListAPIView):
     """
@@ -14,7 +14,9 @@ class WishlistListView(generics.ListAPIView):
 
     def get_queryset(self):
         # Select related optimizations for performance
-        return WishlistItem.objects.filter(user=self.request.user).select_related('product')
+        return WishlistItem.objects.filter(user=self.request.user).select_related(
+            'product__category', 'product__brand'
+        ).prefetch_related('product__images')
 
 class WishlistToggleView(views.APIView):
     """
@@ -27,24 +29,10 @@ class WishlistToggleView(views.APIView):
     def post(self, request):
         serializer = WishlistToggleSerializer(data=request.data)
         if serializer.is_valid():
-            product_id = serializer.validated_data['product_id']
-            user = request.user
-            
-            # Check if exists
-            item = WishlistItem.objects.filter(user=user, product_id=product_id).first()
-            
-            if item:
-                # Logic: If it exists, remove it (Toggle Off)
-                item.delete()
-                action = "removed"
-            else:
-                # Logic: If not, create it (Toggle On)
-                WishlistItem.objects.create(user=user, product_id=product_id)
-                action = "added"
-            
-            # Return current count for updating UI badges
-            current_count = WishlistItem.objects.filter(user=user).count()
-            
+            # Row, popularity counter and the user's cached set in one call;
+            # the badge count is the set's SCARD after the write, not a COUNT query
+            action, current_count = store.toggle(request.user, serializer.validated_data['product_id'])
+
             return Response({
                 "status": "success",
                 "action": action,
@@ -53,6 +41,34 @@ class WishlistToggleView(views.APIView):
             
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class WishlistStatusView(views.APIView):
+    """
+    GET: Which of a page of products are in the wishlist (hearts on a product grid).
+    URL: /api/wishlist/check/?ids=1,2,3
+    Output: { "wishlisted": [1, 3], "wishlist_count": 5 }
+    Without ids, every wishlisted product id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_IDS = 200
+
+    def get(self, request):
+        raw = request.query_params.get('ids')
+        if raw is None:
+            product_ids = store.product_ids(request.user.id)
+        else:
+            try:
+                ids = [int(value) for value in raw.split(',') if value.strip()]
+            except ValueError:
+                return Response({"ids": "Expected comma-separated product ids."}, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > self.MAX_IDS:
+                return Response({"ids": f"At most {self.MAX_IDS} ids per request."}, status=status.HTTP_400_BAD_REQUEST)
+            product_ids = store.wishlisted(request.user.id, ids)
+
+        return Response({
+            "wishlisted": sorted(product_ids),
+            "wishlist_count": store.count(request.user.id)
+        })
+
 class CheckItemStatusView(views.APIView):
     """
     GET: Check if specific product is in wishlist (for coloring the Heart icon).
@@ -61,5 +77,5 @@ class CheckItemStatusView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, product_id):
-        exists = WishlistItem.objects.filter(user=request.user, product_id=product_id).exists()
-        return Response({"is_wishlisted": exists})
\ No newline at end of file
+        exists = product_id in store.wishlisted(request.user.id, [product_id])
+        return Response({"is_wishlisted": exists})
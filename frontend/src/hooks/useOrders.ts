@@ -2,7 +2,7 @@ import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { orderAPI } from '../services/api';
 import { useAuthStore } from '../store/authStore';
 
-export const useOrders = (params?: { status?: string; page?: number }) => {
+export const useOrders = (params?: { status?: string; cursor?: string }) => {
   const isAuthenticated = useAuthStore((state) => state.isAuthenticated);
   return useQuery({
     queryKey: ['orders', params],
@@ -1,3 +1,4 @@
+import { useMemo } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { wishlistAPI } from '../services/api';
 import { useAuthStore } from '../store/authStore';
@@ -29,14 +30,26 @@ export const useToggleWishlist = () => {
 export const useAddToWishlist = () => useToggleWishlist();
 export const useRemoveFromWishlist = () => useToggleWishlist();
 
-export const useCheckWishlist = (product_id: number) => {
+// Every wishlisted product id, fetched once and shared by all product cards;
+// toggling invalidates it along with ['wishlist']
+export const useWishlistIds = () => {
   const isAuthenticated = useAuthStore((state) => state.isAuthenticated);
   return useQuery({
-    queryKey: ['wishlist-check', product_id],
+    queryKey: ['wishlist', 'ids'],
     queryFn: async () => {
-      const response = await wishlistAPI.check(product_id);
-      return response.data;
+      const response = await wishlistAPI.checkMany();
+      return new Set<number>(response.data.wishlisted);
     },
-    enabled: !!product_id && isAuthenticated,
+    retry: false,
+    enabled: isAuthenticated,
   });
 };
+
+export const useCheckWishlist = (product_id: number) => {
+  const { data: ids, ...query } = useWishlistIds();
+  const data = useMemo(
+    () => (ids && product_id ? { is_wishlisted: ids.has(product_id) } : undefined),
+    [ids, product_id]
+  );
+  return { ...query, data };
+};
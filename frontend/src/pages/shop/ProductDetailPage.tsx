@@ -45,8 +45,8 @@ const ProductDetailPage: React.FC = () => {
   }, [slug, navigate]);
 
   useEffect(() => {
-    if (wishlistCheck?.data?.is_wishlisted !== undefined) {
-      setIsInWishlist(wishlistCheck.data.is_wishlisted);
+    if (wishlistCheck?.is_wishlisted !== undefined) {
+      setIsInWishlist(wishlistCheck.is_wishlisted);
     }
   }, [wishlistCheck]);
 
@@ -106,8 +106,8 @@ export const cartAPI = {
 
 // ==================== ORDERS ====================
 export const orderAPI = {
-  list: (params?: { status?: string; page?: number }) =>
-    apiClient.get<{ results: Order[]; count: number }>('/orders/', { params }),
+  list: (params?: { status?: string; cursor?: string }) =>
+    apiClient.get<{ results: Order[]; pagination: { next: string | null; previous: string | null } }>('/orders/', { params }),
   
   get: (id: string) =>
     apiClient.get<Order>(`/orders/${id}/`),
@@ -155,6 +155,10 @@ export const wishlistAPI = {
   
   check: (product_id: number) =>
     apiClient.get(`/wishlist/check/${product_id}/`),
+
+  // Wishlisted subset of `ids` (every wishlisted id when omitted) and the wishlist size
+  checkMany: (ids?: number[]) =>
+    apiClient.get('/wishlist/check/', { params: ids ? { ids: ids.join(',') } : {} }),
 };
 
 // ==================== REVIEWS ====================
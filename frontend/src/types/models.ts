@@ -181,7 +181,7 @@ export interface Review {
 
 // --- 6. SELLER DASHBOARD ---
 
-export type PayoutStatus = 'REQUESTED' | 'PROCESSING' | 'PAID' | 'REJECTED';
+export type PayoutStatus = 'REQUESTED' | 'PROCESSING' | 'PAID' | 'REJECTED' | 'FAILED';
 
 export interface Payout {
   id: number;
@@ -1,34 +1,236 @@
-from locust import HttpUser, task, between
+"""
+Load-test scenarios against the seeded benchmark dataset.
+
+Prepare the data once (same seed -> same users, products and slugs):
+
+    python manage.py generate_benchmark_data --scale 0.01
+
+Run and compare with the stored baseline (exit code 1 on regression):
+
+    locust -f tests/locustfile.py --headless -u 50 -r 10 -t 2m --host=http://localhost:8000
+
+Record a new baseline after an intentional change:
+
+    locust -f tests/locustfile.py --headless -u 50 -r 10 -t 2m --host=http://localhost:8000 --save-baseline
+
+Baselines hold p95 latency and failure ratio per request name; a run fails
+when p95 exceeds baseline x (1 + --baseline-tolerance) or the failure ratio
+rises by more than one percentage point.
+"""
+import json
+import logging
+import os
 import random
 
-class EcommerceUser(HttpUser):
+from locust import HttpUser, between, events, task
+
+BENCH_PASSWORD = 'benchpass123'
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'locust_baseline.json')
+SEARCH_TERMS = ['battery', 'display', 'charging port', 'camera', 'speaker', 'housing', 'flex', 'sim tray']
+
+logger = logging.getLogger(__name__)
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    parser.add_argument('--bench-users', type=int, default=1000, help='Customers in the benchmark dataset')
+    parser.add_argument('--bench-sellers', type=int, default=10, help='Sellers in the benchmark dataset')
+    parser.add_argument('--save-baseline', action='store_true', default=False, help='Store this run as the baseline')
+    parser.add_argument('--baseline-tolerance', type=float, default=0.25, help='Allowed p95 regression (0.25 = 25%%)')
+
+
+class BenchUser(HttpUser):
+    abstract = True
     wait_time = between(1, 3)
-    
+    email_template = None
+    population_option = None
+
     def on_start(self):
-        response = self.client.post("/api/auth/login/", json={
-            "email": "test@example.com",
-            "password": "testpass123"
-        })
-        if response.status_code == 200:
-            self.token = response.json().get('access')
-            self.client.headers.update({'Authorization': f'Bearer {self.token}'})
-    
-    @task(3)
-    def browse_products(self):
-        self.client.get("/api/catalog/products/")
-    
+        self.slugs = []
+        if self.email_template:
+            population = getattr(self.environment.parsed_options, self.population_option)
+            email = self.email_template.format(n=random.randrange(population))
+            response = self.client.post('/api/auth/login/', json={'email': email, 'password': BENCH_PASSWORD},
+                                        name='/api/auth/login/')
+            if response.status_code == 200:
+                self.client.headers.update({'Authorization': f"Bearer {response.json().get('access')}"})
+
+    def product_slugs(self):
+        """Real slugs from a random listing page instead of hardcoded ids"""
+        if not self.slugs:
+            response = self.client.get(f'/api/catalog/products/?page={random.randint(1, 20)}',
+                                       name='/api/catalog/products/?page=N')
+            results = response.json().get('results', []) if response.ok else []
+            self.slugs = [p['slug'] for p in results]
+        return self.slugs
+
+    def some_product_ids(self, count=1):
+        response = self.client.get(f'/api/catalog/products/?page={random.randint(1, 20)}',
+                                   name='/api/catalog/products/?page=N')
+        results = response.json().get('results', []) if response.ok else []
+        in_stock = [p['id'] for p in results if p.get('stock_quantity', 0) > 5]
+        return random.sample(in_stock, min(count, len(in_stock)))
+
+
+class Browser(BenchUser):
+    """Anonymous catalog traffic: listings, category filters, product pages"""
+    weight = 5
+
+    @task(4)
+    def list_products(self):
+        self.client.get('/api/catalog/products/', name='/api/catalog/products/')
+
     @task(2)
+    def list_category(self):
+        self.client.get(f'/api/catalog/products/?category__slug=bench-category-{random.randrange(50)}',
+                        name='/api/catalog/products/?category__slug=X')
+
+    @task(3)
     def view_product(self):
-        product_id = random.randint(1, 100)
-        self.client.get(f"/api/catalog/products/{product_id}/")
-    
+        slugs = self.product_slugs()
+        if slugs:
+            self.client.get(f'/api/catalog/products/{random.choice(slugs)}/', name='/api/catalog/products/[slug]/')
+
     @task(1)
-    def add_to_cart(self):
-        self.client.post("/api/cart/add/", json={
-            "product_id": random.randint(1, 50),
-            "quantity": 1
-        })
-    
+    def categories(self):
+        self.client.get('/api/catalog/categories/', name='/api/catalog/categories/')
+
+
+class Searcher(BenchUser):
+    weight = 2
+
+    @task(3)
+    def search(self):
+        self.client.get(f'/api/search/advanced/?q={random.choice(SEARCH_TERMS)}', name='/api/search/advanced/?q=X')
+
+    @task(2)
+    def autocomplete(self):
+        term = random.choice(SEARCH_TERMS)[:random.randint(2, 4)]
+        self.client.get(f'/api/search/autocomplete/?q={term}', name='/api/search/autocomplete/?q=X')
+
     @task(1)
+    def catalog_search(self):
+        self.client.get(f'/api/catalog/products/?search={random.choice(SEARCH_TERMS)}',
+                        name='/api/catalog/products/?search=X')
+
+
+class Shopper(BenchUser):
+    """Logged-in customer building a cart"""
+    weight = 2
+    email_template = 'bench-user-{n}@bench.local'
+    population_option = 'bench_users'
+
+    @task(3)
+    def add_to_cart(self):
+        for product_id in self.some_product_ids():
+            self.client.post('/api/cart/add/', json={'product_id': product_id, 'quantity': 1}, name='/api/cart/add/')
+
+    @task(4)
     def view_cart(self):
-        self.client.get("/api/cart/")
+        self.client.get('/api/cart/', name='/api/cart/')
+
+    @task(1)
+    def clear_cart(self):
+        self.client.delete('/api/cart/', name='/api/cart/ [DELETE]')
+
+
+class Buyer(BenchUser):
+    """Cart -> checkout -> order history"""
+    weight = 1
+    email_template = 'bench-user-{n}@bench.local'
+    population_option = 'bench_users'
+
+    def on_start(self):
+        super().on_start()
+        response = self.client.get('/api/accounts/addresses/', name='/api/accounts/addresses/')
+        data = response.json() if response.ok else []
+        addresses = data.get('results', data) if isinstance(data, dict) else data
+        self.address_id = addresses[0]['id'] if addresses else None
+
+    @task(2)
+    def checkout(self):
+        if not self.address_id:
+            return
+        for product_id in self.some_product_ids(count=2):
+            self.client.post('/api/cart/add/', json={'product_id': product_id, 'quantity': 1}, name='/api/cart/add/')
+        self.client.post('/api/orders/checkout/', json={'address_id': self.address_id, 'payment_method': 'COD'},
+                         name='/api/orders/checkout/')
+
+    @task(3)
+    def order_history(self):
+        self.client.get('/api/orders/', name='/api/orders/')
+
+
+class Seller(BenchUser):
+    """Seller dashboard: stats, order inbox, profile"""
+    weight = 1
+    email_template = 'bench-seller-{n}@bench.local'
+    population_option = 'bench_sellers'
+
+    @task(3)
+    def dashboard(self):
+        self.client.get('/api/analytics/seller/stats/', name='/api/analytics/seller/stats/')
+
+    @task(3)
+    def orders(self):
+        self.client.get('/api/sellers/orders/', name='/api/sellers/orders/')
+
+    @task(1)
+    def profile(self):
+        self.client.get('/api/sellers/profile/', name='/api/sellers/profile/')
+
+    @task(1)
+    def top_sellers(self):
+        self.client.get('/api/sellers/top-sellers/', name='/api/sellers/top-sellers/')
+
+
+# --- Baselines ---
+
+def _run_summary(stats):
+    summary = {}
+    for entry in stats.entries.values():
+        if not entry.num_requests:
+            continue
+        summary[f'{entry.method} {entry.name}'] = {
+            'p95_ms': entry.get_response_time_percentile(0.95),
+            'median_ms': entry.median_response_time,
+            'failure_ratio': round(entry.num_failures / entry.num_requests, 4),
+            'requests': entry.num_requests,
+        }
+    return summary
+
+
+@events.quitting.add_listener
+def _check_baseline(environment, **kwargs):
+    options = environment.parsed_options
+    if options is None:
+        return
+    summary = _run_summary(environment.stats)
+
+    if options.save_baseline:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        logger.info(f"Baseline saved to {BASELINE_FILE} ({len(summary)} requests)")
+        return
+
+    if not os.path.exists(BASELINE_FILE):
+        logger.warning("No locust baseline stored; run with --save-baseline to create one")
+        return
+    with open(BASELINE_FILE) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, current in sorted(summary.items()):
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if current['p95_ms'] > expected['p95_ms'] * (1 + options.baseline_tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {expected['p95_ms']}ms")
+        if current['failure_ratio'] > expected['failure_ratio'] + 0.01:
+            regressions.append(f"{name}: failures {current['failure_ratio']:.2%} vs baseline {expected['failure_ratio']:.2%}")
+
+    if regressions:
+        logger.error("Performance regressions against baseline:\n  " + "\n  ".join(regressions))
+        environment.process_exit_code = 1
+    else:
+        logger.info(f"No regressions against baseline ({len(baseline)} requests)")
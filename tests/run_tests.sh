@@ -5,7 +5,16 @@ echo "Running Django Tests..."
 cd backend
 python manage.py test --verbosity=2
 
+echo "\nChecking Query Budgets..."
+# Fails on any N+1 or budget overrun; the measured table is kept for the CI summary
+QUERY_BUDGET_REPORT=query_budgets.md python manage.py test tests.test_query_budgets
+cat query_budgets.md
+
+echo "\nRunning Micro-benchmarks..."
+./benchmarks/run.sh
+
 echo "\nRunning Load Tests..."
+# Needs the seeded dataset: python manage.py generate_benchmark_data --scale 0.01
 locust -f ../tests/locustfile.py --headless -u 100 -r 10 -t 60s --host=http://localhost:8000
 
 echo "\nTest Coverage Report..."